@@ -1,3 +1,30 @@
+import os
+
+# Green-thread servers need the standard library patched before anything
+# else is imported
+ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+
+# The local queue runs Whisper and the LLM calls in this process. On green
+# threads that CPU-bound work would block the hub, and with it every
+# websocket and request, so the pipeline has to run in separate workers
+if (
+    ASYNC_MODE in ("eventlet", "gevent")
+    and os.getenv("JOB_QUEUE_BACKEND", "local") != "database"
+):
+    raise ValueError(
+        f"SOCKETIO_ASYNC_MODE={ASYNC_MODE} requires JOB_QUEUE_BACKEND=database "
+        "with jobs processed by python worker.py"
+    )
+
+if ASYNC_MODE == "eventlet":
+    import eventlet
+
+    eventlet.monkey_patch()
+elif ASYNC_MODE == "gevent":
+    from gevent import monkey
+
+    monkey.patch_all()
+
 from backend import create_app, socketio
 from backend.config import FLASK_HOST, FLASK_PORT, FLASK_DEBUG
 
@@ -1,13 +1,21 @@
 from flask import Flask
 from flask_socketio import SocketIO
 from flask_cors import CORS
-from .config import DATABASE_URL, CORS_ORIGINS
+from .config import (
+    DATABASE_URL,
+    CORS_ORIGINS,
+    WARMUP_ON_START,
+    JOB_QUEUE_BACKEND,
+    SOCKETIO_MESSAGE_QUEUE,
+    SOCKETIO_ASYNC_MODE,
+)
 
-socketio = SocketIO(cors_allowed_origins=CORS_ORIGINS)
+socketio = SocketIO(cors_allowed_origins=CORS_ORIGINS, async_mode=SOCKETIO_ASYNC_MODE)
 app_instance = None
 
 
-def create_app():
+def create_app(role="api"):
+    """Build the Flask app; ``role`` is "api" for app.py or "worker"."""
     global app_instance
     app = Flask(__name__)
 
@@ -17,10 +25,11 @@ def create_app():
 
     CORS(app, origins=CORS_ORIGINS.split(","), supports_credentials=True)
 
-    from .models.database import db
+    from .models.database import db, ensure_schema
 
     db.init_app(app)
-    socketio.init_app(app)
+    # With a message queue, events emitted by workers reach the API's clients
+    socketio.init_app(app, message_queue=SOCKETIO_MESSAGE_QUEUE or None)
 
     from .api.routes import api_bp
     from .api.ws import ws_bp
@@ -32,6 +41,23 @@ def create_app():
 
     with app.app_context():
         db.create_all()
+        ensure_schema()
+
+    if role == "api":
+        # One process drains pending_llm; workers only run pipeline jobs
+        from .services.llm_stage_service import start_llm_retry_worker
+
+        start_llm_retry_worker(app)
+
+    if role == "api" and JOB_QUEUE_BACKEND == "database" and not SOCKETIO_MESSAGE_QUEUE:
+        from .services.job_queue import start_progress_relay
+
+        start_progress_relay(app, socketio)
+
+    if WARMUP_ON_START:
+        from .services.warmup_service import start_warmup
+
+        start_warmup()
 
     return app
 
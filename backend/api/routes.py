@@ -1,25 +1,85 @@
-from flask import Blueprint, request, jsonify
+from flask import (
+    Blueprint,
+    Response,
+    request,
+    jsonify,
+    send_file,
+    stream_with_context,
+)
 from ..models.database import db, Video, Category
 from ..services.youtube_service import (
     extract_video_id,
     download_audio,
     get_video_metadata,
 )
-from ..services.transcribe_service import transcribe_audio
-from ..services.summarize_service import summarize_transcript
-from ..services.categorize_service import auto_categorize_video
+from ..services.transcribe_service import (
+    transcribe_audio,
+    transcription_path_for,
+    transcript_version,
+    select_model,
+    QUALITY_HINTS,
+)
+from ..services.upload_service import (
+    UploadError,
+    is_upload_url,
+    upload_url,
+    media_id,
+    resolve_upload,
+    save_multipart_upload,
+    ingest_directory,
+)
+from ..services.export_service import export_library, EXPORT_FORMATS
+from ..services.llm_gateway import LLMUnavailableError, breaker
+from ..services.llm_stage_service import run_llm_stage, park_for_llm, finish_video
+from ..services.warmup_service import readiness
+from ..services.segment_service import (
+    load_index,
+    forget_index,
+    deep_link,
+    parse_timestamp,
+)
+from ..services.reprocess_service import start_reprocess, reprocess_status, STAGES
+from ..services.streaming_service import TranscriptStream
+from ..services.summarize_service import ROLLING_SUMMARY_VERSION
 from ..utils.progress_tracker import ProgressTracker
+from ..utils import metrics, memory
+from ..utils.profiler import JobProfile, profile_paths, delete_profile
+from ..utils.job_scheduler import Job, JobScheduler
+from ..utils.http_cache import cached_json
 from .. import socketio, get_app
-from ..config import DOWNLOAD_DIR
-import threading
+from ..services import job_queue
+from ..services.changes_service import (
+    changes_since,
+    record_deletion,
+    CursorError,
+    CursorExpired,
+    DEFAULT_CHANGES_LIMIT,
+)
+from ..config import (
+    DOWNLOAD_DIR,
+    JOB_QUEUE_BACKEND,
+    MAX_CONCURRENT_JOBS,
+    STREAM_CHUNK_SECONDS,
+    TRANSCRIBE_STREAMING,
+    SCHEDULER_POLICY,
+    SCHEDULER_AGING_RATE,
+)
 import traceback
+import time
 import os
 
 api_bp = Blueprint("api", __name__)
 processing_tasks = {}
 
 
-def _process_video_thread(video_id, video_url):
+def _fetch_audio(video_url):
+    if is_upload_url(video_url):
+        return resolve_upload(video_url)
+    return download_audio(video_url)
+
+
+def process_video(video_id, video_url, profile=False, quality=None):
+    """Run the whole pipeline for one video; called by scheduler or worker."""
     app = get_app()
     if app is None:
         print("Error: Flask app not initialized")
@@ -31,18 +91,29 @@ def _process_video_thread(video_id, video_url):
             db.session.commit()
         return
 
+    job_profile = JobProfile(video_id).start() if profile else None
+
     with app.app_context():
+        metrics.JOBS_IN_PROGRESS.inc()
+        job_memory = memory.monitor.track(video_id)
+        stream = None
         try:
             print(f"🎬 Starting video processing: {video_id}")
-            tracker = processing_tasks[video_id]
+            tracker = processing_tasks.get(video_id)
+            if tracker is None:
+                tracker = processing_tasks[video_id] = ProgressTracker(
+                    video_id, socketio
+                )
+            metrics.QUEUE_WAIT_SECONDS.observe(time.time() - tracker.created_at)
 
             tracker.set_status("processing", "Downloading audio...", 5)
 
             try:
-                audio_path, metadata = download_audio(video_url)
+                audio_path, metadata = _fetch_audio(video_url)
                 video = Video.query.get(video_id)
                 video.title = metadata.get("title", "Untitled")
                 video.thumbnail_url = metadata.get("thumbnail", "")
+                video.duration = metadata.get("duration") or video.duration
                 video.status = "processing"
                 video.current_step = "Downloading audio..."
                 video.progress = 15
@@ -54,18 +125,36 @@ def _process_video_thread(video_id, video_url):
             tracker.set_status("processing", "Transcribing audio...", 35)
 
             video = Video.query.get(video_id)
+            model_name = select_model(video.duration, _queue_depth(), quality)
             video.current_step = "Transcribing audio..."
             video.progress = 35
+            video.whisper_model = model_name
             db.session.commit()
 
+            # Long videos stream segments and are summarized while transcribing
+            if TRANSCRIBE_STREAMING and (video.duration or 0) > STREAM_CHUNK_SECONDS:
+                stream = TranscriptStream(tracker, video.title, video.duration)
+
             try:
-                transcript, _ = transcribe_audio(
-                    audio_path, extract_video_id(video_url)
+                transcript, transcription = transcribe_audio(
+                    audio_path,
+                    media_id(video_url),
+                    model_name=model_name,
+                    stream=stream,
+                    duration=video.duration,
+                )
+                video = Video.query.get(video_id)
+                video.transcript_path = str(transcription_path_for(media_id(video_url)))
+                # A cached transcription keeps the model that produced it
+                video.whisper_model = transcription.get("model", model_name)
+                video.transcript_version = transcription.get(
+                    "version", transcript_version(video.whisper_model, "whisper")
                 )
+                db.session.commit()
             except Exception as e:
                 error_msg = str(e)
                 # If transcription fails due to corrupted audio, delete and mark for retry
-                if (
+                if not is_upload_url(video_url) and (
                     "corrupted" in error_msg.lower()
                     or "validation failed" in error_msg.lower()
                 ):
@@ -84,49 +173,30 @@ def _process_video_thread(video_id, video_url):
 
                 raise Exception(f"Transcription failed: {error_msg}")
 
-            tracker.set_status("processing", "Generating summary...", 65)
+            if stream is not None:
+                summary = stream.finish()
+                if summary:
+                    # run_llm_stage skips summarization for this video
+                    video = Video.query.get(video_id)
+                    video.summary = summary
+                    video.summary_version = ROLLING_SUMMARY_VERSION
+                    video.progress = 75
+                    db.session.commit()
+                    print(f"✓ Rolling summary ready for video {video_id}")
 
             try:
-                video = Video.query.get(video_id)
-                video.current_step = "Generating summary..."
-                video.progress = 65
-                db.session.commit()
+                run_llm_stage(video_id, tracker, transcript)
+            except LLMUnavailableError as e:
+                # Keep the transcription; the retry worker finishes the job
+                park_for_llm(video_id, tracker, e)
+                return
 
-                summary = summarize_transcript(transcript, video.title)
-                video.summary = summary
-                video.progress = 75
-                db.session.commit()
-                print(f"✓ Summary generated for video {video_id}")
-            except Exception as e:
-                raise Exception(f"Summary generation failed: {str(e)}")
-
-            tracker.set_status("processing", "Categorizing video...", 85)
-
-            video = Video.query.get(video_id)
-            video.current_step = "Categorizing video..."
-            video.progress = 85
-            db.session.commit()
-
-            try:
-                category = auto_categorize_video(video.title, video.summary)
-                if category:
-                    video.category_id = category.id
-                    print(f"✓ Category assigned: {category.name} for video {video_id}")
-            except Exception as e:
-                print(f"Categorization warning: {e}")
-
-            tracker.set_status("completed", "Complete!", 100)
-
-            video = Video.query.get(video_id)
-            video.status = "completed"
-            video.current_step = "Complete"
-            video.progress = 100
-            db.session.commit()
-            print(f"✓ Video processing complete for video {video_id}")
+            finish_video(video_id, tracker)
 
         except Exception as e:
             print(f"Error processing video {video_id}: {str(e)}")
             traceback.print_exc()
+            metrics.JOBS.inc(status="error")
 
             if video_id in processing_tasks:
                 tracker = processing_tasks[video_id]
@@ -140,21 +210,155 @@ def _process_video_thread(video_id, video_url):
                 db.session.commit()
 
         finally:
+            metrics.JOBS_IN_PROGRESS.dec()
+            if stream is not None:
+                stream.close()
+            peak_rss_mb = memory.monitor.finish(job_memory)
+            try:
+                Video.query.filter_by(id=video_id).update(
+                    {"peak_rss_mb": peak_rss_mb}, synchronize_session=False
+                )
+                db.session.commit()
+            except Exception as memory_error:
+                db.session.rollback()
+                print(f"Error recording memory for video {video_id}: {memory_error}")
+            if job_profile is not None:
+                job_profile.stop()
+                try:
+                    job_profile.save()
+                except Exception as profile_error:
+                    print(f"Error saving profile for video {video_id}: {profile_error}")
             if video_id in processing_tasks:
                 del processing_tasks[video_id]
 
 
+scheduler = JobScheduler(
+    process_video,
+    workers=MAX_CONCURRENT_JOBS,
+    policy=SCHEDULER_POLICY,
+    aging_rate=SCHEDULER_AGING_RATE,
+)
+
+
+def _queue_depth():
+    if JOB_QUEUE_BACKEND == "database":
+        return job_queue.queue_depth()
+    return scheduler.queued_count()
+
+
+def _enqueue_video(video, profile=False, quality=None):
+    if JOB_QUEUE_BACKEND == "database":
+        # A worker process picks it up and reports progress
+        job_queue.enqueue(video, profile, quality)
+        ProgressTracker(video.id, socketio).set_status(
+            "queued", "Waiting to start...", 0
+        )
+        return
+
+    # Emit video status to WebSocket immediately
+    progress = processing_tasks[video.id] = ProgressTracker(video.id, socketio)
+    progress.set_status("queued", "Waiting to start...", 0)
+
+    scheduler.submit(
+        Job(
+            video.id,
+            args=(video.youtube_url, profile, quality),
+            priority=video.priority,
+            duration=video.duration,
+        )
+    )
+
+
+def _admission_error():
+    """503 while the process that runs jobs is above its memory budget.
+
+    With the database queue the API runs no jobs; workers apply the budget
+    themselves by not claiming.
+    """
+    if JOB_QUEUE_BACKEND == "database" or not memory.over_budget():
+        return None
+    metrics.ADMISSION_REJECTIONS.inc()
+    response = jsonify({"error": "Server is above its memory budget, try again later"})
+    response.headers["Retry-After"] = "60"
+    return response, 503
+
+
+def _parse_job_options(data):
+    """Validate profile/quality/priority; returns (options, error_response)."""
+    try:
+        priority = int(data.get("priority") or 0)
+    except (TypeError, ValueError):
+        return None, (jsonify({"error": "priority must be an integer"}), 400)
+
+    quality = data.get("quality") or None
+    if quality is not None and quality not in QUALITY_HINTS:
+        return None, (
+            jsonify({"error": f"quality must be one of {', '.join(QUALITY_HINTS)}"}),
+            400,
+        )
+
+    profile = data.get("profile", False)
+    if isinstance(profile, str):
+        profile = profile.lower() in ("1", "true", "yes", "on")
+    return {"profile": bool(profile), "quality": quality, "priority": priority}, None
+
+
+def _add_uploaded_videos(uploads, options):
+    """Create and queue videos for stored uploads, reusing identical content."""
+    videos = []
+    for content_hash, metadata in uploads:
+        existing = Video.query.filter_by(content_hash=content_hash).first()
+        if existing:
+            videos.append(existing.to_dict())
+            continue
+
+        video = Video(
+            youtube_url=upload_url(content_hash),
+            content_hash=content_hash,
+            title=metadata.get("title", "Untitled"),
+            thumbnail_url="",
+            duration=metadata.get("duration") or None,
+            priority=options["priority"],
+            status="queued",
+            current_step="Waiting to start...",
+            progress=0,
+        )
+        db.session.add(video)
+        db.session.commit()
+
+        _enqueue_video(video, options["profile"], options["quality"])
+        videos.append(video.to_dict())
+    return videos
+
+
 @api_bp.route("/videos", methods=["GET"])
 def get_videos():
     category_id = request.args.get("category_id", type=int)
 
-    query = Video.query.order_by(Video.created_at.desc())
+    def build():
+        query = Video.query.order_by(Video.created_at.desc())
+
+        if category_id:
+            query = query.filter_by(category_id=category_id)
+
+        videos = query.all()
+        return [v.to_dict() for v in videos]
+
+    return cached_json(build)
 
-    if category_id:
-        query = query.filter_by(category_id=category_id)
 
-    videos = query.all()
-    return jsonify([v.to_dict() for v in videos])
+@api_bp.route("/videos/changes", methods=["GET"])
+def get_video_changes():
+    """Videos changed and deleted since a cursor from a previous call."""
+    cursor = request.args.get("since")
+    limit = request.args.get("limit", DEFAULT_CHANGES_LIMIT, type=int)
+
+    try:
+        return jsonify(changes_since(cursor, limit))
+    except CursorExpired as e:
+        return jsonify({"error": str(e)}), 410
+    except CursorError as e:
+        return jsonify({"error": str(e)}), 400
 
 
 @api_bp.route("/videos/<int:video_id>", methods=["GET"])
@@ -171,6 +375,14 @@ def add_videos():
     if not urls:
         return jsonify({"error": "No URLs provided"}), 400
 
+    rejected = _admission_error()
+    if rejected:
+        return rejected
+
+    options, error = _parse_job_options(data)
+    if error:
+        return error
+
     created_videos = []
 
     for url in urls:
@@ -189,11 +401,14 @@ def add_videos():
         metadata = get_video_metadata(url)
         title = metadata.get("title", "Untitled") if metadata else "Processing..."
         thumbnail_url = metadata.get("thumbnail", "") if metadata else ""
+        duration = metadata.get("duration") if metadata else None
 
         video = Video(
             youtube_url=url,
             title=title,
             thumbnail_url=thumbnail_url,
+            duration=duration,
+            priority=options["priority"],
             status="queued",
             current_step="Waiting to start...",
             progress=0,
@@ -202,31 +417,216 @@ def add_videos():
         db.session.add(video)
         db.session.commit()
 
-        # Emit video status to WebSocket immediately
-        progress = processing_tasks[video.id] = ProgressTracker(video.id, socketio)
-        progress.set_status("queued", "Waiting to start...", 0)
-
-        thread = threading.Thread(target=_process_video_thread, args=(video.id, url))
-        thread.daemon = True
-        thread.start()
+        _enqueue_video(video, options["profile"], options["quality"])
 
         created_videos.append(video.to_dict())
 
     return jsonify({"videos": created_videos}), 201
 
 
+@api_bp.route("/videos/upload", methods=["POST"])
+def upload_videos():
+    """Accept audio/video files as multipart/form-data, streamed to disk."""
+    rejected = _admission_error()
+    if rejected:
+        return rejected
+
+    try:
+        uploads, fields = save_multipart_upload(request.stream, request.content_type)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not uploads:
+        return jsonify({"error": "No files provided"}), 400
+
+    options, error = _parse_job_options(fields)
+    if error:
+        return error
+
+    return jsonify({"videos": _add_uploaded_videos(uploads, options)}), 201
+
+
+@api_bp.route("/videos/import", methods=["POST"])
+def import_videos():
+    """Queue every media file of a directory below UPLOAD_IMPORT_ROOT."""
+    data = request.get_json() or {}
+    directory = data.get("directory")
+
+    if not directory:
+        return jsonify({"error": "directory is required"}), 400
+
+    rejected = _admission_error()
+    if rejected:
+        return rejected
+
+    options, error = _parse_job_options(data)
+    if error:
+        return error
+
+    try:
+        uploads = ingest_directory(directory, recursive=bool(data.get("recursive")))
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"videos": _add_uploaded_videos(uploads, options)}), 201
+
+
 @api_bp.route("/videos/<int:video_id>", methods=["DELETE"])
 def delete_video(video_id):
     video = Video.query.get_or_404(video_id)
+    job_queue.delete_jobs(video_id)
     db.session.delete(video)
+    record_deletion(video_id)
     db.session.commit()
+    delete_profile(video_id)
+    forget_index(video_id)
     return jsonify({"message": "Video deleted successfully"})
 
 
+@api_bp.route("/videos/<int:video_id>/segments", methods=["GET"])
+def get_video_segments(video_id):
+    """Timestamped transcript segments, filtered by phrase and/or time range."""
+    video = Video.query.get_or_404(video_id)
+    query = request.args.get("q", "").strip()
+    limit = request.args.get("limit", type=int)
+
+    try:
+        start = request.args.get("start")
+        end = request.args.get("end")
+        start = parse_timestamp(start) if start else None
+        end = parse_timestamp(end) if end else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    index = load_index(video)
+    if index is None:
+        return jsonify({"error": "No transcript for this video yet"}), 404
+
+    matches = index.between(start, end)
+    if query:
+        found = set(index.search(query))
+        matches = [i for i in matches if i in found]
+
+    total = len(matches)
+    if limit is not None:
+        matches = matches[: max(limit, 0)]
+
+    segments = []
+    for i in matches:
+        segment = index.segment(i)
+        segment["url"] = deep_link(video, segment["start"])
+        segments.append(segment)
+
+    return jsonify(
+        {
+            "video_id": video_id,
+            "query": query or None,
+            "start": start,
+            "end": end,
+            "total": total,
+            "segments": segments,
+        }
+    )
+
+
+@api_bp.route("/videos/<int:video_id>/profile", methods=["GET"])
+def get_video_profile(video_id):
+    Video.query.get_or_404(video_id)
+    trace_path, pstats_path = profile_paths(video_id)
+
+    if request.args.get("format") == "pstats":
+        if not pstats_path.exists():
+            return jsonify({"error": "No cProfile data for this video"}), 404
+        return send_file(
+            pstats_path,
+            mimetype="application/octet-stream",
+            as_attachment=True,
+            download_name=f"video_{video_id}.prof",
+        )
+
+    if not trace_path.exists():
+        return jsonify({"error": "No profile recorded for this video"}), 404
+    return send_file(trace_path, mimetype="application/json")
+
+
+@api_bp.route("/export", methods=["GET"])
+def export_videos():
+    """Stream the whole library; unlike GET /videos it never builds a list."""
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return (
+            jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}),
+            400,
+        )
+
+    category_id = request.args.get("category_id", type=int)
+    include_transcript = request.args.get("transcripts", "false").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    compress = request.args.get("compress") == "gzip"
+
+    mimetype = "application/x-ndjson" if fmt == "ndjson" else "text/csv"
+    filename = f"tubescribe_export.{fmt}"
+    if compress:
+        mimetype = "application/gzip"
+        filename += ".gz"
+
+    body = export_library(fmt, category_id, include_transcript, compress)
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@api_bp.route("/reprocess", methods=["POST"])
+def reprocess_videos():
+    """Recompute outputs made by older models or prompts, in the background."""
+    data = request.get_json(silent=True) or {}
+    stages = data.get("stages") or list(STAGES)
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        return (
+            jsonify({"error": f"stages must be among {', '.join(STAGES)}"}),
+            400,
+        )
+
+    limit = data.get("limit")
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            return jsonify({"error": "limit must be an integer"}), 400
+
+    if not start_reprocess(get_app(), stages, limit):
+        return (
+            jsonify({"error": "Reprocessing already running", **reprocess_status()}),
+            409,
+        )
+    return jsonify(reprocess_status()), 202
+
+
+@api_bp.route("/reprocess", methods=["GET"])
+def get_reprocess_status():
+    return jsonify(reprocess_status())
+
+
+@api_bp.route("/queue", methods=["GET"])
+def get_queue():
+    if JOB_QUEUE_BACKEND == "database":
+        return jsonify(job_queue.snapshot())
+    return jsonify({**scheduler.snapshot(), "memory": memory.status()})
+
+
 @api_bp.route("/categories", methods=["GET"])
 def get_categories():
-    categories = Category.query.all()
-    return jsonify([c.to_dict() for c in categories])
+    def build():
+        categories = Category.query.all()
+        return [c.to_dict() for c in categories]
+
+    return cached_json(build)
 
 
 @api_bp.route("/categories", methods=["POST"])
@@ -255,18 +655,34 @@ def create_category():
 
 @api_bp.route("/stats", methods=["GET"])
 def get_stats():
-    total_videos = Video.query.count()
-    completed_videos = Video.query.filter_by(status="completed").count()
-    processing_videos = Video.query.filter_by(status="processing").count()
-    error_videos = Video.query.filter_by(status="error").count()
-    total_categories = Category.query.count()
-
-    return jsonify(
-        {
+    def build():
+        total_videos = Video.query.count()
+        completed_videos = Video.query.filter_by(status="completed").count()
+        processing_videos = Video.query.filter_by(status="processing").count()
+        error_videos = Video.query.filter_by(status="error").count()
+        pending_llm_videos = Video.query.filter_by(status="pending_llm").count()
+        total_categories = Category.query.count()
+
+        return {
             "total_videos": total_videos,
             "completed_videos": completed_videos,
             "processing_videos": processing_videos,
             "error_videos": error_videos,
+            "pending_llm_videos": pending_llm_videos,
             "total_categories": total_categories,
         }
-    )
+
+    return cached_json(build)
+
+
+@api_bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    memory.monitor.sample()
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@api_bp.route("/ready", methods=["GET"])
+def get_readiness():
+    ready, state = readiness()
+    state["llm_breaker"] = breaker.state
+    return jsonify({"ready": ready, **state}), 200 if ready else 503
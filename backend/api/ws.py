@@ -1,5 +1,5 @@
 from flask import Blueprint, request
-from flask_socketio import join_room, emit
+from flask_socketio import join_room, leave_room, emit
 from .. import socketio
 
 ws_bp = Blueprint("ws", __name__)
@@ -34,6 +34,7 @@ def handle_leave_video(data):
     video_id = data.get("video_id")
     if video_id:
         room = f"video_{video_id}"
+        leave_room(room)
         emit("left", {"video_id": video_id})
 
 
@@ -2,26 +2,158 @@ import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-DATA_DIR = BASE_DIR / "data"
-TRANSCRIPTIONS_DIR = BASE_DIR / "transcriptions"
+DATA_DIR = Path(os.getenv("DATA_DIR", BASE_DIR / "data"))
+TRANSCRIPTIONS_DIR = Path(os.getenv("TRANSCRIPTIONS_DIR", BASE_DIR / "transcriptions"))
 
-DATA_DIR.mkdir(exist_ok=True)
-TRANSCRIPTIONS_DIR.mkdir(exist_ok=True)
+DATA_DIR.mkdir(parents=True, exist_ok=True)
+TRANSCRIPTIONS_DIR.mkdir(parents=True, exist_ok=True)
 
-DATABASE_URL = f"sqlite:///{DATA_DIR / 'tubescribe.db'}"
+# Point API and workers on several machines at one shared database
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATA_DIR / 'tubescribe.db'}")
 
 # Ollama needs /v1 prefix for OpenAI-compatible API
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:1b")
 OLLAMA_CATEGORY_MODEL = os.getenv("OLLAMA_CATEGORY_MODEL", "llama3.2:1b")
 
+# Requests sent to Ollama at once; match OLLAMA_NUM_PARALLEL on the server
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", 1))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 1))
+# Request timeout = base + per 1000 prompt characters
+LLM_TIMEOUT_BASE_SECONDS = float(os.getenv("LLM_TIMEOUT_BASE_SECONDS", 30))
+LLM_TIMEOUT_PER_1K_CHARS = float(os.getenv("LLM_TIMEOUT_PER_1K_CHARS", 15))
+# Categorization requests grouped into one prompt (1 disables batching)
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", 8))
+LLM_BATCH_WAIT_MS = int(os.getenv("LLM_BATCH_WAIT_MS", 200))
+# Summaries are written from the most informative sentences of the whole
+# transcript, fillers and repetition removed, up to this many prompt tokens.
+# With SUMMARY_CONDENSE=false the transcript is cut after 2000 characters
+SUMMARY_CONDENSE = os.getenv("SUMMARY_CONDENSE", "true").lower() == "true"
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", 600))
+
+# Circuit breaker: consecutive failures before pausing LLM calls, and how long
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 3))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+# Videos whose LLM stage failed are retried with exponential backoff
+LLM_RETRY_POLL_SECONDS = float(os.getenv("LLM_RETRY_POLL_SECONDS", 5))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", 30))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", 1800))
+
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
 
+# Whisper models available to the tiering policy, fastest first
+WHISPER_TIERS = [
+    m.strip() for m in os.getenv("WHISPER_TIERS", WHISPER_MODEL).split(",") if m.strip()
+]
+# Memory budget for Whisper models kept loaded at the same time
+WHISPER_MEMORY_BUDGET_MB = int(os.getenv("WHISPER_MEMORY_BUDGET_MB", 2048))
+# Audio longer than this drops one tier unless "accurate" quality is requested
+WHISPER_LONG_AUDIO_SECONDS = int(os.getenv("WHISPER_LONG_AUDIO_SECONDS", 1800))
+# Every this many queued jobs drops one more tier
+WHISPER_BACKLOG_STEP = int(os.getenv("WHISPER_BACKLOG_STEP", 10))
+
+# Speech recognition backend: "whisper" (openai-whisper, float32), "whisper-int8"
+# (the same models with int8 dynamic quantization) or "faster-whisper"
+# (CTranslate2, quantized with ASR_COMPUTE_TYPE)
+ASR_ENGINE = os.getenv("ASR_ENGINE", "whisper")
+ASR_COMPUTE_TYPE = os.getenv("ASR_COMPUTE_TYPE", "int8")
+# CPU threads used by the engine (0 = library default)
+ASR_CPU_THREADS = int(os.getenv("ASR_CPU_THREADS", 0))
+# Batched inference (whisper engines only): clips of up to 30 s transcribed
+# at the same time are decoded as one padded batch of up to WHISPER_BATCH_SIZE,
+# waiting at most WHISPER_BATCH_WAIT_MS for a batch to fill (1 = off)
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", 1))
+WHISPER_BATCH_WAIT_MS = int(os.getenv("WHISPER_BATCH_WAIT_MS", 200))
+# Also decode the 30 s windows of longer audio in batches. Faster, but each
+# window is decoded without the previous window's text as context
+WHISPER_BATCH_WINDOWS = os.getenv("WHISPER_BATCH_WINDOWS", "false").lower() == "true"
+
+# Voice activity detection: transcribe only the parts of a recording louder
+# than its noise floor by VAD_THRESHOLD_DB, skipping intros, music beds and
+# dead air. Pauses shorter than VAD_MIN_SILENCE_MS are kept, and VAD_PAD_MS
+# of context is kept around speech
+VAD_ENABLED = os.getenv("VAD_ENABLED", "false").lower() == "true"
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", 12))
+VAD_MIN_SILENCE_MS = int(os.getenv("VAD_MIN_SILENCE_MS", 1000))
+VAD_PAD_MS = int(os.getenv("VAD_PAD_MS", 200))
+
+# Streaming: videos longer than STREAM_CHUNK_SECONDS are transcribed chunk by
+# chunk; each chunk's segments are pushed over Socket.IO and every
+# ROLLING_SUMMARY_CHARS of transcript is summarized while transcription goes on
+TRANSCRIBE_STREAMING = os.getenv("TRANSCRIBE_STREAMING", "false").lower() == "true"
+STREAM_CHUNK_SECONDS = int(os.getenv("STREAM_CHUNK_SECONDS", 120))
+ROLLING_SUMMARY_CHARS = int(os.getenv("ROLLING_SUMMARY_CHARS", 6000))
+
+# Job scheduling: number of videos processed at once and the order in which
+# queued videos start (fifo, priority or sjf = shortest job first with aging)
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", 2))
+SCHEDULER_POLICY = os.getenv("SCHEDULER_POLICY", "sjf")
+# Seconds of estimated processing time forgiven per second spent waiting
+SCHEDULER_AGING_RATE = float(os.getenv("SCHEDULER_AGING_RATE", 1.0))
+
+# Where queued jobs run: "local" runs them in the API process, "database"
+# stores them in the job_queue table for worker processes (python worker.py)
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "local")
+# A worker keeps its claim on a job by renewing the lease every heartbeat;
+# jobs of a worker that stopped heartbeating are picked up by another one
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 60))
+WORKER_HEARTBEAT_SECONDS = float(os.getenv("WORKER_HEARTBEAT_SECONDS", 15))
+WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", 2))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+# Message queue (e.g. redis://localhost:6379/0) through which workers emit
+# progress events to clients of the API; without one, the API relays progress
+# it reads from the database
+SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
+
+# Memory limits. Above MEMORY_BUDGET_MB of resident memory the process that
+# runs jobs accepts no new ones (the API answers 503, workers stop claiming);
+# 0 = no budget. Workers restart themselves once idle after WORKER_MAX_JOBS
+# jobs or above WORKER_RECYCLE_RSS_MB (0 = never)
+MEMORY_BUDGET_MB = int(os.getenv("MEMORY_BUDGET_MB", 0))
+WORKER_MAX_JOBS = int(os.getenv("WORKER_MAX_JOBS", 0))
+WORKER_RECYCLE_RSS_MB = int(os.getenv("WORKER_RECYCLE_RSS_MB", 0))
+MEMORY_SAMPLE_SECONDS = float(os.getenv("MEMORY_SAMPLE_SECONDS", 1))
+
+# Background reprocessing of outputs made by older models or prompts: pause
+# between videos, and wait while regular jobs are running
+REPROCESS_INTERVAL_SECONDS = float(os.getenv("REPROCESS_INTERVAL_SECONDS", 5))
+
+# Deleted videos are reported by /api/videos/changes for this long; older
+# cursors must refetch the full list
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", 30))
+# Cursors don't move past changes younger than this: updated_at is set before
+# commit (and by other processes' clocks), so a later-committing write may
+# carry an older time. Such recent changes are sent again on the next call
+CHANGES_SETTLE_SECONDS = float(os.getenv("CHANGES_SETTLE_SECONDS", 10))
+
+# Parsed transcript segment indexes kept in memory for search and seek
+SEGMENT_INDEX_CACHE_SIZE = int(os.getenv("SEGMENT_INDEX_CACHE_SIZE", 64))
+
+# Load the Whisper model and ping the LLM in the background at startup
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "False").lower() == "true"
+
 FLASK_PORT = int(os.getenv("FLASK_PORT", 5000))
 FLASK_HOST = os.getenv("FLASK_HOST", "0.0.0.0")
 FLASK_DEBUG = os.getenv("FLASK_DEBUG", "True").lower() == "true"
 
+# Socket.IO server: "threading" (Werkzeug), "eventlet" or "gevent". The green
+# modes need their package installed; app.py monkey-patches for them and only
+# starts with JOB_QUEUE_BACKEND=database, since the pipeline would block the
+# event loop. Compare them under load with benchmarks/load_test.py
+SOCKETIO_ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000")
 
 DOWNLOAD_DIR = DATA_DIR / "downloads"
 DOWNLOAD_DIR.mkdir(exist_ok=True)
+
+PROFILES_DIR = DATA_DIR / "profiles"
+PROFILES_DIR.mkdir(exist_ok=True)
+
+# Uploaded media, stored by content hash
+UPLOAD_DIR = DATA_DIR / "uploads"
+UPLOAD_DIR.mkdir(exist_ok=True)
+# Server-side directories can only be bulk-imported from below this root
+UPLOAD_IMPORT_ROOT = Path(os.getenv("UPLOAD_IMPORT_ROOT", DATA_DIR / "import"))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", 4096))
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -41,17 +42,33 @@ class Video(db.Model):
     current_step = db.Column(db.String(50), nullable=True)
     progress = db.Column(db.Integer, default=0)
     error_message = db.Column(db.Text, nullable=True)
+    duration = db.Column(db.Integer, nullable=True)
+    whisper_model = db.Column(db.String(50), nullable=True)
+    priority = db.Column(db.Integer, default=0)
+    # Highest resident memory of the process while this video was processed
+    peak_rss_mb = db.Column(db.Float, nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True, index=True)
+    # Producer of each derived output (model + prompt hash); see reprocess_service
+    transcript_version = db.Column(db.String(100), nullable=True)
+    summary_version = db.Column(db.String(100), nullable=True)
+    category_version = db.Column(db.String(100), nullable=True)
+    llm_attempts = db.Column(db.Integer, default=0)
+    next_llm_retry_at = db.Column(db.DateTime, nullable=True)
+    # Set while a retry worker holds the deferred LLM stage; renewed like a
+    # job lease so that a crashed process's claim can be taken over
+    llm_claimed_at = db.Column(db.DateTime, nullable=True)
 
     category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True
     )
 
     def to_dict(self):
         return {
             "id": self.id,
             "youtube_url": self.youtube_url,
+            "source": "upload" if self.content_hash else "youtube",
             "title": self.title,
             "thumbnail_url": self.thumbnail_url,
             "transcript_path": self.transcript_path,
@@ -60,6 +77,17 @@ class Video(db.Model):
             "current_step": self.current_step,
             "progress": self.progress,
             "error_message": self.error_message,
+            "duration": self.duration,
+            "whisper_model": self.whisper_model,
+            "priority": self.priority,
+            "peak_rss_mb": self.peak_rss_mb,
+            "transcript_version": self.transcript_version,
+            "summary_version": self.summary_version,
+            "category_version": self.category_version,
+            "llm_attempts": self.llm_attempts,
+            "next_llm_retry_at": (
+                self.next_llm_retry_at.isoformat() if self.next_llm_retry_at else None
+            ),
             "category": self.category.to_dict() if self.category else None,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
@@ -76,3 +104,85 @@ class Video(db.Model):
         if error_message:
             self.error_message = error_message
         db.session.commit()
+
+
+class VideoTombstone(db.Model):
+    """Records a deleted video so /videos/changes can report the deletion."""
+
+    __tablename__ = "video_tombstones"
+
+    id = db.Column(db.Integer, primary_key=True)
+    video_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class QueuedJob(db.Model):
+    """A pipeline job waiting for, or leased by, a worker process."""
+
+    __tablename__ = "job_queue"
+
+    id = db.Column(db.Integer, primary_key=True)
+    video_id = db.Column(
+        db.Integer, db.ForeignKey("videos.id", ondelete="CASCADE"), index=True
+    )
+    video_url = db.Column(db.String(500), nullable=False)
+    options = db.Column(db.Text, nullable=True)
+    priority = db.Column(db.Integer, default=0)
+    duration = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(20), default="queued", index=True)
+    worker_id = db.Column(db.String(100), nullable=True)
+    attempts = db.Column(db.Integer, default=0)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    peak_rss_mb = db.Column(db.Float, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "video_id": self.video_id,
+            "priority": self.priority,
+            "duration": self.duration,
+            "status": self.status,
+            "worker_id": self.worker_id,
+            "attempts": self.attempts,
+            "lease_expires_at": (
+                self.lease_expires_at.isoformat() if self.lease_expires_at else None
+            ),
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "peak_rss_mb": self.peak_rss_mb,
+        }
+
+
+def ensure_schema():
+    """Add columns and indexes introduced after a database was created.
+
+    ``create_all`` only creates missing tables, so existing SQLite files would
+    otherwise miss newer nullable columns and their indexes.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                conn.execute(
+                    text(
+                        f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                    )
+                )
+                print(f"Added column {table.name}.{column.name}")
+
+            existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+                    print(f"Added index {index.name}")
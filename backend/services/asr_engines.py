@@ -0,0 +1,336 @@
+"""Speech recognition backends behind one interface.
+
+Every engine loads a model by Whisper model name and returns results in the
+openai-whisper format: ``{"text", "segments", "language"}`` where each
+segment has at least ``id``, ``start``, ``end`` and ``text``.
+"""
+
+from ..config import ASR_ENGINE, ASR_COMPUTE_TYPE, ASR_CPU_THREADS
+
+SAMPLE_RATE = 16000
+# Whisper decodes audio in windows of this length
+WINDOW_SECONDS = 30
+# Same thresholds whisper.transcribe uses to retry at a higher temperature
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+FALLBACK_TEMPERATURES = (0.2, 0.4, 0.6, 0.8, 1.0)
+
+
+class WhisperEngine:
+    """openai-whisper in float32, the reference implementation."""
+
+    name = "whisper"
+    # Resident memory relative to the float32 model
+    memory_factor = 1.0
+    supports_batching = True
+
+    def load(self, model_name):
+        # Imported lazily: whisper pulls in torch, which takes seconds
+        import whisper
+
+        if ASR_CPU_THREADS:
+            import torch
+
+            torch.set_num_threads(ASR_CPU_THREADS)
+        return whisper.load_model(model_name)
+
+    def transcribe(self, model, audio_path):
+        return model.transcribe(
+            str(audio_path),
+            fp16=False,  # Use float32 for better compatibility
+            language=None,  # Auto-detect language
+        )
+
+    def stream(self, model, audio_path, chunk_seconds):
+        """Transcribe ``chunk_seconds`` at a time, yielding each chunk's result.
+
+        Segment times are relative to the whole recording. The end of each
+        chunk's text is the prompt for the next one, so context carries over.
+        """
+        audio = self.load_audio(audio_path)
+        step = int(chunk_seconds * SAMPLE_RATE)
+        language = None
+        prompt = None
+        for start in range(0, len(audio), step):
+            result = model.transcribe(
+                audio[start : start + step],
+                fp16=False,
+                language=language,
+                initial_prompt=prompt,
+            )
+            offset = start / SAMPLE_RATE
+            for segment in result["segments"]:
+                segment["start"] += offset
+                segment["end"] += offset
+            # Detected on the first chunk, like whisper does on the first window
+            language = language or result.get("language")
+            prompt = result["text"][-200:] or prompt
+            yield result
+
+    def load_audio(self, audio_path):
+        import whisper
+
+        return whisper.load_audio(str(audio_path), sr=SAMPLE_RATE)
+
+    def _decode(self, model, mels, temperature):
+        import whisper
+
+        options = whisper.DecodingOptions(
+            task="transcribe", language=None, fp16=False, temperature=temperature
+        )
+        return whisper.decode(model, mels, options)
+
+    def _needs_fallback(self, result):
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD:
+            return False
+        return (
+            result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+            or result.avg_logprob < LOGPROB_THRESHOLD
+        )
+
+    def _segments(self, model, result, offset, duration):
+        """Split a window's tokens into segments at its timestamp tokens."""
+        from whisper.tokenizer import get_tokenizer
+
+        tokenizer = get_tokenizer(
+            model.is_multilingual,
+            num_languages=getattr(model, "num_languages", 99),
+            language=result.language,
+            task="transcribe",
+        )
+        # Timestamp tokens are 20 ms apart
+        precision = 0.02
+
+        segments = []
+        start = None
+        text_tokens = []
+        for token in result.tokens:
+            if token < tokenizer.timestamp_begin:
+                text_tokens.append(token)
+                continue
+            time = (token - tokenizer.timestamp_begin) * precision
+            if text_tokens and start is not None:
+                segments.append((start, time, text_tokens))
+                text_tokens = []
+                start = None
+            else:
+                start = time
+        if text_tokens:
+            segments.append((start or 0.0, duration, text_tokens))
+
+        return [
+            {
+                "start": round(offset + seg_start, 2),
+                "end": round(offset + min(seg_end, duration), 2),
+                "text": tokenizer.decode(tokens),
+                "tokens": tokens,
+                "temperature": result.temperature,
+                "avg_logprob": result.avg_logprob,
+                "compression_ratio": result.compression_ratio,
+                "no_speech_prob": result.no_speech_prob,
+            }
+            for seg_start, seg_end, tokens in segments
+        ]
+
+    def transcribe_windows(self, model, windows):
+        """Decode up to 30 s audio windows as one padded batch.
+
+        ``windows`` is a list of (audio, offset) pairs; returns one result per
+        window in the whisper.transcribe format, with segment times shifted
+        by the window's offset. Windows that fail whisper's quality checks
+        are decoded again, batched, at increasing temperatures.
+        """
+        import torch
+        import whisper
+
+        mels = torch.stack(
+            [
+                whisper.log_mel_spectrogram(
+                    whisper.pad_or_trim(audio), model.dims.n_mels
+                )
+                for audio, _ in windows
+            ]
+        ).to(model.device)
+
+        with torch.no_grad():
+            results = self._decode(model, mels, 0.0)
+            for temperature in FALLBACK_TEMPERATURES:
+                retry = [i for i, r in enumerate(results) if self._needs_fallback(r)]
+                if not retry:
+                    break
+                retried = self._decode(model, mels[retry], temperature)
+                for i, result in zip(retry, retried):
+                    results[i] = result
+
+        outputs = []
+        for (audio, offset), result in zip(windows, results):
+            if (
+                result.no_speech_prob > NO_SPEECH_THRESHOLD
+                and result.avg_logprob < LOGPROB_THRESHOLD
+            ):
+                # Silence, as whisper.transcribe would skip it
+                outputs.append(
+                    {"text": "", "segments": [], "language": result.language}
+                )
+                continue
+            duration = len(audio) / SAMPLE_RATE
+            outputs.append(
+                {
+                    "text": result.text,
+                    "segments": self._segments(model, result, offset, duration),
+                    "language": result.language,
+                }
+            )
+        return outputs
+
+
+class QuantizedWhisperEngine(WhisperEngine):
+    """openai-whisper with Linear layers dynamically quantized to int8.
+
+    Weights are stored as int8 and activations are quantized on the fly, so
+    the matrix multiplications that dominate CPU inference use int8 kernels.
+    """
+
+    name = "whisper-int8"
+    memory_factor = 0.4
+
+    def load(self, model_name):
+        import torch
+
+        model = super().load(model_name).cpu()
+        # whisper subclasses nn.Linear only to cast weights to the input
+        # dtype; quantize_dynamic only converts exact nn.Linear modules, so
+        # swap in plain ones that share the loaded parameters
+        for parent in list(model.modules()):
+            for name, child in list(parent.named_children()):
+                if isinstance(child, torch.nn.Linear):
+                    setattr(parent, name, _plain_linear(torch, child))
+        return torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+
+def _plain_linear(torch, module):
+    if type(module) is torch.nn.Linear:
+        return module
+    # Built on the meta device so no weights are allocated just to be replaced
+    plain = torch.nn.Linear(
+        module.in_features,
+        module.out_features,
+        bias=module.bias is not None,
+        device="meta",
+    )
+    plain.weight = module.weight
+    plain.bias = module.bias
+    return plain
+
+
+class FasterWhisperEngine:
+    """CTranslate2 Whisper models via faster-whisper, int8 by default."""
+
+    name = "faster-whisper"
+    memory_factor = 0.3
+    # CTranslate2 already batches work inside one transcription
+    supports_batching = False
+
+    def load(self, model_name):
+        from faster_whisper import WhisperModel
+
+        return WhisperModel(
+            model_name,
+            device="cpu",
+            compute_type=ASR_COMPUTE_TYPE,
+            cpu_threads=ASR_CPU_THREADS,
+        )
+
+    def _segment(self, index, segment):
+        return {
+            "id": index,
+            "seek": segment.seek,
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text,
+            "tokens": list(segment.tokens),
+            "temperature": segment.temperature,
+            "avg_logprob": segment.avg_logprob,
+            "compression_ratio": segment.compression_ratio,
+            "no_speech_prob": segment.no_speech_prob,
+        }
+
+    def transcribe(self, model, audio_path):
+        segments, info = model.transcribe(str(audio_path), language=None)
+
+        results = [self._segment(index, s) for index, s in enumerate(segments)]
+
+        return {
+            "text": "".join(s["text"] for s in results),
+            "segments": results,
+            "language": info.language,
+        }
+
+    def stream(self, model, audio_path, chunk_seconds):
+        """Yield segments in groups covering about ``chunk_seconds`` each.
+
+        faster-whisper decodes lazily, so each group is yielded as soon as
+        its last segment has been decoded.
+        """
+        segments, info = model.transcribe(str(audio_path), language=None)
+
+        group = []
+        boundary = chunk_seconds
+        for index, segment in enumerate(segments):
+            group.append(self._segment(index, segment))
+            if segment.end >= boundary:
+                yield {
+                    "text": "".join(s["text"] for s in group),
+                    "segments": group,
+                    "language": info.language,
+                }
+                group = []
+                boundary = segment.end + chunk_seconds
+        if group:
+            yield {
+                "text": "".join(s["text"] for s in group),
+                "segments": group,
+                "language": info.language,
+            }
+
+
+def split_windows(audio):
+    """Cut 16 kHz audio into (window, offset seconds) pairs of 30 s each."""
+    window = WINDOW_SECONDS * SAMPLE_RATE
+    return [
+        (audio[start : start + window], start / SAMPLE_RATE)
+        for start in range(0, len(audio), window)
+    ]
+
+
+def merge_results(parts):
+    """Join per-window results of one recording into a single result."""
+    segments = []
+    for part in parts:
+        for segment in part["segments"]:
+            segments.append(dict(segment, id=len(segments)))
+
+    languages = [part["language"] for part in parts if part["text"].strip()]
+    return {
+        "text": "".join(part["text"] for part in parts),
+        "segments": segments,
+        "language": max(set(languages), key=languages.count) if languages else None,
+    }
+
+
+ENGINES = {
+    engine.name: engine
+    for engine in (WhisperEngine(), QuantizedWhisperEngine(), FasterWhisperEngine())
+}
+
+
+def get_engine(name=None):
+    name = name or ASR_ENGINE
+    if name not in ENGINES:
+        raise ValueError(
+            f"Unknown ASR engine: {name} (expected one of {', '.join(ENGINES)})"
+        )
+    return ENGINES[name]
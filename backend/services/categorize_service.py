@@ -1,6 +1,11 @@
-from .summarize_service import categorize_content
+import re
+import threading
+import zlib
+from collections import namedtuple
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from .summarize_service import categorize_content, CATEGORIES
 from ..models.database import db, Category
-from datetime import datetime
 
 COLORS = [
     "#EF4444",
@@ -22,23 +27,162 @@ COLORS = [
     "#F43F5E",
 ]
 
+# Answers LLMs give for the taxonomy categories, after normalization
+SYNONYMS = {
+    "tech": "technology",
+    "technologies": "technology",
+    "computers": "technology",
+    "ai": "technology",
+    "artificial intelligence": "technology",
+    "educational": "education",
+    "learning": "education",
+    "comedy": "entertainment",
+    "movies": "entertainment",
+    "film": "entertainment",
+    "tv": "entertainment",
+    "health": "health & fitness",
+    "fitness": "health & fitness",
+    "wellness": "health & fitness",
+    "business & finance": "business",
+    "entrepreneurship": "business",
+    "marketing": "business",
+    "coding": "programming",
+    "software development": "programming",
+    "software engineering": "programming",
+    "web development": "programming",
+    "games": "gaming",
+    "video games": "gaming",
+    "current events": "news",
+    "food": "food & cooking",
+    "cooking": "food & cooking",
+    "recipes": "food & cooking",
+    "art": "art & design",
+    "design": "art & design",
+    "sport": "sports",
+    "personal finance": "finance",
+    "investing": "finance",
+    "money": "finance",
+    "self improvement": "productivity",
+    "tutorial": "tutorials",
+    "how to": "tutorials",
+    "review": "reviews",
+    "product review": "reviews",
+    "other": "general",
+    "misc": "general",
+    "miscellaneous": "general",
+}
 
-def get_or_create_category(category_name):
-    category = Category.query.filter_by(name=category_name).first()
+# What callers get back: plain values that stay valid outside the session
+CategoryRef = namedtuple("CategoryRef", ["id", "name"])
 
-    if category:
-        return category
+# name -> CategoryRef of every category this process has resolved. Nothing
+# deletes or renames categories, so an entry stays valid for the process's life
+_categories = {}
+_categories_lock = threading.Lock()
+_warmed = False
+
+
+# "Category: gaming", "The category is Gaming", "Genre - music"
+LABEL_PREFIX_RE = re.compile(
+    r"^\W*(?:the\s+)?(?:(?:best|main|primary|suggested)\s+)?"
+    r"(?:category|genre|topic|label|answer)\b(?:\s+is\b)?\s*[:=-]?\s*"
+)
+
+
+def _match_category(name):
+    """The taxonomy category ``name`` names, or None."""
+    name = re.sub(r"\band\b", "&", name)
+    name = re.sub(r"[^\w&\s-]", " ", name).replace("-", " ")
+    name = re.sub(r"\s+", " ", name).strip()
+    name = re.sub(r"\s*&\s*", " & ", name)
+
+    if name in CATEGORIES:
+        return name
+    if name in SYNONYMS:
+        return SYNONYMS[name]
+    # Plurals and singulars: "reviews" / "review", "sport" / "sports"
+    for variant in (name.rstrip("s"), name + "s"):
+        if variant in CATEGORIES:
+            return variant
+    return None
+
+
+def normalize_category(name):
+    """Map an LLM answer onto the taxonomy, e.g. "Food and Cooking." -> "food & cooking".
+
+    A label like "Category:" is dropped, and of answers naming several
+    categories ("Education/Tutorials") the first known one wins. Answers that
+    match no category or synonym become "general".
+    """
+    name = str(name or "").lower().strip()
+    name = LABEL_PREFIX_RE.sub("", name)
+
+    for part in [name, *name.split("/")]:
+        category = _match_category(part)
+        if category is not None:
+            return category
+    return "general"
 
-    total_categories = Category.query.count()
-    color = COLORS[total_categories % len(COLORS)]
 
-    category = Category(
-        name=category_name, description=f"Videos about {category_name}", color=color
-    )
+def _color_for(name):
+    if name in CATEGORIES:
+        return COLORS[CATEGORIES.index(name) % len(COLORS)]
+    return COLORS[zlib.crc32(name.encode()) % len(COLORS)]
 
-    db.session.add(category)
-    db.session.commit()
 
+def _warm():
+    """Load every existing category with a single query."""
+    global _warmed
+    rows = db.session.query(Category.id, Category.name).all()
+    with _categories_lock:
+        for row in rows:
+            _categories[row.name] = CategoryRef(row.id, row.name)
+        _warmed = True
+
+
+def _upsert(name):
+    """Insert the category unless it exists, atomically, and return its id."""
+    values = {
+        "name": name,
+        "description": f"Videos about {name}",
+        "color": _color_for(name),
+    }
+    dialect = db.engine.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(Category).values(**values)
+        db.session.execute(statement.on_conflict_do_nothing(index_elements=["name"]))
+        db.session.commit()
+    else:
+        try:
+            db.session.execute(insert(Category).values(**values))
+            db.session.commit()
+        except IntegrityError:
+            # Another worker inserted it first
+            db.session.rollback()
+
+    return db.session.query(Category.id).filter_by(name=name).scalar()
+
+
+def get_or_create_category(category_name):
+    """Resolve a category name to a CategoryRef, creating the category if new.
+
+    Served from memory once a name has been seen, so steady-state
+    categorization does not touch the database.
+    """
+    if not _warmed:
+        _warm()
+
+    category = _categories.get(category_name)
+    if category is not None:
+        return category
+
+    category = CategoryRef(_upsert(category_name), category_name)
+    with _categories_lock:
+        _categories[category_name] = category
     return category
 
 
@@ -46,7 +190,7 @@ def auto_categorize_video(title, summary):
     if not title and not summary:
         return None
 
-    category_name = categorize_content(title, summary)
+    category_name = normalize_category(categorize_content(title, summary))
     category = get_or_create_category(category_name)
 
     return category
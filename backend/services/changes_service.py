@@ -0,0 +1,137 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from ..models.database import db, Video, VideoTombstone
+from ..config import TOMBSTONE_RETENTION_DAYS, CHANGES_SETTLE_SECONDS
+
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 1000
+
+
+class CursorError(Exception):
+    pass
+
+
+class CursorExpired(CursorError):
+    """The cursor predates the tombstones still kept; refetch everything."""
+
+
+def encode_cursor(updated_at, video_id, tombstone_id, issued_at=None):
+    payload = {
+        "u": updated_at.isoformat() if updated_at else None,
+        "v": video_id,
+        "t": tombstone_id,
+        "i": (issued_at or datetime.utcnow()).isoformat(),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        updated_at = datetime.fromisoformat(payload["u"]) if payload["u"] else None
+        return (
+            updated_at,
+            int(payload["v"]),
+            int(payload["t"]),
+            datetime.fromisoformat(payload["i"]),
+        )
+    except (ValueError, KeyError, TypeError):
+        raise CursorError("Invalid cursor")
+
+
+def record_deletion(video_id):
+    """Add a tombstone for a deleted video and drop expired ones."""
+    db.session.add(VideoTombstone(video_id=video_id))
+    horizon = datetime.utcnow() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    VideoTombstone.query.filter(VideoTombstone.deleted_at < horizon).delete(
+        synchronize_session=False
+    )
+
+
+def _settled_position(videos, settled_before, has_more, position):
+    """Cursor position after a page: its last change older than the window.
+
+    Changes inside the window stay ahead of the cursor and are returned again.
+    A page with nothing settled still advances when more rows follow, or a
+    burst of more than ``limit`` recent changes would never page through.
+    """
+    settled = [v for v in videos if v.updated_at <= settled_before]
+    if settled:
+        return settled[-1].updated_at, settled[-1].id
+    if videos and has_more:
+        return videos[-1].updated_at, videos[-1].id
+    return position
+
+
+def changes_since(cursor=None, limit=DEFAULT_CHANGES_LIMIT, now=None):
+    """Videos created or updated, and ids deleted, after ``cursor``.
+
+    Videos are read in (updated_at, id) order through the updated_at index,
+    so the cost follows the number of changes rather than the library size.
+    Without a cursor every video is returned (paged) along with a cursor to
+    continue from. Changes from the last CHANGES_SETTLE_SECONDS are not
+    passed by the cursor, so clients may receive them twice.
+    """
+    limit = max(1, min(limit, MAX_CHANGES_LIMIT))
+    now = now or datetime.utcnow()
+    settled_before = now - timedelta(seconds=CHANGES_SETTLE_SECONDS)
+
+    if cursor:
+        updated_at, video_id, tombstone_id, issued_at = decode_cursor(cursor)
+        horizon = now - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+        if issued_at < horizon:
+            raise CursorExpired("Cursor expired; fetch /api/videos again")
+    else:
+        updated_at, video_id, tombstone_id = None, 0, None
+
+    query = Video.query
+    if updated_at is not None:
+        query = query.filter(
+            or_(
+                Video.updated_at > updated_at,
+                and_(Video.updated_at == updated_at, Video.id > video_id),
+            )
+        )
+    videos = query.order_by(Video.updated_at, Video.id).limit(limit + 1).all()
+    has_more = len(videos) > limit
+    videos = videos[:limit]
+
+    if tombstone_id is None:
+        # A full listing has nothing to delete; start after the newest
+        # settled tombstone
+        deleted = []
+        tombstone_id = (
+            db.session.query(db.func.max(VideoTombstone.id))
+            .filter(VideoTombstone.deleted_at <= settled_before)
+            .scalar()
+            or 0
+        )
+    else:
+        tombstones = (
+            VideoTombstone.query.filter(VideoTombstone.id > tombstone_id)
+            .order_by(VideoTombstone.id)
+            .all()
+        )
+        # A video deleted and then re-added under the same id is not gone
+        present = {v.id for v in videos}
+        deleted = [t.video_id for t in tombstones if t.video_id not in present]
+        # Recent deletions are reported again until they settle, like videos
+        for tombstone in tombstones:
+            if tombstone.deleted_at > settled_before:
+                break
+            tombstone_id = tombstone.id
+
+    updated_at, video_id = _settled_position(
+        videos, settled_before, has_more, (updated_at, video_id)
+    )
+
+    return {
+        "videos": [v.to_dict() for v in videos],
+        "deleted": deleted,
+        "cursor": encode_cursor(updated_at, video_id, tombstone_id, issued_at=now),
+        "has_more": has_more,
+    }
@@ -0,0 +1,189 @@
+import re
+import numpy as np
+
+# Bump when the selection changes, so summaries made from it are redone
+CONDENSE_VERSION = 2
+
+# Rough size of an LLM token in characters for English text
+CHARS_PER_TOKEN = 4
+
+# Whisper often leaves long stretches unpunctuated; split those every N words
+MAX_SENTENCE_WORDS = 40
+
+# Sentences at least this similar to one kept earlier are repetitions
+DUPLICATE_SIMILARITY = 0.9
+
+# Sentences are ranked in chunks of this many neighbours, so the similarity
+# matrices stay small however long the transcript is
+CHUNK_SENTENCES = 200
+
+# Longer transcripts are thinned to this many evenly spaced sentences first
+MAX_SENTENCES = 5000
+
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 50
+
+FILLER_RE = re.compile(
+    r"\b(?:(?:u+h+|u+m+|e+r+m*|a+h+|hmm+|mhm)\b[,.]?|(?:you know|i mean),)\s*",
+    re.IGNORECASE,
+)
+# "the the", "I I I" and other stutters
+REPEATED_WORD_RE = re.compile(r"\b(\w+)(?:[\s,]+\1\b)+", re.IGNORECASE)
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+WORD_RE = re.compile(r"[a-z0-9']+")
+
+STOPWORDS = frozenset(
+    """a an and are as at be but by for from has have he her his i if in into is it
+    its just like me my no not of on or our really right she so that the their them
+    then there they this to too up very was we were what when which who will with
+    would yeah you your okay ok going gonna get got do does did can""".split()
+)
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def clean_text(text):
+    """Drop filler words and stutters, and tidy the whitespace left behind."""
+    text = FILLER_RE.sub("", text)
+    text = REPEATED_WORD_RE.sub(r"\1", text)
+    text = re.sub(r"\s+([,.!?])", r"\1", text)
+    text = re.sub(r"([,.!?])[,.]+", r"\1", text)
+    return re.sub(r"\s+", " ", text).strip(" ,")
+
+
+def split_sentences(text):
+    sentences = []
+    for sentence in SENTENCE_END_RE.split(text):
+        words = sentence.split()
+        for start in range(0, len(words), MAX_SENTENCE_WORDS):
+            chunk = " ".join(words[start : start + MAX_SENTENCE_WORDS])
+            if chunk:
+                sentences.append(chunk)
+    return sentences
+
+
+def _tfidf(sentences):
+    """L2-normalized TF-IDF rows, one per sentence (zero rows if no terms)."""
+    tokenized = [
+        [w for w in WORD_RE.findall(s.lower()) if w not in STOPWORDS] for s in sentences
+    ]
+    vocabulary = {}
+    for words in tokenized:
+        for word in words:
+            vocabulary.setdefault(word, len(vocabulary))
+
+    counts = np.zeros((len(sentences), max(len(vocabulary), 1)), dtype=np.float32)
+    for row, words in enumerate(tokenized):
+        for word in words:
+            counts[row, vocabulary[word]] += 1
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    matrix = np.log1p(counts) * idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _textrank(similarity):
+    """PageRank over the sentence similarity graph."""
+    n = len(similarity)
+    weights = similarity.copy()
+    np.fill_diagonal(weights, 0)
+    out_weight = weights.sum(axis=1, keepdims=True)
+    transition = np.divide(
+        weights, out_weight, out=np.full_like(weights, 1 / n), where=out_weight > 0
+    )
+
+    scores = np.full(n, 1 / n)
+    for _ in range(TEXTRANK_ITERATIONS):
+        updated = (1 - TEXTRANK_DAMPING) / n + TEXTRANK_DAMPING * transition.T @ scores
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+
+def _informative(similarity):
+    """Indices of sentences with content words that don't repeat earlier ones."""
+    repeated = (np.tril(similarity, -1) >= DUPLICATE_SIMILARITY).any(axis=1)
+    # A row of TF-IDF zeros has zero similarity even with itself
+    has_terms = similarity.diagonal() > 0
+    if not has_terms.any():
+        return np.arange(len(similarity))
+    return np.flatnonzero(has_terms & ~repeated)
+
+
+def _sentence_key(sentence):
+    return " ".join(WORD_RE.findall(sentence.lower()))
+
+
+def _rank_chunks(sentences):
+    """Drop repetitions and score the rest, one chunk of sentences at a time.
+
+    Returns the kept sentences in order with their scores. TextRank scores
+    sum to one per chunk; they are scaled by the chunk size so sentences of
+    different chunks compare.
+    """
+    kept, scores = [], []
+    seen = set()
+    for start in range(0, len(sentences), CHUNK_SENTENCES):
+        chunk = sentences[start : start + CHUNK_SENTENCES]
+        vectors = _tfidf(chunk)
+        similarity = vectors @ vectors.T
+
+        # Repetitions within the chunk are near-duplicates, across chunks
+        # only exact ones are caught
+        informative = [
+            i for i in _informative(similarity) if _sentence_key(chunk[i]) not in seen
+        ]
+        if not informative:
+            continue
+        seen.update(_sentence_key(chunk[i]) for i in informative)
+
+        ranked = _textrank(similarity[np.ix_(informative, informative)])
+        kept += [chunk[i] for i in informative]
+        scores += list(ranked * len(informative))
+    return kept, np.array(scores)
+
+
+def condense_transcript(transcript, token_budget):
+    """Fit a transcript into ``token_budget`` tokens, keeping what matters most.
+
+    Fillers, repeated sentences and sentences made only of stopwords ("yeah
+    okay") are removed first; if the text is still
+    too long, sentences are ranked with TextRank over TF-IDF similarities
+    within chunks of ``CHUNK_SENTENCES`` and the best ones from the whole
+    transcript are kept, in their original order.
+    """
+    text = clean_text(str(transcript))
+    sentences = split_sentences(text)
+    if len(sentences) <= 1:
+        return text[: token_budget * CHARS_PER_TOKEN - 1]
+
+    if len(sentences) > MAX_SENTENCES:
+        step = len(sentences) / MAX_SENTENCES
+        sentences = [sentences[int(i * step)] for i in range(MAX_SENTENCES)]
+
+    sentences, scores = _rank_chunks(sentences)
+
+    condensed = " ".join(sentences)
+    if estimate_tokens(condensed) <= token_budget:
+        return condensed
+
+    # Favour sentences that carry content words over short interjections
+    scores = scores * np.log1p([len(s.split()) for s in sentences])
+
+    chosen = []
+    used = 0
+    for i in np.argsort(-scores, kind="stable"):
+        cost = estimate_tokens(sentences[i])
+        if used + cost > token_budget:
+            continue
+        chosen.append(i)
+        used += cost
+    if not chosen:
+        return sentences[int(np.argmax(scores))][: token_budget * CHARS_PER_TOKEN - 1]
+
+    return " ".join(sentences[i] for i in sorted(chosen))
@@ -0,0 +1,152 @@
+import csv
+import io
+import json
+import zlib
+from sqlalchemy.orm import joinedload
+from .transcribe_service import video_transcript_path
+from ..models.database import db, Video
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_COLUMNS = [
+    "id",
+    "youtube_url",
+    "source",
+    "title",
+    "status",
+    "duration",
+    "whisper_model",
+    "category",
+    "summary",
+    "created_at",
+    "updated_at",
+]
+
+# Rows fetched per database round trip
+EXPORT_BATCH_SIZE = 500
+# Output is flushed to the client in chunks of about this size
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _transcript_text(video):
+    """Read a video's transcript from disk, or None if it has none yet."""
+    path = video_transcript_path(video)
+    if path is None:
+        return None
+
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("text")
+    except (OSError, ValueError):
+        return None
+
+
+def _row(video, include_transcript):
+    # Category.to_dict() counts the category's videos, so only the name is used
+    row = {
+        "id": video.id,
+        "youtube_url": video.youtube_url,
+        "source": "upload" if video.content_hash else "youtube",
+        "title": video.title,
+        "status": video.status,
+        "duration": video.duration,
+        "whisper_model": video.whisper_model,
+        "category": video.category.name if video.category else None,
+        "summary": video.summary,
+        "created_at": video.created_at.isoformat() if video.created_at else None,
+        "updated_at": video.updated_at.isoformat() if video.updated_at else None,
+    }
+    if include_transcript:
+        row["transcript"] = _transcript_text(video)
+    return row
+
+
+def _iter_rows(category_id=None, include_transcript=False):
+    """Rows in id order, read in short keyset-paged batches.
+
+    The session is closed after each batch, so no read transaction stays open
+    while the client downloads; with SQLite one would block every writer.
+    """
+    last_id = 0
+    while True:
+        query = Video.query.options(joinedload(Video.category)).filter(
+            Video.id > last_id
+        )
+        if category_id:
+            query = query.filter_by(category_id=category_id)
+        videos = query.order_by(Video.id).limit(EXPORT_BATCH_SIZE).all()
+        if not videos:
+            return
+        last_id = videos[-1].id
+        db.session.close()
+
+        for video in videos:
+            yield _row(video, include_transcript)
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def _csv_lines(rows, include_transcript):
+    columns = EXPORT_COLUMNS + (["transcript"] if include_transcript else [])
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _chunked(lines):
+    """Join small lines into chunks so each write to the socket is worthwhile."""
+    parts = []
+    size = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        parts.append(data)
+        size += len(data)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield b"".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield b"".join(parts)
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_library(
+    fmt="ndjson", category_id=None, include_transcript=False, compress=False
+):
+    """Yield the library as NDJSON or CSV bytes, optionally gzip-compressed.
+
+    Memory use doesn't grow with the number of videos: rows are read in
+    batches and each transcript is only opened while its row is written.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    rows = _iter_rows(category_id, include_transcript)
+    if fmt == "csv":
+        lines = _csv_lines(rows, include_transcript)
+    else:
+        lines = _ndjson_lines(rows)
+
+    chunks = _chunked(lines)
+    if compress:
+        chunks = _gzipped(chunks)
+    return chunks
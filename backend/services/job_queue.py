@@ -0,0 +1,255 @@
+import json
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from ..models.database import db, Video, QueuedJob
+from ..config import (
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    WORKER_POLL_SECONDS,
+)
+
+_relay_thread = None
+_relay_lock = threading.Lock()
+
+
+def enqueue(video, profile=False, quality=None):
+    """Store a job for worker processes instead of running it in this process."""
+    job = QueuedJob(
+        video_id=video.id,
+        video_url=video.youtube_url,
+        options=json.dumps({"profile": profile, "quality": quality}),
+        priority=video.priority or 0,
+        duration=video.duration,
+        status="queued",
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def job_options(job):
+    return json.loads(job.options) if job.options else {}
+
+
+def _claimable():
+    now = datetime.utcnow()
+    # Running jobs whose lease ran out belong to a worker that went away
+    return or_(
+        QueuedJob.status == "queued",
+        and_(QueuedJob.status == "running", QueuedJob.lease_expires_at < now),
+    )
+
+
+def claim(worker_id):
+    """Lease the next job to ``worker_id``; returns the job or None.
+
+    Highest priority first, then shortest known duration, then oldest. The
+    conditional UPDATE makes the claim atomic when workers race for a job.
+    """
+    while True:
+        candidate = (
+            QueuedJob.query.filter(_claimable())
+            .order_by(
+                QueuedJob.priority.desc(),
+                QueuedJob.duration.is_(None),
+                QueuedJob.duration,
+                QueuedJob.id,
+            )
+            .first()
+        )
+        if candidate is None:
+            return None
+
+        now = datetime.utcnow()
+        claimed = QueuedJob.query.filter(
+            QueuedJob.id == candidate.id,
+            QueuedJob.status == candidate.status,
+            QueuedJob.attempts == candidate.attempts,
+        ).update(
+            {
+                "status": "running",
+                "worker_id": worker_id,
+                "attempts": candidate.attempts + 1,
+                "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                "started_at": now,
+            },
+            synchronize_session=False,
+        )
+        db.session.commit()
+        if not claimed:
+            # Another worker got it first
+            continue
+
+        job = QueuedJob.query.get(candidate.id)
+        if job.attempts > JOB_MAX_ATTEMPTS:
+            _give_up(job)
+            continue
+        return job
+
+
+def _give_up(job):
+    job.status = "failed"
+    job.finished_at = datetime.utcnow()
+    video = Video.query.get(job.video_id)
+    if video:
+        video.status = "error"
+        video.current_step = "Error"
+        video.error_message = (
+            f"Job abandoned after {JOB_MAX_ATTEMPTS} attempts; its workers stopped"
+        )
+    db.session.commit()
+    print(f"❌ Job {job.id} for video {job.video_id} failed: too many attempts")
+
+
+def heartbeat(job_ids, worker_id):
+    """Extend the leases of jobs still held by ``worker_id``."""
+    if not job_ids:
+        return 0
+    renewed = QueuedJob.query.filter(
+        QueuedJob.id.in_(job_ids),
+        QueuedJob.worker_id == worker_id,
+        QueuedJob.status == "running",
+    ).update(
+        {"lease_expires_at": datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)},
+        synchronize_session=False,
+    )
+    db.session.commit()
+    return renewed
+
+
+def complete(job_id, worker_id, peak_rss_mb=None):
+    QueuedJob.query.filter_by(id=job_id, worker_id=worker_id).update(
+        {
+            "status": "done",
+            "finished_at": datetime.utcnow(),
+            "lease_expires_at": None,
+            "peak_rss_mb": peak_rss_mb,
+        },
+        synchronize_session=False,
+    )
+    db.session.commit()
+
+
+def queue_depth():
+    return QueuedJob.query.filter_by(status="queued").count()
+
+
+def active_count():
+    """Jobs queued or leased by a live worker, across all worker processes."""
+    return QueuedJob.query.filter(
+        or_(
+            QueuedJob.status == "queued",
+            and_(
+                QueuedJob.status == "running",
+                QueuedJob.lease_expires_at >= datetime.utcnow(),
+            ),
+        )
+    ).count()
+
+
+def delete_jobs(video_id):
+    QueuedJob.query.filter_by(video_id=video_id).delete(synchronize_session=False)
+
+
+def snapshot():
+    running = QueuedJob.query.filter_by(status="running").order_by(QueuedJob.started_at)
+    queued = QueuedJob.query.filter_by(status="queued").order_by(
+        QueuedJob.priority.desc(),
+        QueuedJob.duration.is_(None),
+        QueuedJob.duration,
+        QueuedJob.id,
+    )
+    entries = []
+    for position, job in enumerate(queued, start=1):
+        entry = job.to_dict()
+        entry["position"] = position
+        entries.append(entry)
+    return {
+        "backend": "database",
+        "running": [job.to_dict() for job in running],
+        "queued": entries,
+    }
+
+
+class ProgressRelay:
+    """Sends the progress of videos whose jobs run in worker processes.
+
+    Rows are found through the job queue rather than by ``updated_at``, so
+    late commits and workers whose clocks run behind are not missed: each
+    poll looks at videos with a queued or running job, with a job added since
+    the last poll (QueuedJob ids only grow), or with a job that was active
+    last time, and emits those whose state differs from what was last sent.
+    """
+
+    def __init__(self, socketio):
+        self.socketio = socketio
+        self.last_job_id = db.session.query(db.func.max(QueuedJob.id)).scalar() or 0
+        self.watched = self._active_video_ids()
+        self.sent = {}
+
+    def _active_video_ids(self):
+        rows = db.session.query(QueuedJob.video_id).filter(
+            QueuedJob.status.in_(("queued", "running"))
+        )
+        return {video_id for (video_id,) in rows}
+
+    def poll(self):
+        from ..utils.progress_tracker import ProgressTracker
+
+        new_jobs = (
+            db.session.query(QueuedJob.id, QueuedJob.video_id)
+            .filter(QueuedJob.id > self.last_job_id)
+            .all()
+        )
+        if new_jobs:
+            self.last_job_id = max(job_id for job_id, _ in new_jobs)
+        active = self._active_video_ids()
+        video_ids = active | self.watched | {video_id for _, video_id in new_jobs}
+
+        for video in Video.query.filter(Video.id.in_(video_ids)):
+            state = (video.status, video.current_step, video.progress)
+            if self.sent.get(video.id) != state:
+                tracker = ProgressTracker(video.id, self.socketio)
+                tracker.set_status(*state)
+                self.sent[video.id] = state
+
+        self.watched = active
+        self.sent = {k: v for k, v in self.sent.items() if k in active}
+
+
+def _relay_progress(app, socketio):
+    with app.app_context():
+        relay = ProgressRelay(socketio)
+        db.session.remove()
+
+    while True:
+        time.sleep(WORKER_POLL_SECONDS)
+        with app.app_context():
+            try:
+                relay.poll()
+            except Exception:
+                traceback.print_exc()
+            finally:
+                db.session.remove()
+
+
+def start_progress_relay(app, socketio):
+    """Emit progress written by workers when no message queue connects them.
+
+    Workers commit each step to the videos table; this polls for changed rows
+    and sends the same events ProgressTracker would.
+    """
+    global _relay_thread
+    with _relay_lock:
+        if _relay_thread is not None:
+            return
+        _relay_thread = threading.Thread(
+            target=_relay_progress,
+            args=(app, socketio),
+            name="progress-relay",
+            daemon=True,
+        )
+        _relay_thread.start()
@@ -0,0 +1,201 @@
+import threading
+import time
+from ..config import (
+    OLLAMA_BASE_URL,
+    OLLAMA_MODEL,
+    LLM_MAX_IN_FLIGHT,
+    LLM_MAX_RETRIES,
+    LLM_TIMEOUT_BASE_SECONDS,
+    LLM_TIMEOUT_PER_1K_CHARS,
+    LLM_BREAKER_FAILURES,
+    LLM_BREAKER_RESET_SECONDS,
+)
+from ..utils.metrics import time_stage, record_llm_usage, Gauge, REGISTRY
+
+LLM_IN_FLIGHT = REGISTRY.register(
+    Gauge("tubescribe_llm_in_flight", "LLM requests currently sent to the server.")
+)
+LLM_WAITING = REGISTRY.register(
+    Gauge("tubescribe_llm_waiting", "LLM requests waiting for a free slot.")
+)
+LLM_BREAKER_OPEN = REGISTRY.register(
+    Gauge(
+        "tubescribe_llm_breaker_open",
+        "1 while the LLM circuit breaker is rejecting requests.",
+    )
+)
+
+# Errors meaning the server is down or overloaded, as opposed to a bad response
+_UNAVAILABLE_ERRORS = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "InternalServerError",
+    "RateLimitError",
+    "ConnectError",
+    "ConnectTimeout",
+    "ReadTimeout",
+    "RemoteProtocolError",
+    "TimeoutException",
+}
+
+
+class LLMUnavailableError(Exception):
+    """The LLM endpoint cannot serve requests right now; retry later."""
+
+
+class CircuitBreaker:
+    """Stops sending requests after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    rejects requests for ``reset_timeout`` seconds. Then a single probe is let
+    through (half-open); its success closes the breaker again.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+        LLM_BREAKER_OPEN.set(0)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+            is_open = self.opened_at is not None
+        if is_open:
+            LLM_BREAKER_OPEN.set(1)
+
+
+breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS)
+
+
+def is_unavailable_error(error):
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & _UNAVAILABLE_ERRORS:
+        return True
+    message = str(error).lower()
+    return "connection" in message or "timed out" in message or "timeout" in message
+
+
+_clients = {}
+_http_client = None
+_lock = threading.Lock()
+# Requests beyond the server's parallelism only queue up inside Ollama and
+# time out there, so they wait here instead, outside the request timeout.
+_slots = threading.BoundedSemaphore(LLM_MAX_IN_FLIGHT)
+
+
+def _get_http_client():
+    global _http_client
+    if _http_client is None:
+        import httpx
+
+        # One keep-alive connection per in-flight slot, reused across requests
+        _http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_IN_FLIGHT,
+                max_keepalive_connections=LLM_MAX_IN_FLIGHT,
+            ),
+        )
+    return _http_client
+
+
+def get_llm(model=None):
+    model = model or OLLAMA_MODEL
+    with _lock:
+        if model not in _clients:
+            try:
+                # Imported lazily to keep API startup fast
+                from langchain_openai import ChatOpenAI
+
+                print(f"Initializing LLM with model: {model} at {OLLAMA_BASE_URL}")
+                _clients[model] = ChatOpenAI(
+                    base_url=OLLAMA_BASE_URL,
+                    api_key="ollama",
+                    model=model,
+                    temperature=0.7,
+                    timeout=LLM_TIMEOUT_BASE_SECONDS,
+                    max_retries=LLM_MAX_RETRIES,
+                    http_client=_get_http_client(),
+                )
+                print("LLM initialized successfully")
+            except Exception as e:
+                print(f"Error initializing LLM: {e}")
+                raise
+    return _clients[model]
+
+
+def timeout_for(messages):
+    """Scale the request timeout with prompt size; prefill dominates on CPU."""
+    chars = sum(len(str(m.content)) for m in messages)
+    return LLM_TIMEOUT_BASE_SECONDS + chars / 1000 * LLM_TIMEOUT_PER_1K_CHARS
+
+
+def invoke(messages, task, model=None):
+    """Send a chat request through the shared connection pool and slot limit.
+
+    Raises LLMUnavailableError when the server is unreachable, overloaded or
+    the circuit breaker is open, so callers can defer the work.
+    """
+    llm = get_llm(model)
+    timeout = timeout_for(messages)
+
+    LLM_WAITING.inc()
+    try:
+        _slots.acquire()
+    finally:
+        LLM_WAITING.dec()
+
+    LLM_IN_FLIGHT.inc()
+    try:
+        # Checked after waiting for a slot: the breaker may have opened meanwhile
+        if not breaker.allow():
+            raise LLMUnavailableError("LLM circuit breaker is open")
+        try:
+            with time_stage(task):
+                response = llm.invoke(messages, timeout=timeout)
+        except Exception as e:
+            if is_unavailable_error(e):
+                breaker.record_failure()
+                raise LLMUnavailableError(f"LLM unavailable: {e}") from e
+            # The server answered, so it is up even if the request was bad
+            breaker.record_success()
+            raise
+        breaker.record_success()
+    finally:
+        LLM_IN_FLIGHT.dec()
+        _slots.release()
+
+    record_llm_usage(task, response)
+    return response
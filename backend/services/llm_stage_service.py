@@ -0,0 +1,259 @@
+import json
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from .llm_gateway import breaker, LLMUnavailableError
+from .summarize_service import summarize_transcript, SUMMARY_VERSION, CATEGORY_VERSION
+from .categorize_service import auto_categorize_video
+from ..models.database import db, Video
+from ..utils import metrics
+from ..utils.progress_tracker import ProgressTracker
+from ..config import (
+    LLM_RETRY_POLL_SECONDS,
+    LLM_RETRY_BASE_SECONDS,
+    LLM_RETRY_MAX_SECONDS,
+    JOB_LEASE_SECONDS,
+    WORKER_HEARTBEAT_SECONDS,
+)
+
+PENDING_LLM = "pending_llm"
+
+_retry_thread = None
+_retry_lock = threading.Lock()
+# Videos whose deferred LLM stage this process is running
+_claimed = set()
+
+
+def _load_transcript_text(video):
+    if not video.transcript_path:
+        raise Exception("Transcript not found for deferred summarization")
+    with open(video.transcript_path, "r") as f:
+        return json.load(f)["text"]
+
+
+def run_llm_stage(video_id, tracker, transcript=None):
+    """Summarize and categorize a transcribed video.
+
+    Steps that already produced a result are skipped, so a video parked
+    between summary and categorization resumes where it stopped. Raises
+    LLMUnavailableError when the LLM cannot be reached.
+    """
+    video = Video.query.get(video_id)
+
+    if not video.summary:
+        tracker.set_status("processing", "Generating summary...", 65)
+        video.current_step = "Generating summary..."
+        video.progress = 65
+        db.session.commit()
+
+        if transcript is None:
+            transcript = _load_transcript_text(video)
+
+        summary = summarize_transcript(transcript, video.title)
+        video = Video.query.get(video_id)
+        video.summary = summary
+        video.summary_version = SUMMARY_VERSION
+        video.progress = 75
+        db.session.commit()
+        print(f"✓ Summary generated for video {video_id}")
+
+    if video.category_id is None:
+        tracker.set_status("processing", "Categorizing video...", 85)
+        video.current_step = "Categorizing video..."
+        video.progress = 85
+        db.session.commit()
+
+        try:
+            category = auto_categorize_video(video.title, video.summary)
+            if category:
+                video = Video.query.get(video_id)
+                video.category_id = category.id
+                video.category_version = CATEGORY_VERSION
+                db.session.commit()
+                print(f"✓ Category assigned: {category.name} for video {video_id}")
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            print(f"Categorization warning: {e}")
+
+
+def finish_video(video_id, tracker):
+    tracker.set_status("completed", "Complete!", 100)
+
+    video = Video.query.get(video_id)
+    video.status = "completed"
+    video.current_step = "Complete"
+    video.progress = 100
+    video.next_llm_retry_at = None
+    video.llm_claimed_at = None
+    db.session.commit()
+    metrics.JOBS.inc(status="completed")
+    print(f"✓ Video processing complete for video {video_id}")
+
+
+def park_for_llm(video_id, tracker, error):
+    """Keep the transcription and retry the LLM stage later with backoff."""
+    db.session.rollback()
+    video = Video.query.get(video_id)
+    video.llm_attempts = (video.llm_attempts or 0) + 1
+    delay = min(
+        LLM_RETRY_BASE_SECONDS * 2 ** (video.llm_attempts - 1), LLM_RETRY_MAX_SECONDS
+    )
+    video.status = PENDING_LLM
+    video.current_step = "Waiting for LLM..."
+    video.next_llm_retry_at = datetime.utcnow() + timedelta(seconds=delay)
+    video.llm_claimed_at = None
+    video.error_message = str(error)[:500]
+    db.session.commit()
+
+    tracker.set_status(PENDING_LLM, "Waiting for LLM...", video.progress)
+    metrics.JOBS.inc(status=PENDING_LLM)
+    print(f"⏸️  Video {video_id} waiting for LLM, retry in {delay:.0f}s: {error}")
+
+
+def _claimable(now):
+    # Claims not renewed within the lease belong to a process that went away
+    return or_(
+        and_(
+            Video.status == PENDING_LLM,
+            or_(Video.next_llm_retry_at.is_(None), Video.next_llm_retry_at <= now),
+        ),
+        and_(
+            Video.status == "processing",
+            Video.llm_claimed_at < now - timedelta(seconds=JOB_LEASE_SECONDS),
+        ),
+    )
+
+
+def _claim_due_video():
+    """Atomically claim one due pending video for this process; return its id.
+
+    The claim moves it to processing and is renewed by ``_renew_claims``
+    until the stage finishes or the video is parked again.
+    """
+    now = datetime.utcnow()
+    candidate = (
+        db.session.query(Video.id, Video.status, Video.llm_claimed_at)
+        .filter(_claimable(now))
+        .order_by(Video.next_llm_retry_at)
+        .first()
+    )
+    if candidate is None:
+        return None
+
+    claimed = Video.query.filter(
+        Video.id == candidate.id,
+        Video.status == candidate.status,
+        (
+            Video.llm_claimed_at.is_(None)
+            if candidate.llm_claimed_at is None
+            else Video.llm_claimed_at == candidate.llm_claimed_at
+        ),
+    ).update({"status": "processing", "llm_claimed_at": now}, synchronize_session=False)
+    db.session.commit()
+    if not claimed:
+        # Another process got it first
+        return None
+    if candidate.status != PENDING_LLM:
+        print(
+            f"⚠️  Taking over the LLM stage of video {candidate.id}: its claim expired"
+        )
+    return candidate.id
+
+
+def _renew_claims(app):
+    while True:
+        time.sleep(WORKER_HEARTBEAT_SECONDS)
+        with _retry_lock:
+            video_ids = list(_claimed)
+        if not video_ids:
+            continue
+        with app.app_context():
+            try:
+                Video.query.filter(
+                    Video.id.in_(video_ids), Video.llm_claimed_at.isnot(None)
+                ).update(
+                    # A renewal is not a change clients need to hear about
+                    {
+                        "llm_claimed_at": datetime.utcnow(),
+                        "updated_at": Video.updated_at,
+                    },
+                    synchronize_session=False,
+                )
+                db.session.commit()
+            except Exception:
+                traceback.print_exc()
+            finally:
+                db.session.remove()
+
+
+def retry_video(video_id):
+    from .. import socketio
+
+    tracker = ProgressTracker(video_id, socketio)
+    try:
+        run_llm_stage(video_id, tracker)
+        video = Video.query.get(video_id)
+        video.error_message = None
+        db.session.commit()
+        finish_video(video_id, tracker)
+    except LLMUnavailableError as e:
+        park_for_llm(video_id, tracker, e)
+    except Exception as e:
+        print(f"Error in deferred LLM stage for video {video_id}: {e}")
+        db.session.rollback()
+        tracker.set_status("error", f"Error: {str(e)}", 0)
+        video = Video.query.get(video_id)
+        video.status = "error"
+        video.current_step = "Error"
+        video.error_message = str(e)
+        video.llm_claimed_at = None
+        db.session.commit()
+        metrics.JOBS.inc(status="error")
+
+
+def _drain_pending(app):
+    while True:
+        time.sleep(LLM_RETRY_POLL_SECONDS)
+        # Don't touch the database while the breaker says the LLM is down
+        if breaker.state == "open":
+            continue
+
+        with app.app_context():
+            try:
+                while breaker.state != "open":
+                    video_id = _claim_due_video()
+                    if video_id is None:
+                        break
+                    print(f"🔁 Retrying LLM stage for video {video_id}")
+                    with _retry_lock:
+                        _claimed.add(video_id)
+                    try:
+                        retry_video(video_id)
+                    finally:
+                        with _retry_lock:
+                            _claimed.discard(video_id)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                db.session.remove()
+
+
+def start_llm_retry_worker(app):
+    """Drain videos parked in pending_llm once the LLM is reachable again.
+
+    Also takes over claims left behind by a process that stopped mid-stage.
+    """
+    global _retry_thread
+    with _retry_lock:
+        if _retry_thread is not None:
+            return
+        _retry_thread = threading.Thread(
+            target=_drain_pending, args=(app,), name="llm-retry", daemon=True
+        )
+        _retry_thread.start()
+        threading.Thread(
+            target=_renew_claims, args=(app,), name="llm-claim-heartbeat", daemon=True
+        ).start()
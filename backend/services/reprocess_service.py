@@ -0,0 +1,312 @@
+import threading
+import time
+import traceback
+from datetime import datetime
+from sqlalchemy import and_, or_
+from .youtube_service import download_audio
+from .upload_service import is_upload_url, resolve_upload, media_id
+from .transcribe_service import (
+    TRANSCRIPT_VERSIONS,
+    model_tiers,
+    select_model,
+    transcribe_audio,
+    transcription_path_for,
+    transcript_version,
+    load_transcription,
+)
+from .summarize_service import (
+    summarize_transcript,
+    SUMMARY_VERSION,
+    ROLLING_SUMMARY_VERSION,
+    CATEGORY_VERSION,
+)
+from .categorize_service import auto_categorize_video
+from .llm_gateway import LLMUnavailableError
+from ..models.database import db, Video
+from . import job_queue
+from ..utils import metrics
+from ..config import JOB_QUEUE_BACKEND, REPROCESS_INTERVAL_SECONDS
+
+STAGES = ("transcript", "summary", "category")
+
+_lock = threading.Lock()
+_thread = None
+_state = {
+    "running": False,
+    "stages": list(STAGES),
+    "started_at": None,
+    "finished_at": None,
+    "total": 0,
+    "processed": 0,
+    "updated": {stage: 0 for stage in STAGES},
+    "errors": 0,
+    "current_video_id": None,
+    "last_error": None,
+}
+
+
+def current_versions():
+    """Versions each stage's output may have without being stale."""
+    return {
+        "transcript": TRANSCRIPT_VERSIONS,
+        # Rolling summaries stay valid until their own prompts change
+        "summary": [SUMMARY_VERSION, ROLLING_SUMMARY_VERSION],
+        "category": [CATEGORY_VERSION],
+    }
+
+
+def _effective_transcript_version(video):
+    # Videos transcribed before versioning still recorded their Whisper model,
+    # and openai-whisper was the only engine then
+    if video.transcript_version:
+        return video.transcript_version
+    if video.whisper_model:
+        return transcript_version(video.whisper_model, "whisper")
+    return None
+
+
+def stale_stages(video, stages=STAGES):
+    """Stages of a video whose output is missing or from an older producer.
+
+    A stale stage also makes every later stage stale, since they consume its
+    output.
+    """
+    stale = []
+    upstream_changed = False
+    for stage, version in (
+        ("transcript", _effective_transcript_version(video)),
+        ("summary", video.summary_version),
+        ("category", video.category_version),
+    ):
+        current = current_versions()[stage]
+        if upstream_changed or (stage in stages and version not in current):
+            stale.append(stage)
+            upstream_changed = True
+    return stale
+
+
+def _stale_query(stages):
+    versions = current_versions()
+    conditions = []
+    if "transcript" in stages:
+        # Unstamped rows are current if their model would be (see
+        # _effective_transcript_version)
+        legacy_models = [
+            model
+            for model in model_tiers()
+            if transcript_version(model, "whisper") in versions["transcript"]
+        ]
+        conditions.append(
+            or_(
+                and_(
+                    Video.transcript_version.is_(None),
+                    or_(
+                        Video.whisper_model.is_(None),
+                        Video.whisper_model.notin_(legacy_models),
+                    ),
+                ),
+                Video.transcript_version.notin_(versions["transcript"]),
+            )
+        )
+    if "summary" in stages:
+        conditions.append(
+            or_(
+                Video.summary_version.is_(None),
+                Video.summary_version.notin_(versions["summary"]),
+            )
+        )
+    if "category" in stages:
+        conditions.append(
+            or_(
+                Video.category_version.is_(None),
+                Video.category_version.notin_(versions["category"]),
+            )
+        )
+    return Video.query.filter(Video.status == "completed", or_(*conditions))
+
+
+def _retranscribe_model(video):
+    """Keep the tier a video was transcribed with while it is still configured."""
+    if video.whisper_model in model_tiers():
+        return video.whisper_model
+    return select_model(video.duration)
+
+
+def _retranscribe(video):
+    key = media_id(video.youtube_url)
+    cached = load_transcription(key)
+    cached_version = cached and cached.get(
+        "version", transcript_version(cached.get("model"), "whisper")
+    )
+    if cached_version in TRANSCRIPT_VERSIONS and cached.get("text"):
+        # Already redone (or first made) with a current model and engine
+        return cached["text"], cached
+
+    if is_upload_url(video.youtube_url):
+        audio_path, _ = resolve_upload(video.youtube_url)
+    else:
+        audio_path, _ = download_audio(video.youtube_url)
+    return transcribe_audio(
+        audio_path,
+        key,
+        model_name=_retranscribe_model(video),
+        force=True,
+        duration=video.duration,
+    )
+
+
+def reprocess_video(video_id, stages=STAGES):
+    """Recompute the stale outputs of one video, reusing the ones still valid.
+
+    Returns the list of stages that were recomputed.
+    """
+    video = Video.query.get(video_id)
+    effective_version = _effective_transcript_version(video)
+    if video.transcript_version is None and effective_version in TRANSCRIPT_VERSIONS:
+        # Only the stamp is missing; the transcript itself is current
+        video.transcript_version = effective_version
+        db.session.commit()
+
+    stale = stale_stages(video, stages)
+    transcript = None
+
+    if "transcript" in stale:
+        transcript, transcription = _retranscribe(video)
+        video = Video.query.get(video_id)
+        video.transcript_path = str(transcription_path_for(media_id(video.youtube_url)))
+        video.whisper_model = transcription.get("model", video.whisper_model)
+        video.transcript_version = transcription.get(
+            "version", transcript_version(video.whisper_model)
+        )
+        db.session.commit()
+
+    if "summary" in stale:
+        if transcript is None:
+            transcription = load_transcription(media_id(video.youtube_url))
+            if not transcription:
+                raise Exception("Transcript not found; reprocess the transcript stage")
+            transcript = transcription["text"]
+        summary = summarize_transcript(transcript, video.title)
+        video = Video.query.get(video_id)
+        video.summary = summary
+        video.summary_version = SUMMARY_VERSION
+        db.session.commit()
+
+    if "category" in stale:
+        category = auto_categorize_video(video.title, video.summary)
+        video = Video.query.get(video_id)
+        video.category_id = category.id if category else None
+        video.category_version = CATEGORY_VERSION
+        db.session.commit()
+
+    return stale
+
+
+def _jobs_pending():
+    """True while regular jobs are queued or running, in any process."""
+    if JOB_QUEUE_BACKEND == "database":
+        try:
+            return job_queue.active_count() > 0
+        finally:
+            db.session.remove()
+    return metrics.JOBS_IN_PROGRESS.get() > 0
+
+
+def _run(app, stages, limit):
+    with app.app_context():
+        try:
+            last_id = 0
+            while True:
+                if limit is not None and _state["processed"] >= limit:
+                    break
+
+                # Regular jobs go first; reprocessing only uses idle time
+                while _jobs_pending():
+                    time.sleep(REPROCESS_INTERVAL_SECONDS)
+
+                video = (
+                    _stale_query(stages)
+                    .filter(Video.id > last_id)
+                    .order_by(Video.id)
+                    .first()
+                )
+                if video is None:
+                    break
+                last_id = video.id
+
+                with _lock:
+                    _state["current_video_id"] = video.id
+                try:
+                    redone = reprocess_video(video.id, stages)
+                    with _lock:
+                        for stage in redone:
+                            _state["updated"][stage] += 1
+                    if redone:
+                        print(
+                            f"♻️  Reprocessed {', '.join(redone)} for video {video.id}"
+                        )
+                except LLMUnavailableError as e:
+                    # Everything left needs the LLM too; stop and let the user resume
+                    db.session.rollback()
+                    with _lock:
+                        _state["last_error"] = str(e)
+                    print(f"Reprocessing stopped, LLM unavailable: {e}")
+                    break
+                except Exception as e:
+                    db.session.rollback()
+                    traceback.print_exc()
+                    with _lock:
+                        _state["errors"] += 1
+                        _state["last_error"] = f"Video {video.id}: {e}"
+                finally:
+                    db.session.remove()
+
+                with _lock:
+                    _state["processed"] += 1
+                time.sleep(REPROCESS_INTERVAL_SECONDS)
+        finally:
+            with _lock:
+                _state["running"] = False
+                _state["current_video_id"] = None
+                _state["finished_at"] = datetime.utcnow().isoformat()
+
+
+def start_reprocess(app, stages=STAGES, limit=None):
+    """Start recomputing stale outputs in the background.
+
+    Returns False if a run is already in progress.
+    """
+    global _thread
+    stages = [stage for stage in STAGES if stage in stages]
+
+    with _lock:
+        if _state["running"]:
+            return False
+        with app.app_context():
+            total = _stale_query(stages).count()
+        _state.update(
+            {
+                "running": True,
+                "stages": stages,
+                "started_at": datetime.utcnow().isoformat(),
+                "finished_at": None,
+                "total": min(total, limit) if limit is not None else total,
+                "processed": 0,
+                "updated": {stage: 0 for stage in STAGES},
+                "errors": 0,
+                "current_video_id": None,
+                "last_error": None,
+            }
+        )
+        _thread = threading.Thread(
+            target=_run, args=(app, stages, limit), name="reprocess", daemon=True
+        )
+        _thread.start()
+    return True
+
+
+def reprocess_status():
+    with _lock:
+        state = dict(_state, updated=dict(_state["updated"]))
+    state["versions"] = current_versions()
+    return state
@@ -0,0 +1,160 @@
+import bisect
+import json
+import math
+import re
+import threading
+from collections import OrderedDict
+from .upload_service import is_upload_url
+from .youtube_service import extract_video_id
+from .transcribe_service import video_transcript_path
+from ..config import SEGMENT_INDEX_CACHE_SIZE
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def normalize_text(text):
+    """Lowercase and reduce punctuation and whitespace runs to one space."""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def parse_timestamp(value):
+    """Parse "90", "1:30" or "1:02:03" into seconds; raises ValueError."""
+    parts = str(value).strip().split(":")
+    if not parts or len(parts) > 3 or any(p.strip() == "" for p in parts):
+        raise ValueError(f"Invalid timestamp: {value}")
+    seconds = 0.0
+    for part in parts:
+        part = float(part)
+        # "nan", "inf" and negative fields, "-0" included, are not times
+        if not math.isfinite(part) or math.copysign(1, part) < 0:
+            raise ValueError(f"Invalid timestamp: {value}")
+        seconds = seconds * 60 + part
+    return seconds
+
+
+class SegmentIndex:
+    """Timestamped segments of one transcript, indexed for search and seeking.
+
+    Segment texts are normalized and joined into one string, so a phrase that
+    crosses a segment boundary is still found; a bisect over the segments'
+    character offsets maps each match back to its segment. Range queries
+    bisect over start times.
+    """
+
+    def __init__(self, segments):
+        segments = sorted(
+            (s for s in segments if s.get("text", "").strip()),
+            key=lambda s: s.get("start", 0.0),
+        )
+        self.starts = [float(s.get("start", 0.0)) for s in segments]
+        self.ends = [float(s.get("end", s.get("start", 0.0))) for s in segments]
+        self.texts = [s["text"].strip() for s in segments]
+
+        # Latest end so far; lets a bisect find the first segment reaching a time
+        self._max_ends = []
+        latest = 0.0
+        for end in self.ends:
+            latest = max(latest, end)
+            self._max_ends.append(latest)
+
+        # Padded with spaces so searches can match whole words at either end
+        self._offsets = []
+        parts = []
+        position = 1
+        for text in self.texts:
+            normalized = normalize_text(text)
+            self._offsets.append(position)
+            parts.append(normalized)
+            position += len(normalized) + 1
+        self._text = " " + " ".join(parts) + " "
+
+    def __len__(self):
+        return len(self.texts)
+
+    def segment(self, i):
+        return {
+            "index": i,
+            "start": self.starts[i],
+            "end": self.ends[i],
+            "text": self.texts[i],
+        }
+
+    def _segment_at(self, offset):
+        return bisect.bisect_right(self._offsets, offset) - 1
+
+    def search(self, phrase):
+        """Segments containing ``phrase`` as whole words.
+
+        A match spanning segments returns all of them.
+        """
+        words = normalize_text(phrase)
+        if not words:
+            return []
+        # "cat" must not match inside "category"
+        needle = f" {words} "
+
+        hits = []
+        seen = set()
+        position = self._text.find(needle)
+        while position != -1:
+            first = self._segment_at(position + 1)
+            last = self._segment_at(position + len(words))
+            for i in range(first, last + 1):
+                if i not in seen:
+                    seen.add(i)
+                    hits.append(i)
+            # The closing space may open the next match
+            position = self._text.find(needle, position + len(needle) - 1)
+        return sorted(hits)
+
+    def between(self, start=None, end=None):
+        """Segments overlapping [start, end] seconds; either bound may be None."""
+        lo = 0 if start is None else bisect.bisect_right(self._max_ends, start)
+        hi = len(self) if end is None else bisect.bisect_left(self.starts, end)
+        return [i for i in range(lo, hi) if start is None or self.ends[i] > start]
+
+
+def load_index(video):
+    """Return the SegmentIndex of a video's transcript, or None if it has none.
+
+    Indexes are kept in an LRU cache and rebuilt only when the transcription
+    file changes (e.g. after reprocessing).
+    """
+    path = video_transcript_path(video)
+    if path is None or not path.exists():
+        return None
+    mtime = path.stat().st_mtime
+
+    with _cache_lock:
+        cached = _cache.get(video.id)
+        if cached is not None and cached[0] == (str(path), mtime):
+            _cache.move_to_end(video.id)
+            return cached[1]
+
+    with open(path, "r") as f:
+        index = SegmentIndex(json.load(f).get("segments", []))
+
+    with _cache_lock:
+        _cache[video.id] = ((str(path), mtime), index)
+        _cache.move_to_end(video.id)
+        while len(_cache) > SEGMENT_INDEX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+
+def forget_index(video_id):
+    with _cache_lock:
+        _cache.pop(video_id, None)
+
+
+def deep_link(video, seconds):
+    """Link that opens the video at ``seconds``; None for uploaded files."""
+    if is_upload_url(video.youtube_url):
+        return None
+    youtube_id = extract_video_id(video.youtube_url)
+    if not youtube_id:
+        return None
+    return f"https://www.youtube.com/watch?v={youtube_id}&t={int(seconds)}s"
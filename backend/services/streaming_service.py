@@ -0,0 +1,155 @@
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+from .summarize_service import summarize_part, combine_summaries
+from ..config import ROLLING_SUMMARY_CHARS
+
+# Part summaries still running, including those of jobs that already ended
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def _untrack(future):
+    with _in_flight_lock:
+        _in_flight.discard(future)
+
+
+def drain(timeout=None):
+    """Wait for part summaries still running in the background.
+
+    Returns how many were still running after ``timeout`` seconds.
+    """
+    with _in_flight_lock:
+        futures = list(_in_flight)
+    return len(wait(futures, timeout).not_done)
+
+
+class RollingSummarizer:
+    """Summarizes a transcript part by part while it is still being transcribed.
+
+    Every ROLLING_SUMMARY_CHARS of text is summarized in the background as
+    soon as it is complete. ``finish`` summarizes the rest and combines the
+    part summaries, a prompt far shorter than the transcript itself.
+    """
+
+    def __init__(self, video_title, on_part=None):
+        self.video_title = video_title
+        self.on_part = on_part
+        # Parts are summarized in order, one at a time per video
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="rolling-summary"
+        )
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._buffered_chars = 0
+        self._futures = []
+        self._generation = 0
+
+    def _summarize(self, text, part, generation):
+        summary = summarize_part(text, self.video_title, part)
+        if self.on_part is not None and generation == self._generation:
+            self.on_part(part, summary)
+        return summary
+
+    def _submit(self):
+        text = " ".join(self._buffer)
+        self._buffer = []
+        self._buffered_chars = 0
+        future = self._executor.submit(
+            self._summarize, text, len(self._futures) + 1, self._generation
+        )
+        with _in_flight_lock:
+            _in_flight.add(future)
+        future.add_done_callback(_untrack)
+        self._futures.append(future)
+
+    def add(self, text):
+        text = text.strip()
+        if not text:
+            return
+        with self._lock:
+            self._buffer.append(text)
+            self._buffered_chars += len(text) + 1
+            if self._buffered_chars >= ROLLING_SUMMARY_CHARS:
+                self._submit()
+
+    def reset(self):
+        """Forget everything, e.g. when transcription starts over."""
+        with self._lock:
+            for future in self._futures:
+                future.cancel()
+            self._futures = []
+            self._buffer = []
+            self._buffered_chars = 0
+            self._generation += 1
+
+    def finish(self):
+        """Combined summary of everything added, or None.
+
+        None means the caller should summarize the full transcript as usual:
+        when the text fit in a single part, or when a part failed.
+        """
+        with self._lock:
+            if not self._futures:
+                return None
+            if self._buffer:
+                self._submit()
+            futures = list(self._futures)
+
+        try:
+            summaries = [future.result() for future in futures]
+        except Exception as e:
+            print(f"Rolling summary failed, summarizing the full transcript: {e}")
+            return None
+        finally:
+            self._executor.shutdown(wait=False)
+
+        try:
+            return combine_summaries(summaries, self.video_title)
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class TranscriptStream:
+    """Receives segments as they are transcribed.
+
+    Forwards them to clients in the video's Socket.IO room, reports progress
+    through the audio, and feeds them to a rolling summarizer.
+    """
+
+    def __init__(self, tracker, video_title, duration=None):
+        self.tracker = tracker
+        self.duration = duration
+        self.summarizer = RollingSummarizer(video_title, on_part=self._part_done)
+
+    def _part_done(self, part, summary):
+        self.tracker.emit_summary(summary, part=part)
+
+    def reset(self):
+        self.summarizer.reset()
+        self.tracker.emit_segments([], reset=True)
+
+    def add(self, segments):
+        if not segments:
+            return
+        self.tracker.emit_segments(segments)
+        if self.duration:
+            done = min(segments[-1]["end"] / self.duration, 1)
+            # Transcription spans 35-65% of the job's progress
+            self.tracker.set_status(
+                "processing", "Transcribing audio...", 35 + int(30 * done)
+            )
+        self.summarizer.add(" ".join(s["text"].strip() for s in segments))
+
+    def finish(self):
+        summary = self.summarizer.finish()
+        if summary:
+            self.tracker.emit_summary(summary, final=True)
+        return summary
+
+    def close(self):
+        self.summarizer.close()
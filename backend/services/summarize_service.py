@@ -1,45 +1,49 @@
+import hashlib
 import re
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage
-from ..config import OLLAMA_BASE_URL, OLLAMA_MODEL
-
-llm = None
-
-
-def get_llm():
-    global llm
-    if llm is None:
-        try:
-            print(f"Initializing LLM with model: {OLLAMA_MODEL} at {OLLAMA_BASE_URL}")
-            llm = ChatOpenAI(
-                base_url=OLLAMA_BASE_URL,
-                api_key="ollama",
-                model=OLLAMA_MODEL,
-                temperature=0.7,
-                timeout=60,
-            )
-            print("LLM initialized successfully")
-        except Exception as e:
-            print(f"Error initializing LLM: {e}")
-            raise
-    return llm
-
-
-def summarize_transcript(transcript, video_title="", max_length=300):
-    try:
-        model = get_llm()
-
-        # Ensure transcript is properly formatted
-        transcript = str(transcript).strip()
-        if not transcript:
-            raise Exception("Empty transcript provided")
-
-        # Truncate transcript if too long (small to medium models have context limits)
-        max_transcript_length = 2000  # Adjust based on model context window
-        if len(transcript) > max_transcript_length:
-            transcript = transcript[:max_transcript_length] + "..."
-
-        system_prompt = """You are a helpful assistant that creates concise summaries of text transcripts.
+from . import llm_gateway
+from .llm_gateway import LLMUnavailableError
+from .condense_service import condense_transcript, CONDENSE_VERSION
+from ..config import (
+    OLLAMA_MODEL,
+    OLLAMA_CATEGORY_MODEL,
+    LLM_BATCH_SIZE,
+    LLM_BATCH_WAIT_MS,
+    SUMMARY_CONDENSE,
+    SUMMARY_TOKEN_BUDGET,
+    ROLLING_SUMMARY_CHARS,
+)
+from ..utils.metrics import LLM_REQUESTS, time_stage
+from ..utils.batcher import Batcher
+
+CATEGORIES = [
+    "technology",
+    "education",
+    "entertainment",
+    "science",
+    "health & fitness",
+    "business",
+    "programming",
+    "gaming",
+    "music",
+    "news",
+    "politics",
+    "travel",
+    "food & cooking",
+    "art & design",
+    "sports",
+    "finance",
+    "productivity",
+    "lifestyle",
+    "tutorials",
+    "reviews",
+    "general",
+]
+
+
+# Small to medium models have context limits
+MAX_TRANSCRIPT_LENGTH = 2000
+
+SUMMARY_SYSTEM_PROMPT = """You are a helpful assistant that creates concise summaries of text transcripts.
 Your summary should:
 - Be approximately {max_length} words or less
 - Capture the main points and key insights
@@ -49,142 +53,289 @@ Your summary should:
 - Focus on the actual content provided in the text
 - Start directly with the summary, do not include any introductory phrases"""
 
-        user_prompt = f"""Title: {video_title}
+SUMMARY_USER_PROMPT = """Title: {video_title}
 
 Transcript:
 {transcript}
 
 Summarize the transcript above in plain text."""
 
+# Used while a long video is still being transcribed: parts are summarized as
+# they complete, then their summaries are combined
+SUMMARY_PART_PROMPT = """Title: {video_title}
+
+Transcript, part {part}:
+{transcript}
+
+Summarize this part of the transcript in plain text, in a few sentences."""
+
+SUMMARY_COMBINE_PROMPT = """Title: {video_title}
+
+Summaries of consecutive parts of the video:
+{summaries}
+
+Combine these into one summary of the whole video in plain text."""
+
+
+def producer_version(model, *prompts):
+    """Identify what produced an output: the model plus a hash of its prompts."""
+    digest = hashlib.sha256("\n".join(str(p) for p in prompts).encode()).hexdigest()
+    return f"{model}:{digest[:12]}"
+
+
+def _fit_transcript(transcript):
+    """Condense (or truncate) a transcript to the summary prompt budget."""
+    if SUMMARY_CONDENSE:
+        with time_stage("condense"):
+            return condense_transcript(transcript, SUMMARY_TOKEN_BUDGET)
+    if len(transcript) > MAX_TRANSCRIPT_LENGTH:
+        # Truncate transcript if too long
+        return transcript[:MAX_TRANSCRIPT_LENGTH] + "..."
+    return transcript
+
+
+def _clean_summary(summary):
+    summary = summary.strip()
+
+    # Clean up common prefixes and extra formatting
+    summary = summary.replace("Here's a concise summary of the transcript:", "")
+    summary = summary.replace("Here is a concise summary of the transcript:", "")
+    summary = summary.replace("Summary:", "")
+    summary = summary.replace("Here's the summary:", "")
+    summary = summary.strip()
+
+    # Remove markdown formatting
+    summary = summary.replace("**", "").replace("*", "")
+    summary = re.sub(r"^\s*-\s*", "", summary, flags=re.MULTILINE)
+    summary = re.sub(r"^\s*•\s*", "", summary, flags=re.MULTILINE)
+    summary = re.sub(r"\n+", "\n\n", summary)  # Replace multiple newlines with double
+    return summary.strip()
+
+
+def _summarize(user_prompt, task):
+    try:
+        from langchain_core.messages import SystemMessage, HumanMessage
+
         messages = [
-            SystemMessage(content=system_prompt),
+            SystemMessage(content=SUMMARY_SYSTEM_PROMPT),
             HumanMessage(content=user_prompt),
         ]
 
-        response = model.invoke(messages)
+        response = llm_gateway.invoke(messages, task)
 
         if not response or not response.content:
             raise Exception("LLM returned empty response")
 
-        summary = response.content.strip()
-
-        # Clean up common prefixes and extra formatting
-        summary = summary.replace("Here's a concise summary of the transcript:", "")
-        summary = summary.replace("Here is a concise summary of the transcript:", "")
-        summary = summary.replace("Summary:", "")
-        summary = summary.replace("Here's the summary:", "")
-        summary = summary.strip()
-
-        # Remove markdown formatting
-        summary = summary.replace("**", "").replace("*", "")
-        summary = re.sub(r"^\s*-\s*", "", summary, flags=re.MULTILINE)
-        summary = re.sub(r"^\s*•\s*", "", summary, flags=re.MULTILINE)
-        summary = re.sub(
-            r"\n+", "\n\n", summary
-        )  # Replace multiple newlines with double
-        summary = summary.strip()
+        summary = _clean_summary(response.content)
 
         # Check if model refused to summarize
         if "can't" in summary.lower() and "doesn't exist" in summary.lower():
             raise Exception("Model refused to summarize the transcript")
 
         print(f"Summary generated successfully: {len(summary)} characters")
+        LLM_REQUESTS.inc(task=task, outcome="success")
         return summary
 
+    except LLMUnavailableError as e:
+        # Not a property of this video: the caller defers it until Ollama is back
+        print(f"LLM unavailable, summarization deferred: {e}")
+        LLM_REQUESTS.inc(task=task, outcome="unavailable")
+        raise
+
     except Exception as e:
         error_details = str(e)
         print(f"Error in summarization: {error_details}")
+        LLM_REQUESTS.inc(task=task, outcome="error")
+        raise Exception(f"Summary generation failed: {error_details[:100]}")
 
-        # Provide user-friendly error messages
-        if "404" in error_details or "not found" in error_details.lower():
-            return "Summary failed: Ollama endpoint not found. Ensure Ollama is running with the correct configuration."
-        elif "connection" in error_details.lower():
-            return "Summary failed: Cannot connect to Ollama. Ensure Ollama server is running (ollama serve)."
-        elif "timeout" in error_details.lower():
-            return "Summary failed: Request timeout. The model may be busy. Please try again."
-        else:
-            return f"Summary generation failed: {str(e)[:100]}"
-
-
-def categorize_content(title, summary):
-    try:
-        model = get_llm()
-
-        # Ensure we have content to categorize
-        title = str(title).strip()
-        summary = str(summary).strip() if summary else ""
-
-        if not title and not summary:
-            return "general"
 
-        system_prompt = """You are a content categorization assistant.
+def summarize_transcript(transcript, video_title="", max_length=300):
+    # Ensure transcript is properly formatted
+    transcript = str(transcript).strip()
+    if not transcript:
+        LLM_REQUESTS.inc(task="summarize", outcome="error")
+        raise Exception("Summary generation failed: Empty transcript provided")
+
+    user_prompt = SUMMARY_USER_PROMPT.format(
+        video_title=video_title, transcript=_fit_transcript(transcript)
+    )
+    return _summarize(user_prompt, "summarize")
+
+
+def summarize_part(transcript, video_title, part):
+    """Summarize one part of a transcript that is still being transcribed."""
+    user_prompt = SUMMARY_PART_PROMPT.format(
+        video_title=video_title, part=part, transcript=_fit_transcript(transcript)
+    )
+    return _summarize(user_prompt, "summarize_part")
+
+
+def combine_summaries(summaries, video_title):
+    """Merge the summaries of consecutive parts into one summary."""
+    user_prompt = SUMMARY_COMBINE_PROMPT.format(
+        video_title=video_title,
+        summaries="\n\n".join(
+            f"Part {number}: {summary}"
+            for number, summary in enumerate(summaries, start=1)
+        ),
+    )
+    return _summarize(user_prompt, "summarize_combine")
+
+
+CATEGORIZE_SYSTEM_PROMPT = """You are a content categorization assistant.
 Given a title and summary text, determine the most appropriate category.
 Respond with ONLY the single category name in lowercase, no other text or explanation.
 
 Choose from these categories:
-- technology
-- education
-- entertainment
-- science
-- health & fitness
-- business
-- programming
-- gaming
-- music
-- news
-- politics
-- travel
-- food & cooking
-- art & design
-- sports
-- finance
-- productivity
-- lifestyle
-- tutorials
-- reviews
-- general"""
-
-        user_prompt = f"""Title: {title}
+""" + "\n".join(f"- {name}" for name in CATEGORIES)
+
+CATEGORIZE_BATCH_SYSTEM_PROMPT = """You are a content categorization assistant.
+You will receive several numbered items, each with a title and summary.
+For every item, determine the most appropriate category.
+Respond with one line per item in the form "<number>: <category>", using the
+category name in lowercase and no other text or explanation.
+
+Choose from these categories:
+""" + "\n".join(f"- {name}" for name in CATEGORIES)
+
+
+# How the transcript is fitted into the prompt changes the summary too
+_FIT_VERSION = (
+    f"condense-v{CONDENSE_VERSION}:{SUMMARY_TOKEN_BUDGET}"
+    if SUMMARY_CONDENSE
+    else MAX_TRANSCRIPT_LENGTH
+)
+SUMMARY_VERSION = producer_version(
+    OLLAMA_MODEL, SUMMARY_SYSTEM_PROMPT, SUMMARY_USER_PROMPT, _FIT_VERSION
+)
+# Summaries combined from parts made during transcription (streaming_service)
+ROLLING_SUMMARY_VERSION = producer_version(
+    OLLAMA_MODEL,
+    SUMMARY_SYSTEM_PROMPT,
+    SUMMARY_PART_PROMPT,
+    SUMMARY_COMBINE_PROMPT,
+    _FIT_VERSION,
+    f"rolling:{ROLLING_SUMMARY_CHARS}",
+)
+CATEGORY_VERSION = producer_version(
+    OLLAMA_CATEGORY_MODEL, CATEGORIZE_SYSTEM_PROMPT, CATEGORIZE_BATCH_SYSTEM_PROMPT
+)
+
+
+def _clean_category(text):
+    category = text.strip().lower()
+
+    # Clean up the category name
+    category = category.split("\n")[0].strip()
+    if category.startswith("-"):
+        category = category[1:].strip()
+    if category.startswith("*"):
+        category = category[1:].strip()
+    if category.endswith("."):
+        category = category[:-1].strip()
+    return category
+
+
+def _categorize_single(title, summary):
+    from langchain_core.messages import SystemMessage, HumanMessage
+
+    user_prompt = f"""Title: {title}
 
 Summary:
 {summary if summary else "No summary provided"}
 
 Based on the title and summary above, what is the most appropriate category? Respond with only the category name."""
 
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_prompt),
-        ]
+    messages = [
+        SystemMessage(content=CATEGORIZE_SYSTEM_PROMPT),
+        HumanMessage(content=user_prompt),
+    ]
 
-        response = model.invoke(messages)
+    response = llm_gateway.invoke(messages, "categorize", model=OLLAMA_CATEGORY_MODEL)
 
-        if not response or not response.content:
-            raise Exception("LLM returned empty response")
+    if not response or not response.content:
+        raise Exception("LLM returned empty response")
+
+    return _clean_category(response.content)
+
+
+def _categorize_batch(items):
+    """Categorize several (title, summary) pairs with a single LLM request.
+
+    Items the model skips or answers ambiguously are retried one at a time.
+    """
+    if len(items) == 1:
+        return [_categorize_single(*items[0])]
+
+    from langchain_core.messages import SystemMessage, HumanMessage
+
+    blocks = []
+    for number, (title, summary) in enumerate(items, start=1):
+        # Keep each item short; the title and opening of the summary suffice
+        blocks.append(
+            f"{number}. Title: {title}\n"
+            f"Summary: {(summary or 'No summary provided')[:600]}"
+        )
+    user_prompt = "\n\n".join(blocks) + (
+        f"\n\nRespond with exactly {len(items)} lines, one category per item."
+    )
+
+    messages = [
+        SystemMessage(content=CATEGORIZE_BATCH_SYSTEM_PROMPT),
+        HumanMessage(content=user_prompt),
+    ]
+    response = llm_gateway.invoke(
+        messages, "categorize_batch", model=OLLAMA_CATEGORY_MODEL
+    )
 
-        category = response.content.strip().lower()
+    answers = {}
+    for line in (response.content or "").splitlines():
+        match = re.match(r"^\s*[-*]?\s*(\d+)\s*[:.)-]\s*(.+)$", line)
+        if match:
+            answers[int(match.group(1))] = _clean_category(match.group(2))
 
-        # Clean up the category name
-        category = category.split("\n")[0].strip()
-        if category.startswith("-"):
-            category = category[1:].strip()
-        if category.startswith("*"):
-            category = category[1:].strip()
-        if category.endswith("."):
-            category = category[:-1].strip()
+    results = []
+    for number, (title, summary) in enumerate(items, start=1):
+        category = answers.get(number)
+        if not category:
+            category = _categorize_single(title, summary)
+        results.append(category)
+    return results
+
+
+_category_batcher = Batcher(
+    _categorize_batch,
+    max_size=LLM_BATCH_SIZE,
+    max_wait=LLM_BATCH_WAIT_MS / 1000,
+    name="llm-batcher",
+)
+
+
+def categorize_content(title, summary):
+    try:
+        # Ensure we have content to categorize
+        title = str(title).strip()
+        summary = str(summary).strip() if summary else ""
+
+        if not title and not summary:
+            return "general"
+
+        if LLM_BATCH_SIZE > 1:
+            category = _category_batcher.submit((title, summary))
+        else:
+            category = _categorize_single(title, summary)
 
         print(f"Category determined: {category}")
+        LLM_REQUESTS.inc(task="categorize", outcome="success")
         return category
 
-    except Exception as e:
-        error_details = str(e)
-        print(f"Error in categorization: {error_details}")
-
-        # Always return a fallback category
-        if "404" in error_details or "not found" in error_details.lower():
-            print("Ollama endpoint not found, using fallback category")
-        elif "connection" in error_details.lower():
-            print("Cannot connect to Ollama, using fallback category")
-        elif "timeout" in error_details.lower():
-            print("Request timeout, using fallback category")
+    except LLMUnavailableError as e:
+        print(f"LLM unavailable, categorization deferred: {e}")
+        LLM_REQUESTS.inc(task="categorize", outcome="unavailable")
+        raise
 
+    except Exception as e:
+        # The model answered but unusably; fall back rather than retrying
+        print(f"Error in categorization, using fallback category: {e}")
+        LLM_REQUESTS.inc(task="categorize", outcome="error")
         return "general"
@@ -1,38 +1,246 @@
-import whisper
+from collections import OrderedDict
 from pathlib import Path
 import json
 import os
-from .youtube_service import validate_audio_file, convert_to_mono_if_needed
-from ..config import TRANSCRIPTIONS_DIR, WHISPER_MODEL
+import threading
+from .youtube_service import (
+    validate_audio_file,
+    convert_to_mono_if_needed,
+    probe_duration,
+)
+from .upload_service import media_id
+from .asr_engines import get_engine, split_windows, merge_results, WINDOW_SECONDS
+from .vad_service import trim_silence
+from ..config import (
+    TRANSCRIPTIONS_DIR,
+    WHISPER_MODEL,
+    WHISPER_TIERS,
+    WHISPER_MEMORY_BUDGET_MB,
+    WHISPER_LONG_AUDIO_SECONDS,
+    WHISPER_BACKLOG_STEP,
+    WHISPER_BATCH_SIZE,
+    WHISPER_BATCH_WAIT_MS,
+    WHISPER_BATCH_WINDOWS,
+    VAD_ENABLED,
+    STREAM_CHUNK_SECONDS,
+)
+from ..utils.batcher import Batcher
+from ..utils.metrics import time_stage, record_cache, record_retry, ASR_BATCH_SIZE
 
-model = None
+QUALITY_HINTS = ("fast", "balanced", "accurate")
 
+# Approximate resident memory of each model on CPU (float32); engines that
+# quantize scale it by their memory_factor
+MODEL_MEMORY_MB = {
+    "tiny": 150,
+    "tiny.en": 150,
+    "base": 300,
+    "base.en": 300,
+    "small": 1000,
+    "small.en": 1000,
+    "medium": 2600,
+    "medium.en": 2600,
+    "turbo": 3200,
+    "large": 5500,
+    "large-v1": 5500,
+    "large-v2": 5500,
+    "large-v3": 5500,
+}
 
-def load_model():
-    global model
-    if model is None:
-        print(f"Loading Whisper model: {WHISPER_MODEL}")
-        model = whisper.load_model(WHISPER_MODEL)
+# Loaded models, least recently used first
+models = OrderedDict()
+_model_lock = threading.Lock()
+
+
+def _model_memory_mb(name):
+    return MODEL_MEMORY_MB.get(name, 1000) * get_engine().memory_factor
+
+
+def _loaded_memory_mb():
+    return sum(_model_memory_mb(name) for name in models)
+
+
+def load_model(name=None):
+    name = name or WHISPER_MODEL
+    with _model_lock:
+        if name in models:
+            models.move_to_end(name)
+            return models[name]
+
+        # Evict least recently used models to stay within the memory budget
+        needed = _model_memory_mb(name)
+        while models and _loaded_memory_mb() + needed > WHISPER_MEMORY_BUDGET_MB:
+            evicted, _ = models.popitem(last=False)
+            print(f"Unloading Whisper model to stay within memory budget: {evicted}")
+
+        engine = get_engine()
+        print(f"Loading Whisper model: {name} ({engine.name})")
+        models[name] = engine.load(name)
         print("Whisper model loaded successfully")
-    return model
+        return models[name]
+
+
+# Per-model batchers of audio windows, and locks so that a model decodes one
+# batch at a time instead of several competing for the same cores
+_batchers = {}
+_decode_locks = {}
+_batcher_lock = threading.Lock()
+
+
+def _decode_batch(model_name, windows):
+    model = load_model(model_name)
+    ASR_BATCH_SIZE.observe(len(windows))
+    with _decode_locks[model_name]:
+        return get_engine().transcribe_windows(model, windows)
+
+
+def _batcher(model_name):
+    with _batcher_lock:
+        if model_name not in _batchers:
+            _decode_locks[model_name] = threading.Lock()
+            _batchers[model_name] = Batcher(
+                lambda windows: _decode_batch(model_name, windows),
+                max_size=WHISPER_BATCH_SIZE,
+                max_wait=WHISPER_BATCH_WAIT_MS / 1000,
+                name=f"asr-batcher-{model_name}",
+            )
+        return _batchers[model_name]
+
+
+def _run_engine(model, model_name, audio_path, duration=None):
+    """Transcribe with the engine, batching with other jobs when enabled.
+
+    Clips that fit in one 30 s window (and, with WHISPER_BATCH_WINDOWS, every
+    window of longer audio) join a shared batch; results come back per clip
+    with segment times relative to its own start. Eligibility is decided from
+    ``duration`` (probed when not given) so audio the engine transcribes on
+    its own is not decoded an extra time.
+    """
+    engine = get_engine()
+    if WHISPER_BATCH_SIZE <= 1 or not engine.supports_batching:
+        return engine.transcribe(model, audio_path)
+
+    if duration is None:
+        duration = probe_duration(audio_path)
+    if duration is None or (duration > WINDOW_SECONDS and not WHISPER_BATCH_WINDOWS):
+        return engine.transcribe(model, audio_path)
+
+    windows = split_windows(engine.load_audio(audio_path))
+    return merge_results(_batcher(model_name).submit_many(windows))
+
+
+def _public_segment(segment):
+    # Token ids are only useful to the decoder; dropping them keeps cached
+    # transcriptions, and everything holding them, smaller
+    return {key: value for key, value in segment.items() if key != "tokens"}
+
+
+def _stream_engine(model, audio_path, stream, trimmed=None):
+    """Transcribe chunk by chunk, handing each chunk's segments to ``stream``."""
+    parts = []
+    for part in get_engine().stream(model, audio_path, STREAM_CHUNK_SECONDS):
+        if trimmed is not None:
+            part = trimmed.restore(part)
+        part["segments"] = [_public_segment(s) for s in part["segments"]]
+        parts.append(part)
+        stream.add(part["segments"])
+    return merge_results(parts)
 
 
-def transcribe_audio(audio_path, video_id, retry_count=3):
-    """Transcribe audio with validation and retry logic."""
+def model_tiers():
+    """Whisper models jobs may be transcribed with, fastest first."""
+    return WHISPER_TIERS or [WHISPER_MODEL]
+
+
+def select_model(duration=None, queue_depth=0, quality=None):
+    """Pick a Whisper tier for a job.
+
+    Starts from ``WHISPER_MODEL`` (or the most accurate tier if it is not in
+    ``WHISPER_TIERS``) and drops one tier for long audio plus one tier per
+    ``WHISPER_BACKLOG_STEP`` queued jobs. ``quality`` overrides the policy:
+    "fast" always uses the fastest tier, "accurate" always the most accurate.
+    """
+    tiers = model_tiers()
+
+    if quality == "fast":
+        return tiers[0]
+    if quality == "accurate":
+        return tiers[-1]
+
+    index = tiers.index(WHISPER_MODEL) if WHISPER_MODEL in tiers else len(tiers) - 1
+    if duration and duration > WHISPER_LONG_AUDIO_SECONDS:
+        index -= 1
+    if WHISPER_BACKLOG_STEP > 0:
+        index -= queue_depth // WHISPER_BACKLOG_STEP
+
+    return tiers[max(index, 0)]
+
+
+def transcript_version(model_name, engine=None):
+    """Producer version stamped on transcripts made with ``model_name``."""
+    return f"{engine or get_engine().name}:{model_name}"
+
+
+# Any tier select_model may pick is current: transcripts made with a quality
+# hint, or with a lower tier under load, are valid outputs of this setup
+TRANSCRIPT_VERSIONS = [transcript_version(model) for model in model_tiers()]
+
+
+def transcription_path_for(video_id):
+    return TRANSCRIPTIONS_DIR / f"{video_id}_transcription.json"
+
+
+def video_transcript_path(video):
+    """Transcription file of a Video row, also for rows without transcript_path."""
+    if video.transcript_path:
+        return Path(video.transcript_path)
+    key = media_id(video.youtube_url)
+    return transcription_path_for(key) if key else None
+
+
+def load_transcription(video_id):
+    """Return the cached transcription data for a video, or None."""
+    path = transcription_path_for(video_id)
+    if not path.exists():
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def transcribe_audio(
+    audio_path,
+    video_id,
+    retry_count=3,
+    model_name=None,
+    force=False,
+    stream=None,
+    duration=None,
+):
+    """Transcribe audio with validation and retry logic.
+
+    ``force`` ignores a cached transcription, e.g. to redo it with a newer model.
+    ``duration`` is the audio length in seconds, if already known.
+    ``stream`` (an object with ``add(segments)`` and ``reset()``) receives
+    segments as each chunk is transcribed; it is reset before every retry.
+    """
     audio_path = Path(audio_path)
+    model_name = model_name or WHISPER_MODEL
 
     # Check if transcription already exists
-    transcription_path = TRANSCRIPTIONS_DIR / f"{video_id}_transcription.json"
-    if transcription_path.exists():
+    transcription_path = transcription_path_for(video_id)
+    if transcription_path.exists() and not force:
         try:
             with open(transcription_path, "r") as f:
                 data = json.load(f)
                 if data.get("text"):
+                    record_cache("transcription", hit=True)
                     return data["text"], data
         except Exception as e:
             print(f"Error reading cached transcription, will re-transcribe: {e}")
 
-    model = load_model()
+    record_cache("transcription", hit=False)
+
+    model = load_model(model_name)
 
     for attempt in range(retry_count):
         try:
@@ -43,15 +251,33 @@ def transcribe_audio(audio_path, video_id, retry_count=3):
                 raise Exception(f"Audio validation failed: {validation_msg}")
 
             print(
-                f"🎙️  Transcribing audio (attempt {attempt + 1}/{retry_count}): {audio_path}"
+                f"🎙️  Transcribing audio with {model_name} (attempt {attempt + 1}/{retry_count}): {audio_path}"
             )
 
+            trimmed = None
+            if VAD_ENABLED:
+                with time_stage("vad"):
+                    trimmed = trim_silence(audio_path)
+
             # Transcribe with error handling
-            result = model.transcribe(
-                str(audio_path),
-                fp16=False,  # Use float32 for better compatibility
-                language=None,  # Auto-detect language
-            )
+            source = trimmed.path if trimmed else audio_path
+            try:
+                with time_stage("transcribe"):
+                    if stream is not None:
+                        stream.reset()
+                        result = _stream_engine(model, source, stream, trimmed)
+                    else:
+                        result = _run_engine(
+                            model,
+                            model_name,
+                            source,
+                            trimmed.speech_seconds if trimmed else duration,
+                        )
+            finally:
+                if trimmed is not None:
+                    trimmed.cleanup()
+            if trimmed is not None and stream is None:
+                result = trimmed.restore(result)
 
             if not result or not result.get("text"):
                 raise Exception("Transcription returned empty result")
@@ -68,9 +294,19 @@ def transcribe_audio(audio_path, video_id, retry_count=3):
 
             transcription_data = {
                 "text": transcribed_text,
-                "segments": result.get("segments", []),
+                "segments": [_public_segment(s) for s in result.get("segments", [])],
                 "language": result.get("language", "unknown"),
+                "model": model_name,
+                "engine": get_engine().name,
+                "version": transcript_version(model_name),
             }
+            if trimmed is not None:
+                transcription_data["vad"] = {
+                    "audio_seconds": round(trimmed.audio_seconds, 2),
+                    "speech_seconds": round(trimmed.speech_seconds, 2),
+                    "regions": [[round(s, 2), round(e, 2)] for s, e in trimmed.regions],
+                }
+            del result
 
             # Cache the transcription
             with open(transcription_path, "w") as f:
@@ -120,6 +356,7 @@ def transcribe_audio(audio_path, video_id, retry_count=3):
                         )
 
                     # Retry with re-encoded audio
+                    record_retry("transcribe", "re-encoded audio to mono")
                     continue
 
                 file_size = audio_path.stat().st_size
@@ -135,6 +372,7 @@ def transcribe_audio(audio_path, video_id, retry_count=3):
         except Exception as e:
             if attempt < retry_count - 1:
                 print(f"Transcription attempt {attempt + 1} failed: {e}. Retrying...")
+                record_retry("transcribe", e)
                 continue
 
             raise Exception(
@@ -0,0 +1,267 @@
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import (
+    MultipartDecoder,
+    Field,
+    File,
+    Data,
+    Epilogue,
+    NEED_DATA,
+)
+from .youtube_service import probe_duration, extract_video_id
+from ..config import UPLOAD_DIR, UPLOAD_IMPORT_ROOT, UPLOAD_CHUNK_SIZE, MAX_UPLOAD_MB
+
+UPLOAD_SCHEME = "upload://"
+MAX_FIELD_BYTES = 64 * 1024
+
+MEDIA_EXTENSIONS = {
+    ".mp3",
+    ".wav",
+    ".m4a",
+    ".aac",
+    ".ogg",
+    ".opus",
+    ".flac",
+    ".webm",
+    ".mp4",
+    ".mkv",
+    ".mov",
+    ".avi",
+}
+
+
+class UploadError(Exception):
+    pass
+
+
+def is_upload_url(url):
+    return bool(url) and url.startswith(UPLOAD_SCHEME)
+
+
+def upload_url(content_hash):
+    return f"{UPLOAD_SCHEME}{content_hash}"
+
+
+def upload_key(url):
+    """Short id used for transcription files, like a YouTube video id."""
+    return f"upload_{url[len(UPLOAD_SCHEME):][:24]}"
+
+
+def media_id(url):
+    """Key for transcription and download files of a YouTube video or upload."""
+    if is_upload_url(url):
+        return upload_key(url)
+    return extract_video_id(url)
+
+
+def _metadata_path(content_hash):
+    return UPLOAD_DIR / f"{content_hash}.json"
+
+
+class _HashingWriter:
+    """Writes chunks to a temporary file in UPLOAD_DIR while hashing them."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.suffix = Path(filename).suffix.lower()
+        self.tmp_path = UPLOAD_DIR / f".incoming-{uuid.uuid4().hex}{self.suffix}"
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self._file = open(self.tmp_path, "wb")
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.size > MAX_UPLOAD_MB * 1024 * 1024:
+            raise RequestEntityTooLarge(f"Upload exceeds {MAX_UPLOAD_MB} MB")
+        self.sha256.update(chunk)
+        self._file.write(chunk)
+
+    def abort(self):
+        self._file.close()
+        if self.tmp_path.exists():
+            self.tmp_path.unlink()
+
+    def finish(self):
+        """Move the file to its content-addressed path and record metadata."""
+        self._file.close()
+        content_hash = self.sha256.hexdigest()
+
+        metadata_path = _metadata_path(content_hash)
+        if metadata_path.exists():
+            with open(metadata_path, "r") as f:
+                metadata = json.load(f)
+            if (UPLOAD_DIR / metadata["audio_file"]).exists():
+                # Same content uploaded before, maybe with another extension:
+                # the hash alone identifies it, so keep the stored file
+                self.tmp_path.unlink()
+                return content_hash, metadata
+
+        final_path = UPLOAD_DIR / f"{content_hash}{self.suffix}"
+        os.replace(self.tmp_path, final_path)
+
+        duration = probe_duration(final_path)
+        metadata = {
+            "title": Path(self.filename).stem or "Untitled",
+            "thumbnail": "",
+            "duration": int(duration) if duration else 0,
+            "description": "",
+            "filename": self.filename,
+            "audio_file": final_path.name,
+            "size": self.size,
+        }
+        with open(metadata_path, "w") as f:
+            json.dump(metadata, f)
+
+        return content_hash, metadata
+
+
+def _check_extension(filename):
+    if Path(filename).suffix.lower() not in MEDIA_EXTENSIONS:
+        raise UploadError(f"Unsupported file type: {filename}")
+
+
+def save_multipart_upload(stream, content_type):
+    """Stream a multipart/form-data body to disk, one chunk at a time.
+
+    Werkzeug's form parser would spool every file before we see it; decoding
+    the body here lets each chunk go straight to its destination file and the
+    hash. Returns (files, fields) where files is a list of
+    (content_hash, metadata) and fields holds the plain form fields.
+    """
+    mimetype, options = parse_options_header(content_type)
+    boundary = options.get("boundary")
+    if mimetype != "multipart/form-data" or not boundary:
+        raise UploadError("Expected a multipart/form-data request")
+
+    # The decoder's own memory limit applies to every received chunk, so plain
+    # fields are capped below instead
+    decoder = MultipartDecoder(boundary.encode())
+    files = []
+    fields = {}
+    writer = None
+    field_name = None
+    field_value = bytearray()
+
+    try:
+        while True:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            decoder.receive_data(chunk or None)
+
+            event = decoder.next_event()
+            while event is not NEED_DATA and not isinstance(event, Epilogue):
+                if isinstance(event, File):
+                    if event.filename:
+                        _check_extension(event.filename)
+                        writer = _HashingWriter(event.filename)
+                    else:
+                        # Browsers send an empty part for an unselected file
+                        # input; its data is dropped below
+                        field_name = None
+                elif isinstance(event, Field):
+                    field_name = event.name
+                    field_value = bytearray()
+                elif isinstance(event, Data):
+                    if writer is not None:
+                        writer.write(event.data)
+                        if not event.more_data:
+                            files.append(writer.finish())
+                            writer = None
+                    elif field_name is not None:
+                        field_value += event.data
+                        if len(field_value) > MAX_FIELD_BYTES:
+                            raise UploadError(f"Form field too large: {field_name}")
+                        if not event.more_data:
+                            fields[field_name] = field_value.decode("utf-8", "replace")
+                            field_name = None
+                event = decoder.next_event()
+
+            if isinstance(event, Epilogue) or not chunk:
+                break
+
+        if writer is not None:
+            raise UploadError("Upload ended before the file was complete")
+    except ValueError as e:
+        # The decoder's error for a malformed or truncated body
+        if writer is not None:
+            writer.abort()
+        raise UploadError(f"Malformed multipart body: {e}")
+    except Exception:
+        if writer is not None:
+            writer.abort()
+        raise
+
+    return files, fields
+
+
+def _copy_into_uploads(path):
+    writer = _HashingWriter(path.name)
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+    except Exception:
+        writer.abort()
+        raise
+    return writer.finish()
+
+
+def _inside_import_root(path):
+    root = Path(UPLOAD_IMPORT_ROOT).resolve()
+    path = path.resolve()
+    return path == root or root in path.parents
+
+
+def resolve_import_directory(directory):
+    """Resolve a directory below UPLOAD_IMPORT_ROOT, refusing anything outside."""
+    target = Path(UPLOAD_IMPORT_ROOT).resolve() / directory
+    if not _inside_import_root(target):
+        raise UploadError("Directory must be inside the import root")
+    target = target.resolve()
+    if not target.is_dir():
+        raise UploadError(f"Directory not found: {directory}")
+    return target
+
+
+def ingest_directory(directory, recursive=False):
+    """Copy every media file of a server-side directory into the upload store.
+
+    Returns a list of (content_hash, metadata); files are read in chunks so
+    their size doesn't matter.
+    """
+    target = resolve_import_directory(directory)
+    pattern = "**/*" if recursive else "*"
+
+    results = []
+    for path in sorted(target.glob(pattern)):
+        if not path.is_file() or path.suffix.lower() not in MEDIA_EXTENSIONS:
+            continue
+        if not _inside_import_root(path):
+            # A symlink below the root can still point outside it
+            print(f"⚠️  Skipping {path}: it links outside the import root")
+            continue
+        print(f"📥 Importing {path}")
+        results.append(_copy_into_uploads(path))
+    return results
+
+
+def resolve_upload(url):
+    """Return (audio_path, metadata) for an uploaded file, like download_audio."""
+    content_hash = url[len(UPLOAD_SCHEME) :]
+    metadata_path = _metadata_path(content_hash)
+    if not metadata_path.exists():
+        raise Exception(f"Uploaded file not found: {content_hash}")
+
+    with open(metadata_path, "r") as f:
+        metadata = json.load(f)
+    audio_path = UPLOAD_DIR / metadata["audio_file"]
+    if not audio_path.exists():
+        raise Exception(f"Uploaded file not found: {audio_path.name}")
+    return audio_path, metadata
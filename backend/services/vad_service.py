@@ -0,0 +1,254 @@
+"""Energy-based voice activity detection to skip silence before transcription.
+
+Speech frames are those louder than the recording's own noise floor by
+VAD_THRESHOLD_DB and with most of their energy in the voice band. Only the
+speech regions are transcribed; segment times are then mapped back onto the
+original timeline.
+"""
+
+import bisect
+import os
+import subprocess
+import tempfile
+import wave
+import numpy as np
+from ..config import VAD_THRESHOLD_DB, VAD_MIN_SILENCE_MS, VAD_PAD_MS
+from ..utils.metrics import record_vad
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+# Frames analysed per FFT call, to bound memory on long recordings
+FFT_BLOCK_FRAMES = 4096
+# Decoded audio is read from ffmpeg in blocks of this many frames (~2 min)
+DECODE_BLOCK_BYTES = FFT_BLOCK_FRAMES * FRAME_SAMPLES * 2
+
+# Voice band and the share of a frame's energy that must fall inside it
+VOICE_BAND_HZ = (250, 4000)
+MIN_VOICE_BAND_RATIO = 0.5
+# Frames quieter than this are silence whatever the noise floor
+ABSOLUTE_FLOOR_DB = -60
+# Speech shorter than this is a click or a cough
+MIN_SPEECH_MS = 250
+# Not worth re-encoding the audio to skip less than this share of it
+MIN_SKIPPED_RATIO = 0.05
+
+
+def _decode_command(audio_path):
+    return [
+        "ffmpeg",
+        "-nostdin",
+        "-v",
+        "error",
+        "-i",
+        str(audio_path),
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-ar",
+        str(SAMPLE_RATE),
+        "-",
+    ]
+
+
+def decode_features(audio_path, pcm_file):
+    """Decode to 16 kHz mono in blocks and compute the frame features.
+
+    The int16 samples are spooled to ``pcm_file`` rather than kept, so memory
+    stays at one block however long the recording is. Returns the per-frame
+    energy and voice-band ratio and the number of samples decoded.
+    """
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(
+            _decode_command(audio_path), stdout=subprocess.PIPE, stderr=errors
+        )
+        energy, band = [], []
+        n_bytes = 0
+        carry = b""
+        try:
+            while True:
+                data = process.stdout.read(DECODE_BLOCK_BYTES)
+                if not data:
+                    break
+                pcm_file.write(data)
+                n_bytes += len(data)
+                # Frames may straddle blocks; analyse whole frames only
+                data = carry + data
+                whole = len(data) - len(data) % (FRAME_SAMPLES * 2)
+                carry = data[whole:]
+                if whole:
+                    samples = np.frombuffer(data[:whole], np.int16)
+                    energy_db, band_ratio = _frame_features(
+                        samples.astype(np.float32) / 32768
+                    )
+                    energy.append(energy_db)
+                    band.append(band_ratio)
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+        if returncode != 0:
+            errors.seek(0)
+            message = errors.read()[-300:]
+            raise Exception(f"ffmpeg could not decode audio: {message!r}")
+
+    empty = np.empty(0, dtype=np.float32)
+    return (
+        np.concatenate(energy) if energy else empty,
+        np.concatenate(band) if band else empty,
+        n_bytes // 2,
+    )
+
+
+def _frame_features(audio):
+    """Per-frame energy in dB and the share of it inside the voice band."""
+    n_frames = len(audio) // FRAME_SAMPLES
+    frames = audio[: n_frames * FRAME_SAMPLES].reshape(n_frames, FRAME_SAMPLES)
+
+    energy_db = 10 * np.log10(np.mean(frames**2, axis=1) + 1e-10)
+
+    freqs = np.fft.rfftfreq(FRAME_SAMPLES, 1 / SAMPLE_RATE)
+    in_band = (freqs >= VOICE_BAND_HZ[0]) & (freqs <= VOICE_BAND_HZ[1])
+    window = np.hanning(FRAME_SAMPLES).astype(np.float32)
+    band_ratio = np.empty(n_frames, dtype=np.float32)
+    for start in range(0, n_frames, FFT_BLOCK_FRAMES):
+        block = frames[start : start + FFT_BLOCK_FRAMES] * window
+        power = np.abs(np.fft.rfft(block)) ** 2
+        band_ratio[start : start + len(block)] = power[:, in_band].sum(axis=1) / (
+            power.sum(axis=1) + 1e-10
+        )
+
+    return energy_db, band_ratio
+
+
+def _runs(mask):
+    """(start, end) frame indices of the runs of True in ``mask``."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def detect_speech(audio):
+    """Speech regions of 16 kHz audio as a list of (start, end) seconds."""
+    if len(audio) < FRAME_SAMPLES:
+        return _speech_regions(None, None, len(audio))
+    energy_db, band_ratio = _frame_features(audio)
+    return _speech_regions(energy_db, band_ratio, len(audio))
+
+
+def _speech_regions(energy_db, band_ratio, n_samples):
+    """Speech regions from the frame features of ``n_samples`` of audio."""
+    if n_samples < FRAME_SAMPLES:
+        return [(0.0, n_samples / SAMPLE_RATE)] if n_samples else []
+
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = max(noise_floor + VAD_THRESHOLD_DB, ABSOLUTE_FLOOR_DB)
+    speech = (energy_db > threshold) & (band_ratio >= MIN_VOICE_BAND_RATIO)
+
+    # Close short pauses, then drop blips too short to be words
+    starts, ends = _runs(~speech)
+    for start, end in zip(starts, ends):
+        inner = start > 0 and end < len(speech)
+        if inner and (end - start) * FRAME_MS < VAD_MIN_SILENCE_MS:
+            speech[start:end] = True
+    starts, ends = _runs(speech)
+    keep = (ends - starts) * FRAME_MS >= MIN_SPEECH_MS
+
+    pad = VAD_PAD_MS / 1000
+    duration = n_samples / SAMPLE_RATE
+    regions = []
+    for start, end in zip(starts[keep], ends[keep]):
+        start = max(0.0, float(start) * FRAME_MS / 1000 - pad)
+        end = min(duration, float(end) * FRAME_MS / 1000 + pad)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+class TrimmedAudio:
+    """Speech regions of a recording written to a temporary WAV file.
+
+    ``pcm_file`` holds the recording as 16 kHz mono int16 samples; regions
+    are copied from it block by block.
+    """
+
+    def __init__(self, pcm_file, n_samples, regions):
+        self.regions = regions
+        self.audio_seconds = n_samples / SAMPLE_RATE
+        self.speech_seconds = sum(end - start for start, end in regions)
+
+        # Where each region starts in the trimmed file and in the original
+        self._trimmed_starts = []
+        self._original_starts = []
+
+        fd, path = tempfile.mkstemp(suffix=".wav", prefix="tubescribe-vad-")
+        os.close(fd)
+        self.path = path
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            position = 0
+            for start, end in regions:
+                self._trimmed_starts.append(position / SAMPLE_RATE)
+                self._original_starts.append(start)
+                first = int(start * SAMPLE_RATE)
+                last = min(int(end * SAMPLE_RATE), n_samples)
+                pcm_file.seek(first * 2)
+                remaining = (last - first) * 2
+                while remaining > 0:
+                    data = pcm_file.read(min(remaining, DECODE_BLOCK_BYTES))
+                    if not data:
+                        break
+                    f.writeframes(data)
+                    remaining -= len(data)
+                position += last - first
+
+    @property
+    def skipped_ratio(self):
+        if not self.audio_seconds:
+            return 0.0
+        return 1 - self.speech_seconds / self.audio_seconds
+
+    def original_time(self, t, end=False):
+        """Map a time in the trimmed audio onto the original recording.
+
+        An end time exactly on a region boundary belongs to the region before.
+        """
+        find = bisect.bisect_left if end else bisect.bisect_right
+        index = max(find(self._trimmed_starts, t) - 1, 0)
+        return round(self._original_starts[index] + t - self._trimmed_starts[index], 2)
+
+    def restore(self, result):
+        """Shift the segment times of a transcription back to the original."""
+        for segment in result.get("segments", []):
+            segment["start"] = self.original_time(segment["start"])
+            segment["end"] = self.original_time(segment["end"], end=True)
+        return result
+
+    def cleanup(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def trim_silence(audio_path):
+    """TrimmedAudio with the speech of ``audio_path``, or None to use it whole.
+
+    The original is kept when there is almost no silence to skip, and also
+    when no speech is found at all, since that is more likely a quiet
+    recording than a silent one.
+    """
+    with tempfile.TemporaryFile(prefix="tubescribe-vad-") as pcm_file:
+        energy_db, band_ratio, n_samples = decode_features(audio_path, pcm_file)
+        regions = _speech_regions(energy_db, band_ratio, n_samples)
+        speech_seconds = sum(end - start for start, end in regions)
+        total_seconds = n_samples / SAMPLE_RATE
+
+        if not regions or speech_seconds >= total_seconds * (1 - MIN_SKIPPED_RATIO):
+            record_vad(total_seconds, total_seconds)
+            return None
+        record_vad(total_seconds, speech_seconds)
+        return TrimmedAudio(pcm_file, n_samples, regions)
@@ -0,0 +1,71 @@
+import threading
+import time
+from datetime import datetime
+from ..config import WHISPER_TIERS
+
+_lock = threading.Lock()
+_thread = None
+_state = {
+    "enabled": False,
+    "status": "not_started",
+    "whisper": "pending",
+    "llm": "pending",
+    "started_at": None,
+    "finished_at": None,
+    "duration_seconds": None,
+}
+
+
+def _warm_whisper():
+    from .transcribe_service import load_model
+
+    for name in WHISPER_TIERS:
+        load_model(name)
+
+
+def _ping_llm():
+    from .llm_gateway import get_llm
+
+    llm = get_llm()
+    # Listing models is cheap and exercises the same connection as a chat call
+    llm.root_client.models.list()
+
+
+def _run():
+    start = time.perf_counter()
+    for component, step in (("whisper", _warm_whisper), ("llm", _ping_llm)):
+        try:
+            step()
+            result = "ready"
+            print(f"✓ Warm-up: {component} ready")
+        except Exception as e:
+            result = f"error: {str(e)[:200]}"
+            print(f"⚠️  Warm-up: {component} failed: {e}")
+        with _lock:
+            _state[component] = result
+
+    with _lock:
+        _state["status"] = "done"
+        _state["finished_at"] = datetime.utcnow().isoformat()
+        _state["duration_seconds"] = round(time.perf_counter() - start, 3)
+
+
+def start_warmup():
+    """Load the Whisper model and ping the LLM in a background thread."""
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return
+        _state["enabled"] = True
+        _state["status"] = "running"
+        _state["started_at"] = datetime.utcnow().isoformat()
+        _thread = threading.Thread(target=_run, name="warmup", daemon=True)
+        _thread.start()
+
+
+def readiness():
+    """Return (ready, state). Without warm-up the app is ready immediately."""
+    with _lock:
+        state = dict(_state)
+    ready = not state["enabled"] or state["status"] == "done"
+    return ready, state
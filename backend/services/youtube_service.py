@@ -1,12 +1,38 @@
-import yt_dlp
 from pathlib import Path
 import hashlib
 import json
 import os
 import subprocess
 from ..config import DOWNLOAD_DIR, TRANSCRIPTIONS_DIR
+from ..utils.metrics import time_stage, record_cache
 
 
+def probe_duration(audio_path):
+    """Return the media duration in seconds, or None if ffprobe can't read it."""
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-show_entries",
+                "format=duration",
+                "-of",
+                "default=noprint_wrappers=1:nokey=1",
+                str(audio_path),
+            ],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        if result.returncode != 0:
+            return None
+        return float(result.stdout.strip())
+    except Exception:
+        return None
+
+
+@time_stage("probe")
 def validate_audio_file(audio_path):
     """Validate that the audio file is not corrupted and can be processed."""
     if not audio_path.exists():
@@ -94,6 +120,7 @@ def validate_audio_file(audio_path):
         return False, f"Audio validation failed: {str(e)}"
 
 
+@time_stage("mono_conversion")
 def convert_to_mono_if_needed(audio_path):
     """Convert stereo audio to mono for better Whisper compatibility."""
     try:
@@ -243,10 +270,15 @@ def download_audio(url, video_id=None):
     metadata_path = DOWNLOAD_DIR / f"{video_id}_metadata.json"
 
     if audio_path.exists() and metadata_path.exists():
+        record_cache("download", hit=True)
         with open(metadata_path, "r") as f:
             metadata = json.load(f)
         return audio_path, metadata
 
+    record_cache("download", hit=False)
+
+    import yt_dlp
+
     ydl_opts = {
         "format": "bestaudio/best",
         "outtmpl": str(DOWNLOAD_DIR / f"{video_id}.%(ext)s"),
@@ -264,7 +296,7 @@ def download_audio(url, video_id=None):
         "keepvideo": False,
     }
 
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+    with time_stage("download"), yt_dlp.YoutubeDL(ydl_opts) as ydl:
         info = ydl.extract_info(url, download=True)
 
     metadata = {
@@ -288,15 +320,19 @@ def get_video_metadata(url):
 
     metadata_path = DOWNLOAD_DIR / f"{video_id}_metadata.json"
     if metadata_path.exists():
+        record_cache("metadata", hit=True)
         with open(metadata_path, "r") as f:
             return json.load(f)
 
+    record_cache("metadata", hit=False)
     try:
+        import yt_dlp
+
         ydl_opts = {
             "quiet": True,
             "no_warnings": True,
         }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with time_stage("metadata"), yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info = ydl.extract_info(url, download=False)
 
             metadata = {
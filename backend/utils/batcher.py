@@ -0,0 +1,74 @@
+import threading
+import time
+
+
+class Batcher:
+    """Groups small requests submitted from many threads into batches.
+
+    ``run_batch`` receives a list of items and must return a list of results
+    in the same order. A batch is sent when ``max_size`` items are waiting or
+    ``max_wait`` seconds after the first one arrived.
+    """
+
+    def __init__(self, run_batch, max_size, max_wait, name="batcher"):
+        self.run_batch = run_batch
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.name = name
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def submit(self, item):
+        return self.submit_many([item])[0]
+
+    def submit_many(self, items):
+        """Queue several items at once and wait for all of their results."""
+        entries = [
+            {"item": item, "done": threading.Event(), "result": None, "error": None}
+            for item in items
+        ]
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._collect, name=self.name, daemon=True
+                )
+                self._thread.start()
+            self._pending.extend(entries)
+            self._cond.notify()
+
+        for entry in entries:
+            entry["done"].wait()
+            if entry["error"] is not None:
+                raise entry["error"]
+        return [entry["result"] for entry in entries]
+
+    def _collect(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.max_wait
+                while len(self._pending) < self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[: self.max_size]
+                del self._pending[: self.max_size]
+
+            # Batches run concurrently; callers bound them (e.g. LLM slots or
+            # a lock around the model)
+            threading.Thread(target=self._run, args=(batch,), daemon=True).start()
+
+    def _run(self, batch):
+        try:
+            results = self.run_batch([entry["item"] for entry in batch])
+            for entry, result in zip(batch, results):
+                entry["result"] = result
+        except Exception as e:
+            for entry in batch:
+                entry["error"] = e
+        finally:
+            for entry in batch:
+                entry["done"].set()
@@ -0,0 +1,69 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import current_app, request, Response
+from sqlalchemy import func
+from ..models.database import db, Video, Category
+from . import metrics
+
+# Serialized responses kept per endpoint and query string
+PAYLOAD_CACHE_SIZE = 64
+
+_payloads = OrderedDict()
+_lock = threading.Lock()
+
+
+def library_version():
+    """Cheap token that changes whenever a video or category changes.
+
+    Row counts catch deletes and max timestamps catch inserts and updates;
+    both come from one aggregate query per table. Being read from the
+    database, it also sees writes made by worker processes.
+    """
+    video_count, video_updated = db.session.query(
+        func.count(Video.id), func.max(Video.updated_at)
+    ).one()
+    category_count, category_created = db.session.query(
+        func.count(Category.id), func.max(Category.created_at)
+    ).one()
+    return f"{video_count}:{video_updated}:{category_count}:{category_created}"
+
+
+def cached_json(build):
+    """Serve ``build()`` as JSON with an ETag and a server-side cache.
+
+    Clients presenting the current ETag get 304 without the payload being
+    built; otherwise the serialized payload is reused until the library
+    changes. There is no Last-Modified: the newest timestamp can move
+    backwards on a delete and misses edits within the same second, so a
+    date alone cannot tell a client its copy is current.
+    """
+    token = library_version()
+    key = f"{request.path}?{request.query_string.decode()}"
+    etag = hashlib.sha1(f"{key}|{token}".encode()).hexdigest()[:20]
+
+    if request.if_none_match.contains_weak(etag):
+        metrics.record_cache("http", hit=True)
+        response = Response(status=304)
+    else:
+        with _lock:
+            cached = _payloads.get(key)
+            if cached is not None and cached[0] == etag:
+                _payloads.move_to_end(key)
+        if cached is not None and cached[0] == etag:
+            metrics.record_cache("http_payload", hit=True)
+            body = cached[1]
+        else:
+            metrics.record_cache("http_payload", hit=False)
+            body = current_app.json.dumps(build())
+            with _lock:
+                _payloads[key] = (etag, body)
+                _payloads.move_to_end(key)
+                while len(_payloads) > PAYLOAD_CACHE_SIZE:
+                    _payloads.popitem(last=False)
+        response = Response(body, mimetype="application/json")
+
+    response.set_etag(etag)
+    # Revalidate every time instead of trusting a heuristic freshness
+    response.headers["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,174 @@
+import itertools
+import threading
+import time
+import traceback
+from datetime import datetime
+
+POLICIES = ("fifo", "priority", "sjf")
+
+# Used to estimate processing time before any job has finished
+DEFAULT_SECONDS_PER_AUDIO_SECOND = 0.3
+DEFAULT_JOB_OVERHEAD_SECONDS = 10.0
+# Keeps durations meaningful for ordering even when recent jobs were cached
+MIN_SECONDS_PER_AUDIO_SECOND = 0.01
+# Assumed duration for videos whose metadata could not be fetched
+UNKNOWN_DURATION_SECONDS = 600
+
+
+class Job:
+    def __init__(self, video_id, args=(), priority=0, duration=None):
+        self.video_id = video_id
+        self.args = args
+        self.priority = priority or 0
+        self.duration = duration
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.seq = None
+
+
+class JobScheduler:
+    """Bounded worker pool that picks the next job by policy.
+
+    ``fifo`` runs jobs in submission order, ``priority`` runs higher
+    ``priority`` first, and ``sjf`` (shortest job first) also orders jobs of
+    equal priority by estimated processing time. Waiting jobs age: every
+    second spent in the queue removes ``aging_rate`` seconds from their
+    estimate, so long videos are not starved by a stream of short ones.
+    """
+
+    def __init__(self, target, workers=2, policy="sjf", aging_rate=1.0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scheduler policy: {policy}")
+        self.target = target
+        self.workers = max(1, workers)
+        self.policy = policy
+        self.aging_rate = aging_rate
+
+        self._queue = []
+        self._running = {}
+        self._threads = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._seconds_per_audio_second = DEFAULT_SECONDS_PER_AUDIO_SECOND
+
+    def estimate_seconds(self, job):
+        duration = job.duration or UNKNOWN_DURATION_SECONDS
+        return DEFAULT_JOB_OVERHEAD_SECONDS + duration * self._seconds_per_audio_second
+
+    def _sort_key(self, job, now):
+        if self.policy == "fifo":
+            return (job.seq,)
+        if self.policy == "priority":
+            return (-job.priority, job.seq)
+        aged = self.estimate_seconds(job) - (now - job.submitted_at) * self.aging_rate
+        return (-job.priority, aged, job.seq)
+
+    def _ordered(self, now):
+        return sorted(self._queue, key=lambda job: self._sort_key(job, now))
+
+    def submit(self, job):
+        with self._cond:
+            job.seq = next(self._seq)
+            self._queue.append(job)
+            self._ensure_workers()
+            self._cond.notify()
+        return job
+
+    def queued_count(self):
+        with self._cond:
+            return len(self._queue)
+
+    def _ensure_workers(self):
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"job-worker-{len(self._threads)}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_job(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            job = self._ordered(time.time())[0]
+            self._queue.remove(job)
+            job.started_at = time.time()
+            self._running[job.video_id] = job
+            return job
+
+    def _finish(self, job):
+        elapsed = time.time() - job.started_at
+        with self._cond:
+            self._running.pop(job.video_id, None)
+            if job.duration:
+                observed = max(
+                    (elapsed - DEFAULT_JOB_OVERHEAD_SECONDS) / job.duration,
+                    MIN_SECONDS_PER_AUDIO_SECOND,
+                )
+                # Exponentially weighted so the estimate follows current load
+                self._seconds_per_audio_second = (
+                    0.8 * self._seconds_per_audio_second + 0.2 * observed
+                )
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            try:
+                self.target(job.video_id, *job.args)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                self._finish(job)
+
+    def snapshot(self):
+        """Queue positions and estimated start times.
+
+        Estimates replay the current order over the worker pool, using the
+        observed seconds of processing per second of audio.
+        """
+        now = time.time()
+        with self._cond:
+            running = list(self._running.values())
+            queued = self._ordered(now)
+
+        free_at = sorted(
+            max(now, job.started_at + self.estimate_seconds(job)) for job in running
+        )
+        free_at += [now] * (self.workers - len(free_at))
+        free_at.sort()
+
+        entries = []
+        for position, job in enumerate(queued, start=1):
+            start = free_at.pop(0)
+            entries.append(
+                {
+                    "video_id": job.video_id,
+                    "position": position,
+                    "priority": job.priority,
+                    "duration": job.duration,
+                    "waiting_seconds": round(now - job.submitted_at, 1),
+                    "estimated_start_in_seconds": round(start - now, 1),
+                    "estimated_start_at": datetime.utcfromtimestamp(start).isoformat(),
+                }
+            )
+            free_at.append(start + self.estimate_seconds(job))
+            free_at.sort()
+
+        return {
+            "policy": self.policy,
+            "workers": self.workers,
+            "seconds_per_audio_second": round(self._seconds_per_audio_second, 4),
+            "running": [
+                {
+                    "video_id": job.video_id,
+                    "priority": job.priority,
+                    "duration": job.duration,
+                    "running_seconds": round(now - job.started_at, 1),
+                }
+                for job in running
+            ],
+            "queued": entries,
+        }
@@ -0,0 +1,87 @@
+import os
+import resource
+import sys
+import threading
+import time
+from . import metrics
+from ..config import MEMORY_BUDGET_MB, MEMORY_SAMPLE_SECONDS
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_mb():
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 2**20
+    except (OSError, ValueError, IndexError):
+        # No procfs (macOS): fall back to the peak, the closest portable value
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+class JobMemory:
+    def __init__(self, key):
+        self.key = key
+        self.start_mb = rss_mb()
+        self.peak_mb = self.start_mb
+
+
+class MemoryMonitor:
+    """Samples RSS in the background and keeps the peak of each running job.
+
+    Peaks are per process: with several jobs running at once each one is
+    charged the process peak reached while it ran.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def sample(self):
+        current = rss_mb()
+        metrics.PROCESS_RSS_BYTES.set(current * 2**20)
+        with self._lock:
+            for job in self._jobs.values():
+                job.peak_mb = max(job.peak_mb, current)
+        return current
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.sample()
+
+    def track(self, key):
+        job = JobMemory(key)
+        with self._lock:
+            self._jobs[id(job)] = job
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="memory-monitor", daemon=True
+                )
+                self._thread.start()
+        return job
+
+    def finish(self, job):
+        """Stop tracking ``job`` and return its peak RSS in MB (idempotent)."""
+        self.sample()
+        with self._lock:
+            self._jobs.pop(id(job), None)
+        return round(job.peak_mb, 1)
+
+
+monitor = MemoryMonitor(MEMORY_SAMPLE_SECONDS)
+
+
+def over_budget():
+    """True when this process is above MEMORY_BUDGET_MB (0 = no budget)."""
+    return MEMORY_BUDGET_MB > 0 and monitor.sample() > MEMORY_BUDGET_MB
+
+
+def status():
+    return {
+        "rss_mb": round(monitor.sample(), 1),
+        "budget_mb": MEMORY_BUDGET_MB or None,
+    }
@@ -0,0 +1,328 @@
+import threading
+import time
+from contextlib import contextmanager
+from .profiler import active_profile
+
+DEFAULT_BUCKETS = (
+    0.01,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+    600.0,
+    1800.0,
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {
+                    "buckets": [0] * len(self.buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def get(self, **labels):
+        state = self._values.get(self._key(labels))
+        if state is None:
+            return {"sum": 0.0, "count": 0}
+        return {"sum": state["sum"], "count": state["count"]}
+
+    def samples(self):
+        with self._lock:
+            items = sorted(
+                (key, dict(state, buckets=list(state["buckets"])))
+                for key, state in self._values.items()
+            )
+        for key, state in items:
+            for bound, count in zip(self.buckets, state["buckets"]):
+                labels = _format_labels(
+                    self.labelnames, key, ("le", _format_value(bound))
+                )
+                yield f"{self.name}_bucket", labels, count
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum", labels, state["sum"]
+            yield f"{self.name}_count", labels, state["count"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "tubescribe_stage_duration_seconds",
+        "Time spent in each pipeline stage.",
+        ["stage"],
+    )
+)
+STAGE_FAILURES = REGISTRY.register(
+    Counter(
+        "tubescribe_stage_failures_total",
+        "Pipeline stage executions that raised an error.",
+        ["stage"],
+    )
+)
+QUEUE_WAIT_SECONDS = REGISTRY.register(
+    Histogram(
+        "tubescribe_queue_wait_seconds",
+        "Time between job submission and the start of processing.",
+    )
+)
+RETRIES = REGISTRY.register(
+    Counter(
+        "tubescribe_retries_total",
+        "Retries performed by pipeline stages.",
+        ["stage"],
+    )
+)
+CACHE_REQUESTS = REGISTRY.register(
+    Counter(
+        "tubescribe_cache_requests_total",
+        "Lookups of on-disk caches by result (hit or miss).",
+        ["cache", "result"],
+    )
+)
+LLM_REQUESTS = REGISTRY.register(
+    Counter(
+        "tubescribe_llm_requests_total",
+        "LLM requests by task and outcome.",
+        ["task", "outcome"],
+    )
+)
+LLM_TOKENS = REGISTRY.register(
+    Counter(
+        "tubescribe_llm_tokens_total",
+        "LLM tokens consumed by task and kind (prompt or completion).",
+        ["task", "kind"],
+    )
+)
+ASR_BATCH_SIZE = REGISTRY.register(
+    Histogram(
+        "tubescribe_asr_batch_size",
+        "Audio windows decoded together in one batched Whisper pass.",
+        buckets=(1, 2, 4, 8, 16, 32),
+    )
+)
+PROCESS_RSS_BYTES = REGISTRY.register(
+    Gauge(
+        "tubescribe_process_resident_memory_bytes",
+        "Resident memory of this process, sampled while jobs run.",
+    )
+)
+ADMISSION_REJECTIONS = REGISTRY.register(
+    Counter(
+        "tubescribe_admission_rejections_total",
+        "Job submissions refused because the server was above its memory budget.",
+    )
+)
+AUDIO_SECONDS = REGISTRY.register(
+    Counter(
+        "tubescribe_asr_audio_seconds_total",
+        "Seconds of audio checked by VAD, by whether they were transcribed or skipped.",
+        ["kind"],
+    )
+)
+VAD_SKIPPED_RATIO = REGISTRY.register(
+    Histogram(
+        "tubescribe_vad_skipped_ratio",
+        "Share of each recording skipped as silence by VAD.",
+        buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9),
+    )
+)
+JOBS = REGISTRY.register(
+    Counter(
+        "tubescribe_jobs_total",
+        "Finished video processing jobs by final status.",
+        ["status"],
+    )
+)
+JOBS_IN_PROGRESS = REGISTRY.register(
+    Gauge(
+        "tubescribe_jobs_in_progress",
+        "Video processing jobs currently running.",
+    )
+)
+
+
+@contextmanager
+def time_stage(stage):
+    """Record the duration of a pipeline stage. Usable as a decorator."""
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = str(e)[:200]
+        STAGE_FAILURES.inc(stage=stage)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_SECONDS.observe(duration, stage=stage)
+        profile = active_profile()
+        if profile is not None:
+            profile.record_stage(stage, start, duration, error)
+
+
+def record_retry(stage, reason=""):
+    RETRIES.inc(stage=stage)
+    profile = active_profile()
+    if profile is not None:
+        profile.record_event("retry", stage=stage, reason=str(reason)[:200])
+
+
+def record_vad(audio_seconds, speech_seconds):
+    skipped = max(audio_seconds - speech_seconds, 0)
+    AUDIO_SECONDS.inc(speech_seconds, kind="transcribed")
+    AUDIO_SECONDS.inc(skipped, kind="skipped")
+    ratio = skipped / audio_seconds if audio_seconds else 0.0
+    VAD_SKIPPED_RATIO.observe(ratio)
+    profile = active_profile()
+    if profile is not None:
+        profile.record_event(
+            "vad",
+            audio_seconds=round(audio_seconds, 2),
+            speech_seconds=round(speech_seconds, 2),
+            skipped_ratio=round(ratio, 3),
+        )
+
+
+def record_cache(cache, hit):
+    result = "hit" if hit else "miss"
+    CACHE_REQUESTS.inc(cache=cache, result=result)
+    profile = active_profile()
+    if profile is not None:
+        profile.record_event("cache", cache=cache, result=result)
+
+
+def record_llm_usage(task, response):
+    """Count prompt/completion tokens reported on a LangChain response."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    if not usage:
+        token_usage = (getattr(response, "response_metadata", None) or {}).get(
+            "token_usage"
+        ) or {}
+        usage = {
+            "input_tokens": token_usage.get("prompt_tokens", 0),
+            "output_tokens": token_usage.get("completion_tokens", 0),
+        }
+    LLM_TOKENS.inc(usage.get("input_tokens", 0) or 0, task=task, kind="prompt")
+    LLM_TOKENS.inc(usage.get("output_tokens", 0) or 0, task=task, kind="completion")
+
+
+def render():
+    return REGISTRY.render()
@@ -0,0 +1,127 @@
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from datetime import datetime
+from ..config import PROFILES_DIR
+
+_local = threading.local()
+
+
+def profile_paths(video_id):
+    return (
+        PROFILES_DIR / f"{video_id}_trace.json",
+        PROFILES_DIR / f"{video_id}.prof",
+    )
+
+
+def active_profile():
+    """Return the JobProfile recording on the current thread, if any."""
+    return getattr(_local, "profile", None)
+
+
+class JobProfile:
+    """cProfile capture plus a stage-level trace for a single job.
+
+    The profile is bound to the thread that calls ``start``; stage timings
+    recorded through ``metrics.time_stage`` on that thread are added to the
+    trace automatically.
+    """
+
+    def __init__(self, video_id):
+        self.video_id = video_id
+        self.stages = []
+        self.events = []
+        self.profiler = None
+        self.profiler_status = "cProfile"
+        self.started_at = None
+        self._start = None
+        self._wall = None
+
+    def start(self):
+        self.started_at = datetime.utcnow()
+        self._start = time.perf_counter()
+        _local.profile = self
+
+        self.profiler = cProfile.Profile()
+        try:
+            self.profiler.enable()
+        except ValueError as e:
+            # Only one cProfile can be active at a time on Python 3.12+
+            self.profiler = None
+            self.profiler_status = f"unavailable: {e}"
+        return self
+
+    def record_stage(self, stage, started, duration, error=None):
+        self.stages.append(
+            {
+                "stage": stage,
+                "offset": round(started - self._start, 6),
+                "duration": round(duration, 6),
+                "error": error,
+            }
+        )
+
+    def record_event(self, name, **details):
+        self.events.append(
+            {
+                "event": name,
+                "offset": round(time.perf_counter() - self._start, 6),
+                **details,
+            }
+        )
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        self._wall = time.perf_counter() - self._start
+        if active_profile() is self:
+            _local.profile = None
+
+    def _top_functions(self, limit=30):
+        if self.profiler is None:
+            return []
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        stats.sort_stats("cumulative")
+        rows = []
+        for func in stats.fcn_list[:limit]:
+            calls, primitive_calls, tottime, cumtime, _ = stats.stats[func]
+            filename, line, name = func
+            rows.append(
+                {
+                    "function": f"{filename}:{line}({name})",
+                    "calls": calls,
+                    "tottime": round(tottime, 6),
+                    "cumtime": round(cumtime, 6),
+                }
+            )
+        return rows
+
+    def save(self):
+        trace_path, pstats_path = profile_paths(self.video_id)
+
+        trace = {
+            "video_id": self.video_id,
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": round(self._wall or 0.0, 6),
+            "profiler": self.profiler_status,
+            "stages": self.stages,
+            "events": self.events,
+            "top_functions": self._top_functions(),
+        }
+        with open(trace_path, "w") as f:
+            json.dump(trace, f, indent=2)
+
+        if self.profiler is not None:
+            self.profiler.dump_stats(str(pstats_path))
+
+        print(f"Profile saved for video {self.video_id}: {trace_path}")
+        return trace_path
+
+
+def delete_profile(video_id):
+    for path in profile_paths(video_id):
+        if path.exists():
+            path.unlink()
@@ -1,7 +1,11 @@
+import time
+
+
 class ProgressTracker:
     def __init__(self, video_id, socketio):
         self.video_id = video_id
         self.socketio = socketio
+        self.created_at = time.time()
         self.progress = {
             "video_id": video_id,
             "status": "queued",
@@ -19,6 +23,41 @@ class ProgressTracker:
         except Exception as e:
             print(f"Error emitting WebSocket update: {e}")
 
+    @property
+    def room(self):
+        return f"video_{self.video_id}"
+
+    def emit_segments(self, segments, reset=False):
+        """Send new transcript segments to clients that joined the video.
+
+        ``reset`` tells them to drop the segments received so far, because
+        transcription started over.
+        """
+        try:
+            self.socketio.emit(
+                "transcript_segments",
+                {"video_id": self.video_id, "segments": segments, "reset": reset},
+                to=self.room,
+            )
+        except Exception as e:
+            print(f"Error emitting WebSocket update: {e}")
+
+    def emit_summary(self, summary, part=None, final=False):
+        """Send a part summary, or the final one, to clients that joined the video."""
+        try:
+            self.socketio.emit(
+                "summary_progress",
+                {
+                    "video_id": self.video_id,
+                    "summary": summary,
+                    "part": part,
+                    "final": final,
+                },
+                to=self.room,
+            )
+        except Exception as e:
+            print(f"Error emitting WebSocket update: {e}")
+
     def set_status(self, status, step=None, progress=None):
         self.progress["status"] = status
         if step:
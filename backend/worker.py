@@ -0,0 +1,198 @@
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from . import create_app, socketio
+from .models.database import db, Video
+from .services import job_queue, streaming_service
+from .utils import memory
+from .utils.progress_tracker import ProgressTracker
+from .config import (
+    JOB_QUEUE_BACKEND,
+    MAX_CONCURRENT_JOBS,
+    MEMORY_BUDGET_MB,
+    WORKER_HEARTBEAT_SECONDS,
+    WORKER_POLL_SECONDS,
+    WORKER_MAX_JOBS,
+    WORKER_RECYCLE_RSS_MB,
+)
+
+# Longest wait for background work before a recycling worker restarts anyway
+RECYCLE_DRAIN_SECONDS = 300
+
+
+class Worker:
+    """Claims jobs from the shared job_queue table and runs the pipeline.
+
+    Up to ``concurrency`` jobs run at once, each on its own thread; a
+    heartbeat thread keeps their leases alive while they run. Above
+    MEMORY_BUDGET_MB no new jobs are claimed, and after WORKER_MAX_JOBS jobs
+    or above WORKER_RECYCLE_RSS_MB the worker finishes its running jobs and
+    restarts itself with a fresh process.
+    """
+
+    def __init__(self, app, concurrency, worker_id=None):
+        self.app = app
+        self.concurrency = max(1, concurrency)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self._running = {}
+        self._lock = threading.Lock()
+        self._free = threading.Semaphore(self.concurrency)
+        self._completed = 0
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(WORKER_HEARTBEAT_SECONDS)
+            with self._lock:
+                job_ids = list(self._running)
+            if not job_ids:
+                continue
+            with self.app.app_context():
+                try:
+                    renewed = job_queue.heartbeat(job_ids, self.worker_id)
+                    if renewed < len(job_ids):
+                        print(
+                            f"⚠️  Worker {self.worker_id} lost {len(job_ids) - renewed} lease(s)"
+                        )
+                except Exception:
+                    traceback.print_exc()
+                finally:
+                    db.session.remove()
+
+    def _run_job(self, job_id, video_id, video_url, options, queued_for):
+        from .api.routes import process_video, processing_tasks
+
+        try:
+            with self.app.app_context():
+                tracker = ProgressTracker(video_id, socketio)
+                # Queue wait is measured from when the API accepted the job
+                tracker.created_at = time.time() - queued_for
+                processing_tasks[video_id] = tracker
+
+                process_video(
+                    video_id,
+                    video_url,
+                    options.get("profile", False),
+                    options.get("quality"),
+                )
+                # process_video tracks the job's memory and stores its peak
+                video = Video.query.get(video_id)
+                peak_rss_mb = video.peak_rss_mb if video else None
+                job_queue.complete(job_id, self.worker_id, peak_rss_mb)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+                self._completed += 1
+            self._free.release()
+
+    def _recycle_reason(self):
+        if WORKER_MAX_JOBS and self._completed >= WORKER_MAX_JOBS:
+            return f"{self._completed} jobs done"
+        # Only after a job, so a model that alone exceeds it can't loop
+        if WORKER_RECYCLE_RSS_MB and self._completed:
+            rss = memory.rss_mb()
+            if rss > WORKER_RECYCLE_RSS_MB:
+                return f"RSS {rss:.0f} MB above {WORKER_RECYCLE_RSS_MB} MB"
+        return None
+
+    def _recycle(self, reason):
+        """Let running jobs finish, then replace this process with a new one.
+
+        No jobs are claimed meanwhile. exec stops every thread where it is, so
+        background work that outlives a job (part summaries of a streamed
+        transcription) is waited for too.
+        """
+        with self._lock:
+            running = len(self._running)
+        print(
+            f"♻️  Worker {self.worker_id} recycling ({reason}), "
+            f"waiting for {running} running job(s)"
+        )
+        for _ in range(self.concurrency):
+            self._free.acquire()
+        left = streaming_service.drain(RECYCLE_DRAIN_SECONDS)
+        if left:
+            print(f"⚠️  Restarting with {left} background summary task(s) unfinished")
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # orig_argv keeps "-m backend.worker" as well as "worker.py"
+        os.execv(sys.executable, sys.orig_argv)
+
+    def run(self):
+        print(f"👷 Worker {self.worker_id} started with {self.concurrency} slot(s)")
+        threading.Thread(target=self._heartbeat, name="heartbeat", daemon=True).start()
+
+        paused = False
+        while True:
+            reason = self._recycle_reason()
+            if reason:
+                self._recycle(reason)
+
+            self._free.acquire()
+            if memory.over_budget():
+                if not paused:
+                    print(
+                        f"⏸️  Worker {self.worker_id} above its {MEMORY_BUDGET_MB} MB "
+                        "memory budget, not claiming jobs"
+                    )
+                    paused = True
+                self._free.release()
+                time.sleep(WORKER_POLL_SECONDS)
+                continue
+            paused = False
+
+            job = None
+            with self.app.app_context():
+                try:
+                    job = job_queue.claim(self.worker_id)
+                    if job is not None:
+                        args = (
+                            job.id,
+                            job.video_id,
+                            job.video_url,
+                            job_queue.job_options(job),
+                            (datetime.utcnow() - job.created_at).total_seconds(),
+                        )
+                except Exception:
+                    traceback.print_exc()
+                finally:
+                    db.session.remove()
+
+            if job is None:
+                self._free.release()
+                time.sleep(WORKER_POLL_SECONDS)
+                continue
+
+            print(f"📦 Worker {self.worker_id} claimed job {args[0]} (video {args[1]})")
+            with self._lock:
+                self._running[args[0]] = args[1]
+            threading.Thread(
+                target=self._run_job, args=args, name=f"job-{args[0]}", daemon=True
+            ).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a TubeScribe worker process")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=MAX_CONCURRENT_JOBS,
+        help="jobs processed at once (default: MAX_CONCURRENT_JOBS)",
+    )
+    parser.add_argument("--worker-id", help="name shown in /api/queue")
+    args = parser.parse_args()
+
+    if JOB_QUEUE_BACKEND != "database":
+        print(
+            "⚠️  JOB_QUEUE_BACKEND is not 'database': the API runs jobs itself and "
+            "won't hand any to this worker"
+        )
+
+    app = create_app(role="worker")
+    Worker(app, args.concurrency, args.worker_id).run()
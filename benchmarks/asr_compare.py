@@ -0,0 +1,205 @@
+"""Speed and accuracy comparison of the ASR engines.
+
+Transcribes the same audio files with each engine in
+``backend/services/asr_engines.py`` and reports load time, real-time factor
+(processing seconds per audio second) and word error rate. WER is measured
+against a reference transcript next to the audio (``clip.wav`` ->
+``clip.txt``); clips without one only contribute timings, and an engine with
+no referenced clips reports no WER.
+
+Usage::
+
+    python -m benchmarks.asr_compare --model base
+    python -m benchmarks.asr_compare --audio path/to/clips --model base
+    python -m benchmarks.asr_compare --engines whisper,faster-whisper --output asr.json
+
+``benchmarks/fixtures`` holds ``speech.txt``, the reference for a short
+spoken clip. Without ``--audio`` the clip is rendered to ``speech.wav`` with
+espeak-ng, espeak, flite or macOS ``say`` and scored against it; with none of
+those installed a synthetic tone is used and only timings are reported.
+Engines whose library is not installed are reported as skipped.
+"""
+
+import argparse
+import json
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".webm"}
+
+
+def words(text):
+    return re.findall(r"[\w']+", text.lower())
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref, hyp = words(reference), words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, start=1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def audio_duration(path):
+    from backend.services.youtube_service import probe_duration
+
+    duration = probe_duration(path)
+    if duration is None:
+        raise SystemExit(
+            f"Could not read the duration of {path} (is ffprobe installed?)"
+        )
+    return duration
+
+
+def collect_audio(paths):
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files += sorted(
+                p for p in path.iterdir() if p.suffix.lower() in AUDIO_EXTENSIONS
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def run_engine(engine_name, model_name, files):
+    from backend.services.asr_engines import get_engine
+
+    engine = get_engine(engine_name)
+    try:
+        start = time.perf_counter()
+        model = engine.load(model_name)
+        load_seconds = time.perf_counter() - start
+    except ImportError as e:
+        return {"engine": engine_name, "skipped": f"not installed: {e}"}
+
+    clips = []
+    for path in files:
+        start = time.perf_counter()
+        result = engine.transcribe(model, path)
+        elapsed = time.perf_counter() - start
+        clips.append(
+            {"file": path.name, "seconds": elapsed, "text": result.get("text", "")}
+        )
+
+    return {"engine": engine_name, "load_seconds": load_seconds, "clips": clips}
+
+
+def score(results, files):
+    durations = {path.name: audio_duration(path) for path in files}
+    references = {}
+    for path in files:
+        reference = path.with_suffix(".txt")
+        if reference.exists():
+            references[path.name] = reference.read_text()
+
+    for result in results:
+        if "clips" not in result:
+            continue
+        total_audio = sum(durations.values())
+        total_seconds = sum(clip["seconds"] for clip in result["clips"])
+        wers = []
+        for clip in result["clips"]:
+            # Agreement with another engine says nothing about accuracy
+            if clip["file"] not in references:
+                clip["wer"] = None
+                continue
+            clip["wer"] = word_error_rate(references[clip["file"]], clip["text"])
+            wers.append(clip["wer"])
+        result["audio_seconds"] = total_audio
+        result["transcribe_seconds"] = total_seconds
+        result["realtime_factor"] = total_seconds / total_audio if total_audio else None
+        result["wer"] = sum(wers) / len(wers) if wers else None
+        result["wer_clips"] = len(wers)
+
+
+def print_report(results):
+    print()
+    print(f"{'engine':<16}{'load s':>9}{'RTF':>9}{'speedup':>9}{'WER':>8}")
+    base_rtf = next(
+        (r["realtime_factor"] for r in results if r.get("realtime_factor")), None
+    )
+    for result in results:
+        if "skipped" in result:
+            print(f"{result['engine']:<16}  skipped ({result['skipped']})")
+            continue
+        rtf = result["realtime_factor"]
+        speedup = base_rtf / rtf if base_rtf and rtf else None
+        wer = result["wer"]
+        print(
+            f"{result['engine']:<16}{result['load_seconds']:>9.2f}{rtf:>9.3f}"
+            f"{(f'{speedup:.2f}x' if speedup else '-'):>9}"
+            f"{(f'{wer:.3f}' if wer is not None else '-'):>8}"
+        )
+    if not any(r.get("wer_clips") for r in results):
+        print(
+            "\nNo reference transcripts (clip.txt next to clip.wav): WER not measured"
+        )
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--engines",
+        default="whisper,whisper-int8,faster-whisper",
+        help="comma-separated engines; the first is the baseline",
+    )
+    parser.add_argument("--model", default="base", help="Whisper model name")
+    parser.add_argument("--audio", nargs="*", help="audio files or directories")
+    parser.add_argument("--output", help="write the full results as JSON")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT_DIR))
+
+    if args.audio:
+        files = collect_audio(args.audio)
+    else:
+        from benchmarks.fakes import make_fixture_audio, make_speech_fixture
+
+        speech = make_speech_fixture()
+        if speech is not None:
+            files = [speech]
+            print(f"No --audio given: using {speech.relative_to(ROOT_DIR)}")
+        else:
+            fixture = Path(tempfile.gettempdir()) / "tubescribe_asr_fixture.wav"
+            files = [make_fixture_audio(fixture, 30)]
+            print(
+                "No --audio given and no text-to-speech tool to render "
+                "benchmarks/fixtures/speech.txt (install espeak-ng): "
+                "using a synthetic fixture (timings only)"
+            )
+
+    results = []
+    for engine in args.engines.split(","):
+        print(f"Running {engine} ({args.model}) on {len(files)} file(s)...")
+        results.append(run_engine(engine.strip(), args.model, files))
+
+    score(results, files)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""Local stand-ins for YouTube, Whisper and Ollama used by the benchmarks.
+
+Everything here runs offline: audio fixtures are synthesised WAV files, the
+yt-dlp extractor copies those fixtures into the download directory, the
+Whisper model sleeps proportionally to the audio duration, and the Ollama
+server is a tiny OpenAI-compatible HTTP server with configurable latency.
+"""
+
+import json
+import math
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import threading
+import time
+import types
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SAMPLE_RATE = 16000
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+def make_fixture_audio(path, seconds, sample_rate=SAMPLE_RATE):
+    """Write a mono 16-bit WAV with a speech-like amplitude envelope."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        return path
+
+    n_samples = int(seconds * sample_rate)
+    frames = bytearray()
+    for i in range(n_samples):
+        t = i / sample_rate
+        # 4 Hz syllable envelope with a pause every few seconds
+        envelope = max(0.0, math.sin(2 * math.pi * 4 * t))
+        if int(t) % 5 == 4:
+            envelope = 0.0
+        sample = envelope * 0.3 * math.sin(2 * math.pi * 220 * t)
+        frames += struct.pack("<h", int(sample * 32767))
+
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(bytes(frames))
+    return path
+
+
+# Text-to-speech commands that can render the speech fixture, tried in order
+TTS_COMMANDS = {
+    "espeak-ng": lambda text, out: ["espeak-ng", "-s", "150", "-f", text, "-w", out],
+    "espeak": lambda text, out: ["espeak", "-s", "150", "-f", text, "-w", out],
+    "flite": lambda text, out: ["flite", "-f", text, "-o", out],
+    "say": lambda text, out: [
+        "say",
+        "--data-format=LEI16@16000",
+        "-f",
+        text,
+        "-o",
+        out,
+    ],
+}
+
+
+def make_speech_fixture(directory=FIXTURES_DIR):
+    """Render ``speech.txt`` to ``speech.wav`` with a local text-to-speech tool.
+
+    The text file is the clip's reference transcript. Returns the WAV path,
+    or None when no supported tool (espeak-ng, espeak, flite, say) is
+    installed.
+    """
+    directory = Path(directory)
+    text, audio = directory / "speech.txt", directory / "speech.wav"
+    if audio.exists():
+        return audio
+
+    for name, command in TTS_COMMANDS.items():
+        if shutil.which(name) is None:
+            continue
+        tmp = audio.with_suffix(".tmp.wav")
+        result = subprocess.run(command(str(text), str(tmp)), capture_output=True)
+        if result.returncode == 0 and tmp.exists():
+            tmp.replace(audio)
+            return audio
+        tmp.unlink(missing_ok=True)
+    return None
+
+
+def audio_duration(path):
+    with wave.open(str(path), "rb") as wav:
+        return wav.getnframes() / float(wav.getframerate())
+
+
+class FakeYoutubeDL:
+    """Minimal ``yt_dlp.YoutubeDL`` replacement backed by local fixtures.
+
+    ``fixtures`` maps a video id to a fixture path; ids that are not in the
+    map fall back to ``default_fixture``.
+    """
+
+    fixtures = {}
+    default_fixture = None
+    metadata_latency = 0.0
+    download_latency = 0.0
+
+    def __init__(self, opts=None):
+        self.opts = opts or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _fixture_for(self, url):
+        video_id = url.split("v=")[-1].split("&")[0]
+        return video_id, Path(self.fixtures.get(video_id, self.default_fixture))
+
+    def extract_info(self, url, download=False):
+        video_id, fixture = self._fixture_for(url)
+
+        if download:
+            time.sleep(self.download_latency)
+            outtmpl = self.opts.get("outtmpl")
+            if outtmpl:
+                target = Path(outtmpl.replace("%(ext)s", "mp3"))
+                shutil.copyfile(fixture, target)
+        else:
+            time.sleep(self.metadata_latency)
+
+        return {
+            "id": video_id,
+            "title": f"Benchmark video {video_id}",
+            "thumbnail": "",
+            "duration": int(round(audio_duration(fixture))),
+            "description": "Synthetic benchmark fixture",
+        }
+
+
+class FakeWhisperModel:
+    """Pretends to transcribe at ``realtime_factor`` seconds per audio second."""
+
+    def __init__(self, name, realtime_factor=0.01):
+        self.name = name
+        self.realtime_factor = realtime_factor
+
+    def transcribe(self, audio, **kwargs):
+        # A path, or samples from load_audio when transcribing in chunks
+        if isinstance(audio, (str, Path)):
+            duration = audio_duration(audio)
+        else:
+            duration = len(audio) / SAMPLE_RATE
+        time.sleep(duration * self.realtime_factor)
+
+        segments = []
+        start = 0.0
+        index = 0
+        while start < duration:
+            end = min(duration, start + 5.0)
+            segments.append(
+                {
+                    "id": index,
+                    "start": start,
+                    "end": end,
+                    "text": f" Synthetic segment {index} of the benchmark audio.",
+                }
+            )
+            start = end
+            index += 1
+
+        return {
+            "text": "".join(s["text"] for s in segments),
+            "segments": segments,
+            "language": "en",
+        }
+
+
+def install_fake_yt_dlp(
+    default_fixture, fixtures=None, metadata_latency=0.0, download_latency=0.0
+):
+    FakeYoutubeDL.default_fixture = default_fixture
+    FakeYoutubeDL.fixtures = dict(fixtures or {})
+    FakeYoutubeDL.metadata_latency = metadata_latency
+    FakeYoutubeDL.download_latency = download_latency
+
+    module = types.ModuleType("yt_dlp")
+    module.YoutubeDL = FakeYoutubeDL
+    sys.modules["yt_dlp"] = module
+    return module
+
+
+def load_audio(path, sr=SAMPLE_RATE):
+    """``whisper.load_audio`` for the WAV fixtures (which are already 16 kHz)."""
+    import numpy as np
+
+    with wave.open(str(path), "rb") as wav:
+        frames = wav.readframes(wav.getnframes())
+    return np.frombuffer(frames, np.int16).astype(np.float32) / 32768
+
+
+def install_fake_whisper(realtime_factor=0.01):
+    module = types.ModuleType("whisper")
+    module.load_model = lambda name, **kwargs: FakeWhisperModel(name, realtime_factor)
+    module.load_audio = load_audio
+    sys.modules["whisper"] = module
+    return module
+
+
+class _FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(
+                200,
+                {"object": "list", "data": [{"id": "fake", "object": "model"}]},
+            )
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        server = self.server
+        with server.slots:
+            time.sleep(server.latency)
+        server.count_request()
+
+        messages = request.get("messages", [])
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        if "numbered items" in prompt.lower():
+            count = len(re.findall(r"^\d+\. Title:", prompt, flags=re.MULTILINE))
+            content = "\n".join(f"{i}: technology" for i in range(1, count + 1))
+        elif "categorization" in prompt.lower():
+            content = "technology"
+        else:
+            content = "This synthetic video walks through a benchmark scenario."
+
+        self._send_json(
+            200,
+            {
+                "id": f"chatcmpl-{server.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": len(prompt) // 4,
+                    "completion_tokens": len(content) // 4,
+                    "total_tokens": (len(prompt) + len(content)) // 4,
+                },
+            },
+        )
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """OpenAI-compatible chat server that processes ``parallel`` requests at a
+    time, each taking ``latency`` seconds, like a CPU-bound Ollama."""
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.2, parallel=1, host="127.0.0.1", port=0):
+        super().__init__((host, port), _FakeOllamaHandler)
+        self.latency = latency
+        self.slots = threading.Semaphore(parallel)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,176 @@
+"""TubeScribe API server with a stubbed pipeline, for ``benchmarks/load_test.py``.
+
+The real app (routes, Socket.IO handlers, database) runs in the requested
+async mode. Queued videos are "processed" by a stub that only reports
+progress and transcript segments at a fixed pace, so the load falls on the
+web server and event fan-out rather than on Whisper or Ollama.
+
+Every progress event carries the time it was emitted (``sent_at``) so that
+clients can measure delivery latency, and ``GET /bench/stats`` reports how
+many events were emitted and the CPU time the server has used.
+
+Usage::
+
+    python -m benchmarks.load_server --async-mode eventlet --port 5055
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Events whose delivery the load test measures
+COUNTED_EVENTS = (
+    "all_updates",
+    "video_progress",
+    "transcript_segments",
+    "summary_progress",
+)
+
+
+def patch_for(async_mode):
+    # Must run before anything that creates threads, sockets or locks
+    if async_mode == "eventlet":
+        import eventlet
+
+        eventlet.monkey_patch()
+    elif async_mode == "gevent":
+        from gevent import monkey
+
+        monkey.patch_all()
+
+
+class EmitCounter:
+    """Wraps ``socketio.emit`` to stamp and count progress events."""
+
+    def __init__(self, emit):
+        self._emit = emit
+        self._lock = threading.Lock()
+        self.broadcast = 0
+        self.rooms = {}
+
+    def __call__(self, event, data=None, **kwargs):
+        if event in COUNTED_EVENTS and isinstance(data, dict):
+            data = dict(data, sent_at=time.time())
+            room = kwargs.get("to") or kwargs.get("room")
+            with self._lock:
+                if room:
+                    self.rooms[room] = self.rooms.get(room, 0) + 1
+                else:
+                    self.broadcast += 1
+        return self._emit(event, data, **kwargs)
+
+
+def serve(args):
+    import logging
+    from benchmarks import fakes
+
+    fixture = fakes.make_fixture_audio(
+        Path(os.environ["DATA_DIR"]) / "fixture.wav", args.video_seconds
+    )
+    fakes.install_fake_yt_dlp(fixture)
+
+    from flask import jsonify
+    from backend import create_app, socketio
+    from backend.api import routes
+    from backend.models.database import db, Video
+    from backend.utils.progress_tracker import ProgressTracker
+    from backend.utils.memory import rss_mb
+
+    app = create_app()
+    counter = socketio.emit = EmitCounter(socketio.emit)
+
+    def stub_pipeline(video_id, video_url, profile=False, quality=None):
+        with app.app_context():
+            tracker = routes.processing_tasks.get(video_id) or ProgressTracker(
+                video_id, socketio
+            )
+            try:
+                for step in range(args.steps):
+                    socketio.sleep(args.step_interval)
+                    tracker.set_status(
+                        "processing",
+                        "Transcribing audio...",
+                        5 + 90 * step // args.steps,
+                    )
+                    tracker.emit_segments(
+                        [
+                            {
+                                "start": float(step),
+                                "end": float(step + 1),
+                                "text": "Load test segment.",
+                            }
+                        ]
+                    )
+
+                video = Video.query.get(video_id)
+                video.status = "completed"
+                video.current_step = "Completed!"
+                video.progress = 100
+                db.session.commit()
+                tracker.set_status("completed", "Completed!", 100)
+            finally:
+                routes.processing_tasks.pop(video_id, None)
+
+    routes.scheduler.target = stub_pipeline
+
+    @app.route("/bench/stats")
+    def bench_stats():
+        times = os.times()
+        return jsonify(
+            {
+                "async_mode": socketio.async_mode,
+                "cpu_seconds": times.user + times.system,
+                "rss_mb": rss_mb(),
+                "active_jobs": len(routes.processing_tasks),
+                "broadcast_events": counter.broadcast,
+                "room_events": dict(counter.rooms),
+            }
+        )
+
+    # Request logging would be part of what is measured
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    print(f"Load test server ({socketio.async_mode}) on port {args.port}", flush=True)
+    socketio.run(
+        app,
+        host="127.0.0.1",
+        port=args.port,
+        debug=False,
+        log_output=False,
+        allow_unsafe_werkzeug=True,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TubeScribe load test server")
+    parser.add_argument(
+        "--async-mode", default="threading", choices=("threading", "eventlet", "gevent")
+    )
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument(
+        "--steps", type=int, default=20, help="progress updates per stub job"
+    )
+    parser.add_argument(
+        "--step-interval",
+        type=float,
+        default=0.1,
+        help="seconds between progress updates",
+    )
+    parser.add_argument(
+        "--video-seconds",
+        type=float,
+        default=60,
+        help="duration reported for every video",
+    )
+    args = parser.parse_args(argv)
+
+    patch_for(args.async_mode)
+    os.environ["SOCKETIO_ASYNC_MODE"] = args.async_mode
+    serve(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
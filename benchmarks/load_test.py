@@ -0,0 +1,500 @@
+"""Load test of the REST API and Socket.IO event fan-out.
+
+Starts ``benchmarks/load_server.py`` (the real app with a stubbed pipeline)
+once per async mode, connects Socket.IO clients that ``subscribe_all`` or
+``join_video`` like open dashboards, and runs REST clients that poll
+``/api/videos`` and ``/api/stats`` and submit videos with
+``POST /api/videos``. For each mode it reports:
+
+- request latency percentiles and errors per endpoint
+- event delivery latency, from the server's emit to a client's handler
+- dropped events: events the server emitted that a client should have
+  received but did not
+- server CPU (percent of one core) and resident memory
+
+Usage::
+
+    python -m benchmarks.load_test --modes threading,eventlet,gevent
+    python -m benchmarks.load_test --socket-clients 200 --rest-clients 16 --duration 60
+
+Clients run in this process, so on a small machine they compete with the
+server for CPU; compare modes within one run rather than across machines.
+Modes whose library is not installed are reported as skipped. The websocket
+transport needs the ``websocket-client`` package.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.pipeline_bench import (
+    ROOT_DIR,
+    RESULTS_DIR,
+    git_revision,
+    summarize_latencies,
+)
+
+EVENTS = ("all_updates", "video_progress", "transcript_segments", "summary_progress")
+MODE_LIBRARIES = {"threading": None, "eventlet": "eventlet", "gevent": "gevent"}
+ENDPOINTS = ("GET /api/videos", "GET /api/stats", "POST /api/videos")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def http_json(method, url, payload=None, timeout=30):
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(
+        url, data=data, method=method, headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read() or b"null")
+
+
+class EventClient:
+    """One Socket.IO connection that counts events and their delivery latency."""
+
+    def __init__(self, rooms=()):
+        import socketio
+
+        self.rooms = list(rooms)
+        self.received = 0
+        self.latencies = []
+        self.ready = threading.Event()
+        self._pending_acks = len(self.rooms) or 1
+        self._lock = threading.Lock()
+        self.client = socketio.Client(reconnection=False)
+
+        for event in EVENTS:
+            self.client.on(event, self._on_event)
+        self.client.on("subscribed_all", self._on_ack)
+        self.client.on("joined", self._on_ack)
+
+    def _on_event(self, data):
+        received_at = time.time()
+        with self._lock:
+            self.received += 1
+            if isinstance(data, dict) and "sent_at" in data:
+                self.latencies.append(received_at - data["sent_at"])
+
+    def _on_ack(self, data=None):
+        with self._lock:
+            self._pending_acks -= 1
+            if self._pending_acks <= 0:
+                self.ready.set()
+
+    def connect(self, base_url, transport):
+        self.client.connect(base_url, transports=[transport], wait_timeout=10)
+        if self.rooms:
+            for room in self.rooms:
+                self.client.emit("join_video", {"video_id": room})
+        else:
+            self.client.emit("subscribe_all")
+
+    def reset(self):
+        with self._lock:
+            self.received = 0
+            self.latencies = []
+
+    def disconnect(self):
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+
+
+class RestClient(threading.Thread):
+    """Polls the dashboard endpoints and submits videos at a shared rate."""
+
+    def __init__(self, index, base_url, stop, submissions, think_time):
+        super().__init__(name=f"rest-client-{index}", daemon=True)
+        self.index = index
+        self.base_url = base_url
+        self.stop = stop
+        self.submissions = submissions
+        self.think_time = think_time
+        self.latencies = {endpoint: [] for endpoint in ENDPOINTS}
+        self.errors = {endpoint: 0 for endpoint in ENDPOINTS}
+        self._submitted = 0
+
+    def _request(self, endpoint):
+        method, path = endpoint.split(" ", 1)
+        payload = None
+        if method == "POST":
+            # Video ids are 11 characters, unique per client and submission
+            self._submitted += 1
+            video_id = f"L{self.index:03d}{self._submitted:07d}"
+            payload = {"urls": [f"https://www.youtube.com/watch?v={video_id}"]}
+
+        start = time.perf_counter()
+        try:
+            http_json(method, self.base_url + path, payload)
+        except (urllib.error.URLError, OSError, ValueError):
+            self.errors[endpoint] += 1
+            return
+        self.latencies[endpoint].append(time.perf_counter() - start)
+
+    def run(self):
+        while not self.stop.is_set():
+            if self.submissions.due():
+                self._request("POST /api/videos")
+            else:
+                self._request(random.choice(ENDPOINTS[:2]))
+            if self.think_time:
+                time.sleep(self.think_time)
+
+
+class SubmissionSchedule:
+    """Hands out POST /api/videos slots at a fixed rate across REST clients."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else None
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def due(self):
+        if self.interval is None:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next:
+                return False
+            self._next = max(self._next + self.interval, now - self.interval)
+            return True
+
+
+def wait_for_server(base_url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"load server exited with code {process.returncode}")
+        try:
+            return http_json("GET", base_url + "/bench/stats", timeout=2)
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError("load server did not start")
+
+
+def run_mode(mode, args, workdir):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    mode_dir = workdir / mode
+    env = dict(
+        os.environ,
+        DATA_DIR=str(mode_dir / "data"),
+        TRANSCRIPTIONS_DIR=str(mode_dir / "transcriptions"),
+        MAX_CONCURRENT_JOBS=str(args.job_concurrency),
+        JOB_QUEUE_BACKEND="local",
+        SOCKETIO_MESSAGE_QUEUE="",
+        WARMUP_ON_START="False",
+        MEMORY_BUDGET_MB="0",
+        # Clients send their own address as the Origin
+        CORS_ORIGINS=base_url,
+    )
+    log_path = mode_dir / "server.log"
+    mode_dir.mkdir(parents=True)
+    with open(log_path, "w") as log:
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.load_server",
+                "--async-mode",
+                mode,
+                "--port",
+                str(port),
+                "--steps",
+                str(args.steps),
+                "--step-interval",
+                str(args.step_interval),
+            ],
+            cwd=ROOT_DIR,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+
+    clients = []
+    try:
+        wait_for_server(base_url, server)
+
+        # Videos get ids 1, 2, 3... in the fresh database, so room clients
+        # can join the rooms of the first videos before they are submitted
+        connect_errors = 0
+        for i in range(args.socket_clients + args.room_clients):
+            rooms = ()
+            if i >= args.socket_clients:
+                rooms = [(i - args.socket_clients) % args.rooms + 1]
+            client = EventClient(rooms)
+            try:
+                client.connect(base_url, args.transport)
+                clients.append(client)
+            except Exception as e:
+                connect_errors += 1
+                print(f"  {mode}: client {i} could not connect: {e}")
+        for client in clients:
+            if not client.ready.wait(10):
+                print(f"  {mode}: a client was not subscribed in time")
+        for client in clients:
+            client.reset()
+
+        before = http_json("GET", base_url + "/bench/stats")
+        stop = threading.Event()
+        schedule = SubmissionSchedule(args.submit_rate)
+        rest_clients = [
+            RestClient(i, base_url, stop, schedule, args.think_time)
+            for i in range(args.rest_clients)
+        ]
+        start = time.perf_counter()
+        for rest_client in rest_clients:
+            rest_client.start()
+        time.sleep(args.duration)
+        stop.set()
+        for rest_client in rest_clients:
+            rest_client.join()
+        load_seconds = time.perf_counter() - start
+
+        # Let queued jobs finish and their last events arrive
+        deadline = time.monotonic() + args.drain_timeout
+        while time.monotonic() < deadline:
+            if http_json("GET", base_url + "/bench/stats")["active_jobs"] == 0:
+                break
+            time.sleep(0.2)
+        time.sleep(args.grace)
+        after = http_json("GET", base_url + "/bench/stats")
+        wall = time.perf_counter() - start
+    finally:
+        # Each disconnect waits for its connection to close, so close them at once
+        closing = [
+            threading.Thread(target=client.disconnect, daemon=True)
+            for client in clients
+        ]
+        for thread in closing:
+            thread.start()
+        for thread in closing:
+            thread.join(10)
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    broadcast = after["broadcast_events"] - before["broadcast_events"]
+    room_events = {
+        room: count - before["room_events"].get(room, 0)
+        for room, count in after["room_events"].items()
+    }
+    expected = delivered = dropped = 0
+    latencies = []
+    for client in clients:
+        should_receive = broadcast + sum(
+            room_events.get(f"video_{room}", 0) for room in client.rooms
+        )
+        expected += should_receive
+        delivered += client.received
+        dropped += max(should_receive - client.received, 0)
+        latencies.extend(client.latencies)
+
+    requests = {}
+    for endpoint in ENDPOINTS:
+        samples = [s for c in rest_clients for s in c.latencies[endpoint]]
+        stats = summarize_latencies(samples)
+        stats["errors"] = sum(c.errors[endpoint] for c in rest_clients)
+        stats["per_second"] = len(samples) / load_seconds if load_seconds else 0.0
+        requests[endpoint] = stats
+
+    cpu_seconds = after["cpu_seconds"] - before["cpu_seconds"]
+    return {
+        "mode": mode,
+        "async_mode": after["async_mode"],
+        "socket_clients": len(clients),
+        "connect_errors": connect_errors,
+        "load_seconds": load_seconds,
+        "requests": requests,
+        "events": {
+            "emitted": broadcast + sum(room_events.values()),
+            "expected": expected,
+            "delivered": delivered,
+            "dropped": dropped,
+            "drop_ratio": dropped / expected if expected else 0.0,
+            "latency": summarize_latencies(latencies),
+        },
+        "server_cpu_percent": cpu_seconds / wall * 100 if wall else 0.0,
+        "server_rss_mb": after["rss_mb"],
+    }
+
+
+def _ms(value):
+    return f"{value * 1000:.1f}" if value is not None else "-"
+
+
+def print_report(results):
+    for result in results["modes"]:
+        if result.get("skipped"):
+            print(f"\n{result['mode']}: skipped ({result['skipped']})")
+            continue
+        events = result["events"]
+        print(
+            f"\n{result['mode']}  clients={result['socket_clients']}  "
+            f"server CPU={result['server_cpu_percent']:.0f}%  "
+            f"RSS={result['server_rss_mb']:.0f} MB"
+        )
+        print(
+            f"  {'endpoint':<18} {'n':>6} {'req/s':>7} {'p50 ms':>8} "
+            f"{'p99 ms':>8} {'errors':>6}"
+        )
+        for endpoint, stats in result["requests"].items():
+            print(
+                f"  {endpoint:<18} {stats['count']:>6} {stats['per_second']:>7.1f} "
+                f"{_ms(stats.get('p50')):>8} {_ms(stats.get('p99')):>8} "
+                f"{stats['errors']:>6}"
+            )
+        latency = events["latency"]
+        print(
+            f"  events: {events['delivered']}/{events['expected']} delivered, "
+            f"{events['dropped']} dropped ({events['drop_ratio']:.2%}), "
+            f"latency p50={_ms(latency.get('p50'))} ms "
+            f"p99={_ms(latency.get('p99'))} ms max={_ms(latency.get('max'))} ms"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="TubeScribe REST and Socket.IO load test"
+    )
+    parser.add_argument(
+        "--modes",
+        default="threading,eventlet,gevent",
+        help="comma-separated async modes to compare",
+    )
+    parser.add_argument(
+        "--socket-clients",
+        type=int,
+        default=50,
+        help="Socket.IO clients that subscribe_all",
+    )
+    parser.add_argument(
+        "--room-clients",
+        type=int,
+        default=10,
+        help="Socket.IO clients that join_video rooms",
+    )
+    parser.add_argument(
+        "--rooms",
+        type=int,
+        default=8,
+        help="rooms of videos 1..N, one per room client in turn",
+    )
+    parser.add_argument("--rest-clients", type=int, default=8)
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=0.05,
+        help="seconds each REST client waits between requests",
+    )
+    parser.add_argument(
+        "--submit-rate",
+        type=float,
+        default=1.0,
+        help="POST /api/videos per second, across REST clients",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=20, help="seconds of REST load per mode"
+    )
+    parser.add_argument(
+        "--steps", type=int, default=20, help="progress updates per stub job"
+    )
+    parser.add_argument("--step-interval", type=float, default=0.1)
+    parser.add_argument(
+        "--job-concurrency",
+        type=int,
+        default=8,
+        help="stub jobs the server runs at once",
+    )
+    parser.add_argument(
+        "--transport", default="websocket", choices=("websocket", "polling")
+    )
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=60,
+        help="seconds to wait for queued jobs after the load",
+    )
+    parser.add_argument(
+        "--grace", type=float, default=1.0, help="seconds to wait for the last events"
+    )
+    parser.add_argument("--output", default=None, help="results JSON path")
+    parser.add_argument(
+        "--keep-data",
+        action="store_true",
+        help="keep the temporary data directories and server logs",
+    )
+    args = parser.parse_args(argv)
+
+    if args.transport == "websocket" and not importlib.util.find_spec("websocket"):
+        print(
+            "The websocket transport needs websocket-client: "
+            "pip install websocket-client (or use --transport polling)"
+        )
+        return 1
+
+    workdir = Path(tempfile.mkdtemp(prefix="tubescribe-load-"))
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "args": vars(args),
+        },
+        "modes": [],
+    }
+
+    try:
+        for mode in args.modes.split(","):
+            mode = mode.strip()
+            library = MODE_LIBRARIES.get(mode, mode)
+            if library and not importlib.util.find_spec(library):
+                results["modes"].append(
+                    {"mode": mode, "skipped": f"{library} is not installed"}
+                )
+                continue
+            print(f"Running {mode}...")
+            results["modes"].append(run_mode(mode, args, workdir))
+    finally:
+        if args.keep_data:
+            print(f"Data and server logs kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results)
+
+    output = (
+        Path(args.output)
+        if args.output
+        else (RESULTS_DIR / f"load-{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
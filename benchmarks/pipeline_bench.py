@@ -0,0 +1,429 @@
+"""End-to-end pipeline benchmark.
+
+Drives ``POST /api/videos`` (``add_videos``) and the background
+``process_video`` against local stand-ins for YouTube, Whisper and
+Ollama (see ``benchmarks/fakes.py``), at several concurrency levels.
+
+Each concurrency level runs in a fresh subprocess with its own data directory
+so that peak RSS and the SQLite database are not shared between levels.
+
+Usage::
+
+    python -m benchmarks.pipeline_bench --concurrency 1,4,8 --jobs 24
+    python -m benchmarks.pipeline_bench --baseline old.json --output new.json
+
+``--whisper-model tiny`` uses a real Whisper model instead of the stub.
+FFmpeg/ffprobe must be installed, as audio validation is part of the pipeline.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+
+# Pipeline functions to time, as (module, attribute, stage name)
+STAGES = [
+    ("backend.api.routes", "get_video_metadata", "metadata"),
+    ("backend.api.routes", "download_audio", "download"),
+    ("backend.services.transcribe_service", "validate_audio_file", "probe"),
+    ("backend.services.transcribe_service", "convert_to_mono_if_needed", "mono"),
+    ("backend.api.routes", "transcribe_audio", "transcribe"),
+    ("backend.services.llm_stage_service", "summarize_transcript", "summarize"),
+    ("backend.services.llm_stage_service", "auto_categorize_video", "categorize"),
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize_latencies(values):
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": max(values),
+    }
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+
+        timed.__wrapped__ = func
+        return timed
+
+    def install(self):
+        import importlib
+
+        for module_name, attr, stage in STAGES:
+            module = importlib.import_module(module_name)
+            if hasattr(module, attr):
+                setattr(module, attr, self.wrap(stage, getattr(module, attr)))
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def run_level(args):
+    """Run one concurrency level in the current process (subprocess mode)."""
+    from benchmarks import fakes
+
+    fixture_dir = Path(args.fixture_dir)
+    durations = [float(d) for d in args.durations.split(",")]
+    fixture_paths = [
+        fakes.make_fixture_audio(fixture_dir / f"fixture_{int(d)}s.wav", d)
+        for d in durations
+    ]
+
+    urls = []
+    fixtures = {}
+    for i in range(args.jobs):
+        video_id = f"bench{args.level:03d}x{i:05d}"
+        fixtures[video_id] = fixture_paths[i % len(fixture_paths)]
+        urls.append(f"https://www.youtube.com/watch?v={video_id}")
+
+    fakes.install_fake_yt_dlp(
+        fixture_paths[0],
+        fixtures,
+        metadata_latency=args.metadata_latency,
+        download_latency=args.download_latency,
+    )
+    if not args.whisper_model:
+        fakes.install_fake_whisper(args.whisper_rtf)
+
+    server = fakes.FakeOllamaServer(
+        latency=args.llm_latency, parallel=args.llm_parallel
+    ).start()
+    os.environ["OLLAMA_BASE_URL"] = server.base_url
+    if args.whisper_model:
+        os.environ["WHISPER_MODEL"] = args.whisper_model
+
+    from backend import create_app
+    from backend.models.database import db, Video
+
+    app = create_app()
+    timer = StageTimer()
+    timer.install()
+    client = app.test_client()
+
+    submitted = {}
+    finished = {}
+    pending = list(urls)
+    in_flight = {}
+
+    start = time.perf_counter()
+    while pending or in_flight:
+        while pending and len(in_flight) < args.level:
+            url = pending.pop(0)
+            submitted_at = time.perf_counter()
+            response = client.post("/api/videos", json={"urls": [url]})
+            timer.record("submit", time.perf_counter() - submitted_at)
+            for video in response.get_json().get("videos", []):
+                in_flight[video["id"]] = submitted_at
+                submitted[video["id"]] = submitted_at
+
+        time.sleep(args.poll_interval)
+        with app.app_context():
+            rows = (
+                db.session.query(Video.id, Video.status)
+                .filter(Video.id.in_(list(in_flight)))
+                .all()
+            )
+            for video_id, status in rows:
+                if status in ("completed", "error"):
+                    finished[video_id] = (status, time.perf_counter())
+                    in_flight.pop(video_id, None)
+            db.session.remove()
+
+        if time.perf_counter() - start > args.timeout:
+            print(f"Level {args.level}: timed out with {len(in_flight)} jobs in flight")
+            break
+
+    wall = time.perf_counter() - start
+    server.stop()
+
+    end_to_end = [done - submitted[vid] for vid, (_, done) in finished.items()]
+    completed = sum(1 for status, _ in finished.values() if status == "completed")
+    errors = sum(1 for status, _ in finished.values() if status == "error")
+
+    result = {
+        "concurrency": args.level,
+        "jobs": args.jobs,
+        "completed": completed,
+        "errors": errors,
+        "timed_out": args.jobs - len(finished),
+        "wall_seconds": wall,
+        "jobs_per_minute": completed / wall * 60 if wall else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "llm_requests": server.requests,
+        "end_to_end": summarize_latencies(end_to_end),
+        "stages": {
+            stage: summarize_latencies(values)
+            for stage, values in sorted(timer.samples.items())
+        },
+    }
+
+    with open(args.result_file, "w") as f:
+        json.dump(result, f)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(baseline, current):
+    base_levels = {lvl["concurrency"]: lvl for lvl in baseline.get("levels", [])}
+    print(f"{'level':>6} {'metric':<24} {'baseline':>10} {'current':>10} {'delta':>8}")
+    for level in current.get("levels", []):
+        base = base_levels.get(level["concurrency"])
+        if not base:
+            continue
+        rows = [
+            ("jobs_per_minute", base["jobs_per_minute"], level["jobs_per_minute"]),
+            ("peak_rss_mb", base["peak_rss_mb"], level["peak_rss_mb"]),
+            (
+                "end_to_end.p50",
+                base["end_to_end"].get("p50"),
+                level["end_to_end"].get("p50"),
+            ),
+        ]
+        for stage, stats in level["stages"].items():
+            base_stats = base["stages"].get(stage, {})
+            rows.append((f"{stage}.p90", base_stats.get("p90"), stats.get("p90")))
+
+        for metric, old, new in rows:
+            if old is None or new is None:
+                continue
+            delta = (new - old) / old * 100 if old else 0.0
+            print(
+                f"{level['concurrency']:>6} {metric:<24} {old:>10.3f} {new:>10.3f} {delta:>+7.1f}%"
+            )
+
+
+def print_report(results):
+    for level in results["levels"]:
+        print(
+            f"\nconcurrency={level['concurrency']}  jobs={level['jobs']}  "
+            f"completed={level['completed']}  errors={level['errors']}  "
+            f"jobs/min={level['jobs_per_minute']:.1f}  "
+            f"peak RSS={level['peak_rss_mb']:.0f} MB"
+        )
+        print(f"  {'stage':<12} {'n':>5} {'p50':>9} {'p90':>9} {'p99':>9}")
+        rows = dict(level["stages"])
+        rows["end_to_end"] = level["end_to_end"]
+        for stage, stats in rows.items():
+            if not stats.get("count"):
+                continue
+            print(
+                f"  {stage:<12} {stats['count']:>5} {stats['p50']:>8.3f}s "
+                f"{stats['p90']:>8.3f}s {stats['p99']:>8.3f}s"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TubeScribe pipeline benchmark")
+    parser.add_argument(
+        "--concurrency",
+        default="1,4,8",
+        help="comma-separated numbers of jobs kept in flight",
+    )
+    parser.add_argument("--jobs", type=int, default=16, help="jobs per level")
+    parser.add_argument(
+        "--durations",
+        default="30,120",
+        help="fixture audio durations in seconds, cycled over jobs",
+    )
+    parser.add_argument(
+        "--whisper-model",
+        default=None,
+        help="use a real Whisper model (e.g. tiny) instead of the stub",
+    )
+    parser.add_argument(
+        "--whisper-rtf",
+        type=float,
+        default=0.01,
+        help="stub Whisper seconds per audio second",
+    )
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.2, help="fake Ollama seconds per request"
+    )
+    parser.add_argument(
+        "--llm-parallel",
+        type=int,
+        default=1,
+        help="requests the fake Ollama serves at once",
+    )
+    parser.add_argument("--metadata-latency", type=float, default=0.05)
+    parser.add_argument("--download-latency", type=float, default=0.1)
+    parser.add_argument("--poll-interval", type=float, default=0.02)
+    parser.add_argument(
+        "--timeout", type=float, default=600, help="seconds before a level is abandoned"
+    )
+    parser.add_argument("--output", default=None, help="results JSON path")
+    parser.add_argument(
+        "--baseline", default=None, help="previous results JSON to compare against"
+    )
+    parser.add_argument(
+        "--keep-data", action="store_true", help="keep the temporary data directories"
+    )
+    # Internal: run a single level in this process
+    parser.add_argument("--level", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    parser.add_argument("--fixture-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.level is not None:
+        run_level(args)
+        return 0
+
+    if not shutil.which("ffprobe"):
+        print("ffprobe not found: install FFmpeg to run the pipeline benchmark")
+        return 1
+
+    workdir = Path(tempfile.mkdtemp(prefix="tubescribe-bench-"))
+    fixture_dir = workdir / "fixtures"
+    levels = [int(c) for c in args.concurrency.split(",")]
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "args": {
+                k: v
+                for k, v in vars(args).items()
+                if k not in ("level", "result_file", "fixture_dir")
+            },
+        },
+        "levels": [],
+    }
+
+    passthrough = [
+        "--jobs",
+        str(args.jobs),
+        "--durations",
+        args.durations,
+        "--whisper-rtf",
+        str(args.whisper_rtf),
+        "--llm-latency",
+        str(args.llm_latency),
+        "--llm-parallel",
+        str(args.llm_parallel),
+        "--metadata-latency",
+        str(args.metadata_latency),
+        "--download-latency",
+        str(args.download_latency),
+        "--poll-interval",
+        str(args.poll_interval),
+        "--timeout",
+        str(args.timeout),
+        "--fixture-dir",
+        str(fixture_dir),
+    ]
+    if args.whisper_model:
+        passthrough += ["--whisper-model", args.whisper_model]
+
+    try:
+        for level in levels:
+            level_dir = workdir / f"level_{level}"
+            result_file = level_dir / "result.json"
+            level_dir.mkdir(parents=True)
+            env = dict(
+                os.environ,
+                DATA_DIR=str(level_dir / "data"),
+                TRANSCRIPTIONS_DIR=str(level_dir / "transcriptions"),
+                MAX_CONCURRENT_JOBS=str(level),
+            )
+            print(f"Running concurrency level {level}...")
+            subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.pipeline_bench",
+                    "--level",
+                    str(level),
+                    "--result-file",
+                    str(result_file),
+                ]
+                + passthrough,
+                cwd=ROOT_DIR,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                check=True,
+            )
+            with open(result_file) as f:
+                results["levels"].append(json.load(f))
+    finally:
+        if not args.keep_data:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results)
+
+    output = (
+        Path(args.output)
+        if args.output
+        else (RESULTS_DIR / f"pipeline-{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            print()
+            compare(json.load(f), results)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+# backend.config reads these at import time, so they are set before any test
+# module imports the backend
+_tmp = tempfile.mkdtemp(prefix="tubescribe-tests-")
+os.environ["DATA_DIR"] = os.path.join(_tmp, "data")
+os.environ["TRANSCRIPTIONS_DIR"] = os.path.join(_tmp, "transcriptions")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'tubescribe.db')}"
+os.environ["WARMUP_ON_START"] = "false"
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app():
+    from backend import create_app
+
+    # The worker role starts no background threads
+    return create_app(role="worker")
+
+
+@pytest.fixture
+def db(app):
+    from backend.models.database import db
+
+    with app.app_context():
+        yield db
+        db.session.rollback()
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+        db.session.remove()
@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from backend.models.database import Category
+from backend.services import categorize_service
+from backend.services.categorize_service import (
+    get_or_create_category,
+    normalize_category,
+)
+
+
+@pytest.mark.parametrize(
+    "answer, category",
+    [
+        ("Technology", "technology"),
+        ("Food and Cooking.", "food & cooking"),
+        ("health-and-fitness", "health & fitness"),
+        ("Review", "reviews"),
+        ("Sport", "sports"),
+        ("AI", "technology"),
+        ("Video Games", "gaming"),
+        # Labels before the answer
+        ("category: gaming", "gaming"),
+        ("Category - Gaming", "gaming"),
+        ("The category is: Gaming.", "gaming"),
+        ("**Category:** Music", "music"),
+        ("Genre: comedy", "entertainment"),
+        # Several categories: the first known one wins
+        ("Education/Tutorials", "education"),
+        ("Health/Fitness", "health & fitness"),
+        ("Something / Science", "science"),
+        ("Topic: AI/ML", "technology"),
+        # Nothing recognizable
+        ("", "general"),
+        (None, "general"),
+        ("Category:", "general"),
+        ("underwater basket weaving", "general"),
+    ],
+)
+def test_normalize_category(answer, category):
+    assert normalize_category(answer) == category
+
+
+@pytest.fixture
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(categorize_service, "_categories", {})
+    monkeypatch.setattr(categorize_service, "_warmed", False)
+
+
+def test_get_or_create_reuses_existing_categories(db, empty_cache):
+    existing = Category(name="music")
+    db.session.add(existing)
+    db.session.commit()
+
+    assert get_or_create_category("music").id == existing.id
+    created = get_or_create_category("science")
+    assert created.name == "science"
+    assert get_or_create_category("science") == created
+    assert Category.query.count() == 2
+
+
+def test_concurrent_upserts_create_one_category(app, db, empty_cache):
+    workers = 8
+    barrier = threading.Barrier(workers)
+    ids, errors = [], []
+
+    def upsert():
+        with app.app_context():
+            try:
+                barrier.wait()
+                ids.append(categorize_service._upsert("science"))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=upsert) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    assert errors == []
+    assert len(ids) == workers
+    assert len(set(ids)) == 1
+    assert Category.query.filter_by(name="science").count() == 1
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models.database import Video, VideoTombstone
+from backend.services import changes_service
+from backend.services.changes_service import (
+    CursorError,
+    CursorExpired,
+    changes_since,
+    encode_cursor,
+    record_deletion,
+)
+
+T0 = datetime(2026, 1, 1)
+LATER = T0 + timedelta(hours=1)
+
+
+def _video(db, url, updated_at):
+    video = Video(youtube_url=url, title=url, updated_at=updated_at)
+    db.session.add(video)
+    db.session.commit()
+    return video
+
+
+def _touch(db, video, updated_at):
+    video.updated_at = updated_at
+    db.session.commit()
+
+
+def _delete(db, video, deleted_at):
+    video_id = video.id
+    db.session.delete(video)
+    record_deletion(video_id)
+    db.session.commit()
+    tombstone = VideoTombstone.query.filter_by(video_id=video_id).one()
+    tombstone.deleted_at = deleted_at
+    db.session.commit()
+    return video_id
+
+
+def _ids(page):
+    return [v["id"] for v in page["videos"]]
+
+
+def test_full_listing_pages_in_update_order(db):
+    b = _video(db, "b", T0 + timedelta(seconds=2))
+    a = _video(db, "a", T0 + timedelta(seconds=1))
+    # Same timestamp: the id breaks the tie
+    c = _video(db, "c", T0 + timedelta(seconds=2))
+
+    seen = []
+    cursor = None
+    while True:
+        page = changes_since(cursor, limit=1, now=LATER)
+        seen += _ids(page)
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            break
+
+    assert seen == [a.id, b.id, c.id]
+    assert _ids(changes_since(cursor, now=LATER)) == []
+
+
+def test_cursor_returns_only_later_changes(db):
+    a = _video(db, "a", T0)
+    b = _video(db, "b", T0)
+    cursor = changes_since(now=LATER)["cursor"]
+
+    _touch(db, a, T0 + timedelta(minutes=5))
+    page = changes_since(cursor, now=LATER)
+
+    assert _ids(page) == [a.id]
+    assert b.id not in _ids(page)
+    assert page["deleted"] == []
+
+
+def test_deletions_are_reported_once_settled(db):
+    a = _video(db, "a", T0)
+    _video(db, "b", T0)
+    cursor = changes_since(now=LATER)["cursor"]
+
+    deleted_id = _delete(db, a, T0 + timedelta(minutes=5))
+    page = changes_since(cursor, now=LATER)
+    assert page["deleted"] == [deleted_id]
+
+    # The tombstone is behind the new cursor
+    page = changes_since(page["cursor"], now=LATER)
+    assert page["deleted"] == []
+    assert _ids(page) == []
+
+
+def test_full_listing_skips_existing_tombstones(db):
+    a = _video(db, "a", T0)
+    _video(db, "b", T0)
+    _delete(db, a, T0)
+
+    cursor = changes_since(now=LATER)["cursor"]
+
+    assert changes_since(cursor, now=LATER)["deleted"] == []
+
+
+def test_changes_inside_settle_window_are_sent_again(db, monkeypatch):
+    monkeypatch.setattr(changes_service, "CHANGES_SETTLE_SECONDS", 10)
+    now = T0 + timedelta(minutes=1)
+    old = _video(db, "old", T0)
+    recent = _video(db, "recent", now - timedelta(seconds=5))
+
+    page = changes_since(now=now)
+    assert _ids(page) == [old.id, recent.id]
+
+    # A commit that lands late with an earlier timestamp is not skipped
+    late = _video(db, "late", now - timedelta(seconds=8))
+    page = changes_since(page["cursor"], now=now)
+    assert _ids(page) == [late.id, recent.id]
+
+    # Once settled, the cursor moves past them
+    now += timedelta(seconds=30)
+    page = changes_since(page["cursor"], now=now)
+    assert _ids(page) == [late.id, recent.id]
+    assert _ids(changes_since(page["cursor"], now=now)) == []
+
+
+def test_unsettled_deletions_are_sent_again(db, monkeypatch):
+    monkeypatch.setattr(changes_service, "CHANGES_SETTLE_SECONDS", 10)
+    now = T0 + timedelta(minutes=1)
+    a = _video(db, "a", T0)
+    cursor = changes_since(now=now)["cursor"]
+
+    deleted_id = _delete(db, a, now - timedelta(seconds=5))
+    page = changes_since(cursor, now=now)
+    assert page["deleted"] == [deleted_id]
+    assert changes_since(page["cursor"], now=now)["deleted"] == [deleted_id]
+
+    now += timedelta(seconds=30)
+    page = changes_since(page["cursor"], now=now)
+    assert changes_since(page["cursor"], now=now)["deleted"] == []
+
+
+def test_invalid_and_expired_cursors(db, monkeypatch):
+    with pytest.raises(CursorError):
+        changes_since("not-a-cursor", now=LATER)
+
+    monkeypatch.setattr(changes_service, "TOMBSTONE_RETENTION_DAYS", 7)
+    stale = encode_cursor(T0, 1, 0, issued_at=T0)
+    with pytest.raises(CursorExpired):
+        changes_since(stale, now=T0 + timedelta(days=8))
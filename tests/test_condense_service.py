@@ -0,0 +1,87 @@
+import random
+import time
+
+import pytest
+
+from backend.services import condense_service
+from backend.services.condense_service import (
+    clean_text,
+    condense_transcript,
+    estimate_tokens,
+    split_sentences,
+)
+
+
+def _transcript(sentences, seed=0):
+    """Sentences of 8-30 words drawn from a few topics, like a long talk."""
+    rng = random.Random(seed)
+    topics = [[f"topic{t}word{w}" for w in range(60)] for t in range(20)]
+    lines = []
+    for n in range(sentences):
+        topic = topics[(n // 50) % len(topics)]
+        words = rng.choices(topic, k=rng.randint(8, 30))
+        lines.append(" ".join(words).capitalize() + ".")
+    return " ".join(lines)
+
+
+def test_clean_text_drops_fillers_and_stutters():
+    text = "Um, so the the model is, uh, I I think quite fast."
+
+    assert clean_text(text) == "so the model is, I think quite fast."
+
+
+def test_short_transcripts_are_only_cleaned():
+    text = "The talk covers caching. Then it covers batching, um, in detail."
+
+    assert condense_transcript(text, 1000) == (
+        "The talk covers caching. Then it covers batching, in detail."
+    )
+
+
+def test_repeated_and_empty_sentences_are_dropped():
+    text = "Caching helps a lot. Yeah okay. Caching helps a lot. Batching helps too."
+
+    assert condense_transcript(text, 1000) == "Caching helps a lot. Batching helps too."
+
+
+@pytest.mark.parametrize("budget", [5, 20, 100, 500, 2000])
+def test_result_stays_within_the_budget(budget):
+    transcript = _transcript(400)
+
+    condensed = condense_transcript(transcript, budget)
+
+    assert condensed
+    assert estimate_tokens(condensed) <= budget
+
+
+def test_kept_sentences_are_in_transcript_order():
+    transcript = _transcript(400)
+    sentences = split_sentences(clean_text(transcript))
+    order = {sentence: n for n, sentence in enumerate(sentences)}
+
+    kept = split_sentences(condense_transcript(transcript, 500))
+
+    positions = [order[sentence] for sentence in kept]
+    assert positions == sorted(positions)
+
+
+def test_long_transcript_is_ranked_in_bounded_chunks(monkeypatch):
+    monkeypatch.setattr(condense_service, "MAX_SENTENCES", 6000)
+    sizes = []
+    tfidf = condense_service._tfidf
+
+    def spy(sentences):
+        sizes.append(len(sentences))
+        return tfidf(sentences)
+
+    monkeypatch.setattr(condense_service, "_tfidf", spy)
+    transcript = _transcript(8000)
+
+    start = time.perf_counter()
+    condensed = condense_transcript(transcript, 2000)
+    elapsed = time.perf_counter() - start
+
+    assert estimate_tokens(condensed) <= 2000
+    assert sum(sizes) == 6000
+    assert max(sizes) == condense_service.CHUNK_SENTENCES
+    assert elapsed < 30
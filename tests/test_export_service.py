@@ -0,0 +1,92 @@
+import csv
+import gzip
+import io
+import json
+import threading
+
+import pytest
+
+from backend.models.database import Category, Video
+from backend.services import export_service
+from backend.services.export_service import export_library
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    # Every row is its own chunk and batches are two rows long
+    monkeypatch.setattr(export_service, "EXPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(export_service, "EXPORT_CHUNK_BYTES", 1)
+
+
+def _videos(db, count, category=None, prefix="v"):
+    ids = []
+    for n in range(count):
+        video = Video(youtube_url=f"{prefix}{n}", title=f"Video {n}", category=category)
+        db.session.add(video)
+        db.session.commit()
+        ids.append(video.id)
+    return ids
+
+
+def _ndjson(chunks):
+    return [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+
+
+def test_exports_every_video_in_id_order(db, small_batches):
+    ids = _videos(db, 5)
+
+    rows = _ndjson(export_library())
+
+    assert [row["id"] for row in rows] == ids
+    assert rows[0]["title"] == "Video 0"
+    assert rows[0]["source"] == "youtube"
+
+
+def test_filters_by_category_across_batches(db, small_batches):
+    music = Category(name="music")
+    _videos(db, 3)
+    wanted = _videos(db, 3, category=music, prefix="m")
+
+    rows = _ndjson(export_library(category_id=music.id))
+
+    assert [row["id"] for row in rows] == wanted
+    assert {row["category"] for row in rows} == {"music"}
+
+
+def test_csv_and_gzip(db, small_batches):
+    _videos(db, 3)
+
+    body = gzip.decompress(b"".join(export_library("csv", compress=True)))
+    rows = list(csv.DictReader(io.StringIO(body.decode())))
+
+    assert [row["title"] for row in rows] == ["Video 0", "Video 1", "Video 2"]
+
+
+def test_writers_commit_during_an_export(app, db, small_batches):
+    _videos(db, 5)
+    chunks = export_library()
+    first = next(chunks)
+
+    errors = []
+
+    def write():
+        # Another thread has its own session, like a pipeline job
+        with app.app_context():
+            try:
+                db.session.add(Video(youtube_url="late", title="Late"))
+                db.session.commit()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    writer.join(timeout=30)
+
+    assert not writer.is_alive()
+    assert errors == []
+    rows = _ndjson([first, *chunks])
+    # Rows added behind the export's position are picked up
+    assert [row["title"] for row in rows][-1] == "Late"
+    assert len(rows) == 6
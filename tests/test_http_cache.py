@@ -0,0 +1,71 @@
+import pytest
+
+from backend.models.database import Video
+
+
+@pytest.fixture
+def client(app, db):
+    for n in range(3):
+        db.session.add(Video(youtube_url=f"v{n}", title=f"Video {n}"))
+    db.session.commit()
+    return app.test_client()
+
+
+def _get(client, etag=None, **headers):
+    if etag:
+        headers["If-None-Match"] = etag
+    return client.get("/api/videos", headers=headers)
+
+
+def test_matching_etag_gets_304(client):
+    first = _get(client)
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    again = _get(client, first.headers["ETag"])
+
+    assert again.status_code == 304
+    assert again.data == b""
+
+
+def test_edit_changes_the_etag(client, db):
+    etag = _get(client).headers["ETag"]
+    video = Video.query.filter_by(youtube_url="v0").one()
+    video.title = "Renamed"
+    db.session.commit()
+
+    response = _get(client, etag)
+
+    assert response.status_code == 200
+    assert "Renamed" in {v["title"] for v in response.get_json()}
+
+
+def test_deleting_the_newest_video_changes_the_etag(client, db):
+    etag = _get(client).headers["ETag"]
+    newest = Video.query.order_by(Video.updated_at.desc()).first()
+    db.session.delete(newest)
+    db.session.commit()
+
+    response = _get(client, etag)
+
+    assert response.status_code == 200
+    assert len(response.get_json()) == 2
+
+
+def test_no_last_modified_so_dates_never_answer_304(client):
+    first = _get(client)
+    assert "Last-Modified" not in first.headers
+
+    response = _get(client, **{"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+
+    assert response.status_code == 200
+
+
+def test_etag_depends_on_the_query(client):
+    etag = _get(client).headers["ETag"]
+
+    response = client.get(
+        "/api/videos?status=completed", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 200
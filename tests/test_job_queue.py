@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+
+from backend.models.database import Video, QueuedJob
+from backend.services import job_queue
+
+
+def _enqueue(db, url, priority=0):
+    video = Video(youtube_url=url, title=url, priority=priority)
+    db.session.add(video)
+    db.session.commit()
+    return job_queue.enqueue(video)
+
+
+def _expire(db, job):
+    job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_claim_leases_the_highest_priority_job(db):
+    _enqueue(db, "low")
+    high = _enqueue(db, "high", priority=5)
+
+    job = job_queue.claim("worker-a")
+
+    assert job.id == high.id
+    assert job.status == "running"
+    assert job.worker_id == "worker-a"
+    assert job.attempts == 1
+    assert job.lease_expires_at > datetime.utcnow()
+
+
+def test_claimed_job_is_not_claimed_again(db):
+    _enqueue(db, "only")
+
+    assert job_queue.claim("worker-a") is not None
+    assert job_queue.claim("worker-b") is None
+
+
+def test_heartbeat_extends_only_the_holders_lease(db):
+    _enqueue(db, "only")
+    job = job_queue.claim("worker-a")
+    _expire(db, job)
+
+    assert job_queue.heartbeat([job.id], "worker-b") == 0
+    assert job_queue.heartbeat([job.id], "worker-a") == 1
+    db.session.refresh(job)
+    assert job.lease_expires_at > datetime.utcnow()
+    assert job_queue.claim("worker-b") is None
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(db):
+    _enqueue(db, "only")
+    job = job_queue.claim("worker-a")
+    _expire(db, job)
+
+    reclaimed = job_queue.claim("worker-b")
+
+    assert reclaimed.id == job.id
+    assert reclaimed.worker_id == "worker-b"
+    assert reclaimed.attempts == 2
+    # The old holder can no longer renew or complete it
+    assert job_queue.heartbeat([job.id], "worker-a") == 0
+    job_queue.complete(job.id, "worker-a")
+    assert db.session.get(QueuedJob, job.id).status == "running"
+
+
+def test_job_is_abandoned_after_max_attempts(db, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_MAX_ATTEMPTS", 1)
+    queued = _enqueue(db, "crashes")
+    _expire(db, job_queue.claim("worker-a"))
+
+    assert job_queue.claim("worker-b") is None
+    assert db.session.get(QueuedJob, queued.id).status == "failed"
+    video = db.session.get(Video, queued.video_id)
+    assert video.status == "error"
+
+
+def test_active_count_ignores_expired_leases(db):
+    _enqueue(db, "first")
+    _enqueue(db, "second")
+    job = job_queue.claim("worker-a")
+    assert job_queue.active_count() == 2
+
+    _expire(db, job)
+    assert job_queue.active_count() == 1
+
+    job_queue.complete(job.id, "worker-a")
+    assert job_queue.active_count() == 1
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, data=None, **kwargs):
+        if event == "video_progress":
+            self.events.append((data["video_id"], data["status"]))
+
+
+def _set_video(db, video_id, status, progress, updated_at=None):
+    video = db.session.get(Video, video_id)
+    video.status = status
+    video.current_step = status.title()
+    video.progress = progress
+    if updated_at is not None:
+        video.updated_at = updated_at
+    db.session.commit()
+
+
+def test_relay_sends_worker_progress_until_the_job_ends(db):
+    socketio = FakeSocketIO()
+    relay = job_queue.ProgressRelay(socketio)
+    job = _enqueue(db, "relayed")
+
+    relay.poll()
+    assert socketio.events == [(job.video_id, "queued")]
+
+    claimed = job_queue.claim("worker-a")
+    _set_video(db, job.video_id, "processing", 40)
+    relay.poll()
+    relay.poll()
+    assert socketio.events[1:] == [(job.video_id, "processing")]
+
+    # A worker whose clock runs an hour behind stamps an older updated_at
+    behind = datetime.utcnow() - timedelta(hours=1)
+    _set_video(db, job.video_id, "completed", 100, updated_at=behind)
+    job_queue.complete(claimed.id, "worker-a")
+    relay.poll()
+    relay.poll()
+    assert socketio.events[2:] == [(job.video_id, "completed")]
+
+
+def test_relay_sends_jobs_that_finished_between_polls(db):
+    socketio = FakeSocketIO()
+    relay = job_queue.ProgressRelay(socketio)
+
+    job = _enqueue(db, "quick")
+    job_queue.claim("worker-a")
+    _set_video(db, job.video_id, "error", 0)
+    job_queue.complete(job.id, "worker-a")
+    relay.poll()
+
+    assert socketio.events == [(job.video_id, "error")]
+
+
+def test_relay_ignores_jobs_from_before_it_started(db):
+    job = _enqueue(db, "old")
+    job_queue.claim("worker-a")
+    job_queue.complete(job.id, "worker-a")
+    socketio = FakeSocketIO()
+
+    job_queue.ProgressRelay(socketio).poll()
+
+    assert socketio.events == []
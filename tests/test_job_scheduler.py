@@ -0,0 +1,130 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from backend.utils import job_scheduler
+from backend.utils.job_scheduler import (
+    DEFAULT_JOB_OVERHEAD_SECONDS,
+    DEFAULT_SECONDS_PER_AUDIO_SECOND,
+    Job,
+    JobScheduler,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(job_scheduler, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def make_scheduler():
+    """A one-worker scheduler whose worker is held busy by a first job."""
+    release = threading.Event()
+
+    def make(policy, aging_rate=1.0, blocker_duration=None):
+        scheduler = JobScheduler(lambda video_id: release.wait(), 1, policy, aging_rate)
+        scheduler.submit(Job("blocker", duration=blocker_duration))
+        deadline = time.monotonic() + 5
+        while scheduler.queued_count() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert scheduler.queued_count() == 0
+        return scheduler
+
+    yield make
+    release.set()
+
+
+def _order(scheduler):
+    return [entry["video_id"] for entry in scheduler.snapshot()["queued"]]
+
+
+def _submit(scheduler, video_id, priority=0, duration=None):
+    scheduler.submit(Job(video_id, priority=priority, duration=duration))
+
+
+def test_fifo_keeps_submission_order(clock, make_scheduler):
+    scheduler = make_scheduler("fifo")
+    _submit(scheduler, "long", duration=3600)
+    _submit(scheduler, "urgent", priority=5, duration=60)
+    _submit(scheduler, "short", duration=10)
+
+    assert _order(scheduler) == ["long", "urgent", "short"]
+
+
+def test_priority_runs_higher_priority_first(clock, make_scheduler):
+    scheduler = make_scheduler("priority")
+    _submit(scheduler, "first", duration=3600)
+    _submit(scheduler, "urgent", priority=5, duration=3600)
+    _submit(scheduler, "second", duration=10)
+
+    # Equal priorities stay in submission order whatever their length
+    assert _order(scheduler) == ["urgent", "first", "second"]
+
+
+def test_sjf_orders_equal_priority_by_estimate(clock, make_scheduler):
+    scheduler = make_scheduler("sjf")
+    _submit(scheduler, "long", duration=3600)
+    _submit(scheduler, "unknown")
+    _submit(scheduler, "short", duration=10)
+    _submit(scheduler, "urgent", priority=5, duration=7200)
+
+    assert _order(scheduler) == ["urgent", "short", "unknown", "long"]
+
+
+def test_sjf_aging_prevents_starvation(clock, make_scheduler):
+    scheduler = make_scheduler("sjf")
+    _submit(scheduler, "long", duration=3000)
+    _submit(scheduler, "short-0", duration=10)
+    assert _order(scheduler) == ["short-0", "long"]
+
+    # Short jobs keep arriving while the long one waits. Its head start from
+    # waiting grows until it goes ahead of every new arrival
+    for minute in range(1, 21):
+        clock.now += 60
+        _submit(scheduler, f"short-{minute}", duration=10)
+
+    order = _order(scheduler)
+    newer = [f"short-{minute}" for minute in range(16, 21)]
+    assert all(order.index("long") < order.index(name) for name in newer)
+
+
+def test_sjf_without_aging_starves_long_jobs(clock, make_scheduler):
+    scheduler = make_scheduler("sjf", aging_rate=0)
+    _submit(scheduler, "long", duration=3000)
+    for minute in range(21):
+        clock.now += 60
+        _submit(scheduler, f"short-{minute}", duration=10)
+
+    assert _order(scheduler)[-1] == "long"
+
+
+def test_snapshot_estimates_start_times(clock, make_scheduler):
+    scheduler = make_scheduler("fifo", blocker_duration=100)
+    _submit(scheduler, "a", duration=200)
+    _submit(scheduler, "b", duration=50)
+
+    def estimate(duration):
+        return (
+            DEFAULT_JOB_OVERHEAD_SECONDS + duration * DEFAULT_SECONDS_PER_AUDIO_SECOND
+        )
+
+    snapshot = scheduler.snapshot()
+    starts = [entry["estimated_start_in_seconds"] for entry in snapshot["queued"]]
+
+    assert [entry["position"] for entry in snapshot["queued"]] == [1, 2]
+    assert starts == [estimate(100), estimate(100) + estimate(200)]
+    assert snapshot["running"][0]["video_id"] == "blocker"
+
+    # A job running past its estimate is assumed to finish now
+    clock.now += 1000
+    starts = [e["estimated_start_in_seconds"] for e in scheduler.snapshot()["queued"]]
+    assert starts == [0.0, estimate(200)]
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        JobScheduler(lambda video_id: None, policy="lifo")
@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from backend.models.database import Video
+from backend.services import llm_gateway, llm_stage_service
+from backend.services.llm_gateway import CircuitBreaker, LLMUnavailableError
+from backend.services.llm_stage_service import (
+    PENDING_LLM,
+    _claim_due_video,
+    park_for_llm,
+    retry_video,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(
+        llm_gateway, "time", SimpleNamespace(monotonic=lambda: clock.now)
+    )
+    return clock
+
+
+class FakeTracker:
+    def __init__(self):
+        self.statuses = []
+
+    def set_status(self, status, step, progress):
+        self.statuses.append(status)
+
+
+def _video(db, url="v", **fields):
+    video = Video(youtube_url=url, title=url, **fields)
+    db.session.add(video)
+    db.session.commit()
+    return video.id
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(3, 30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now += 29
+    assert not breaker.allow()
+
+
+def test_half_open_breaker_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(1, 30)
+    breaker.record_failure()
+    clock.now += 30
+
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(3, 30)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_successful_probe_closes_the_breaker(clock):
+    breaker = CircuitBreaker(1, 30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert breaker.allow()
+    assert breaker.allow()
+
+
+def test_park_backs_off_exponentially(db, monkeypatch):
+    monkeypatch.setattr(llm_stage_service, "LLM_RETRY_BASE_SECONDS", 30)
+    monkeypatch.setattr(llm_stage_service, "LLM_RETRY_MAX_SECONDS", 100)
+    video_id = _video(db, status="processing", llm_claimed_at=datetime.utcnow())
+    tracker = FakeTracker()
+
+    delays = []
+    for _ in range(3):
+        before = datetime.utcnow()
+        park_for_llm(video_id, tracker, LLMUnavailableError("down"))
+        video = db.session.get(Video, video_id)
+        delays.append(round((video.next_llm_retry_at - before).total_seconds()))
+
+    assert delays == [30, 60, 100]
+    assert video.status == PENDING_LLM
+    assert video.llm_attempts == 3
+    assert video.llm_claimed_at is None
+    assert video.error_message == "down"
+    assert tracker.statuses == [PENDING_LLM] * 3
+
+
+def test_retry_parks_the_video_when_the_llm_is_down(db, monkeypatch):
+    video_id = _video(db, status="processing", llm_claimed_at=datetime.utcnow())
+
+    def unavailable(video_id, tracker):
+        raise LLMUnavailableError("connection refused")
+
+    monkeypatch.setattr(llm_stage_service, "run_llm_stage", unavailable)
+    retry_video(video_id)
+
+    video = db.session.get(Video, video_id)
+    assert video.status == PENDING_LLM
+    assert video.next_llm_retry_at > datetime.utcnow()
+    assert video.llm_claimed_at is None
+
+
+def test_claims_only_due_videos_once(db):
+    now = datetime.utcnow()
+    _video(db, "later", status=PENDING_LLM, next_llm_retry_at=now + timedelta(hours=1))
+    due = _video(db, "due", status=PENDING_LLM, next_llm_retry_at=now)
+
+    assert _claim_due_video() == due
+    video = db.session.get(Video, due)
+    assert video.status == "processing"
+    assert video.llm_claimed_at is not None
+
+    # Claimed by this process now, and the other one is not due
+    assert _claim_due_video() is None
+
+
+def test_expired_claim_is_taken_over(db, monkeypatch):
+    monkeypatch.setattr(llm_stage_service, "JOB_LEASE_SECONDS", 60)
+    now = datetime.utcnow()
+    fresh = _video(db, "fresh", status="processing", llm_claimed_at=now)
+    stale = _video(
+        db,
+        "stale",
+        status="processing",
+        llm_claimed_at=now - timedelta(seconds=61),
+    )
+    # Pipeline jobs in processing have no claim and are never taken
+    _video(db, "pipeline", status="processing")
+
+    assert _claim_due_video() == stale
+    assert db.session.get(Video, stale).llm_claimed_at >= now
+    assert _claim_due_video() is None
+    assert db.session.get(Video, fresh).llm_claimed_at == now
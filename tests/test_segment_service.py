@@ -0,0 +1,84 @@
+import pytest
+
+from backend.models.database import Video
+from backend.services.segment_service import SegmentIndex, parse_timestamp
+
+SEGMENTS = [
+    {"start": 0.0, "end": 4.0, "text": "Welcome to the category overview."},
+    {"start": 4.0, "end": 8.0, "text": "My cat sat on the"},
+    {"start": 8.0, "end": 12.0, "text": "mat, and the CAT slept."},
+    {"start": 12.0, "end": 15.0, "text": "Concatenate strings"},
+    {"start": 15.0, "end": 20.0, "text": "  "},
+    {"start": 20.0, "end": 25.0, "text": "Scatter plots, then cat."},
+]
+
+
+@pytest.fixture
+def index():
+    return SegmentIndex(SEGMENTS)
+
+
+@pytest.mark.parametrize(
+    "phrase, expected",
+    [
+        # Whole words only: not "category", "concatenate" or "scatter"
+        ("cat", [1, 2, 4]),
+        ("Cat!", [1, 2, 4]),
+        ("categ", []),
+        ("category", [0]),
+        ("welcome", [0]),
+        ("then cat", [4]),
+        ("sat on", [1]),
+        ("at", []),
+        ("", []),
+        ("...", []),
+    ],
+)
+def test_search_matches_whole_words(index, phrase, expected):
+    assert index.search(phrase) == expected
+
+
+def test_search_finds_phrases_across_segments(index):
+    assert index.search("on the mat") == [1, 2]
+    assert index.search("slept concatenate") == [2, 3]
+    # Whole words at both ends of the crossing phrase too
+    assert index.search("the ma") == []
+
+
+def test_search_finds_repeated_adjacent_words():
+    index = SegmentIndex([{"start": 0, "end": 1, "text": "no no no"}])
+
+    assert index.search("no no") == [0]
+
+
+def test_between_returns_overlapping_segments(index):
+    assert index.between(5, 9) == [1, 2]
+    assert index.between(None, 4) == [0]
+    assert index.between(20, None) == [4]
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [("90", 90), ("1:30", 90), ("1:02:03", 3723), (" 0 ", 0), ("2.5", 2.5)],
+)
+def test_parse_timestamp(value, seconds):
+    assert parse_timestamp(value) == seconds
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["", "abc", "1:", ":30", "1:2:3:4", "nan", "inf", "-5", "-0", "-0:30", "1:-30"],
+)
+def test_parse_timestamp_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        parse_timestamp(value)
+
+
+def test_segments_route_rejects_bad_timestamps(app, db):
+    video = Video(youtube_url="https://youtu.be/abcdefghijk", title="t")
+    db.session.add(video)
+    db.session.commit()
+
+    response = app.test_client().get(f"/api/videos/{video.id}/segments?start=nan")
+
+    assert response.status_code == 400
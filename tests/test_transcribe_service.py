@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from backend.services import transcribe_service
+from backend.services.asr_engines import SAMPLE_RATE
+
+
+class FakeEngine:
+    name = "fake"
+    supports_batching = True
+
+    def __init__(self):
+        self.calls = []
+        self.seconds = 20
+
+    def transcribe(self, model, audio_path):
+        self.calls.append("transcribe")
+        return {"text": "whole", "segments": [], "language": "en"}
+
+    def load_audio(self, audio_path):
+        self.calls.append("load_audio")
+        return np.zeros(self.seconds * SAMPLE_RATE, dtype=np.float32)
+
+    def transcribe_windows(self, model, windows):
+        self.calls.append(f"batch of {len(windows)}")
+        return [
+            {"text": f"w{i}", "segments": [], "language": "en"}
+            for i in range(len(windows))
+        ]
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = FakeEngine()
+    monkeypatch.setattr(transcribe_service, "get_engine", lambda: engine)
+    monkeypatch.setattr(transcribe_service, "load_model", lambda name: None)
+    monkeypatch.setattr(transcribe_service, "WHISPER_BATCH_SIZE", 4)
+    monkeypatch.setattr(transcribe_service, "WHISPER_BATCH_WAIT_MS", 0)
+    monkeypatch.setattr(transcribe_service, "WHISPER_BATCH_WINDOWS", False)
+    monkeypatch.setattr(transcribe_service, "_batchers", {})
+    return engine
+
+
+def _probe(monkeypatch, seconds):
+    probed = []
+
+    def probe_duration(path):
+        probed.append(path)
+        return seconds
+
+    monkeypatch.setattr(transcribe_service, "probe_duration", probe_duration)
+    return probed
+
+
+def test_long_audio_is_not_decoded_before_transcribing(engine, monkeypatch):
+    probed = _probe(monkeypatch, None)
+
+    result = transcribe_service._run_engine(None, "base", "talk.mp3", 600)
+
+    assert result["text"] == "whole"
+    assert engine.calls == ["transcribe"]
+    assert probed == []
+
+
+def test_duration_is_probed_when_unknown(engine, monkeypatch):
+    probed = _probe(monkeypatch, 45.0)
+
+    transcribe_service._run_engine(None, "base", "talk.mp3")
+
+    assert probed == ["talk.mp3"]
+    assert engine.calls == ["transcribe"]
+
+
+def test_unreadable_duration_falls_back_to_the_engine(engine, monkeypatch):
+    _probe(monkeypatch, None)
+
+    transcribe_service._run_engine(None, "base", "talk.mp3")
+
+    assert engine.calls == ["transcribe"]
+
+
+def test_short_clips_join_a_batch(engine):
+    result = transcribe_service._run_engine(None, "base", "clip.wav", 20)
+
+    assert engine.calls == ["load_audio", "batch of 1"]
+    assert result["text"] == "w0"
+
+
+def test_windows_of_long_audio_batch_when_enabled(engine, monkeypatch):
+    monkeypatch.setattr(transcribe_service, "WHISPER_BATCH_WINDOWS", True)
+    engine.seconds = 45
+
+    transcribe_service._run_engine(None, "base", "talk.mp3", 45)
+
+    assert engine.calls == ["load_audio", "batch of 2"]
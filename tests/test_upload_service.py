@@ -0,0 +1,176 @@
+import io
+import os
+
+import pytest
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from backend.services import upload_service
+from backend.services.upload_service import (
+    UploadError,
+    ingest_directory,
+    save_multipart_upload,
+)
+
+BOUNDARY = "testboundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Upload store and import root in a temporary directory."""
+    uploads = tmp_path / "uploads"
+    imports = tmp_path / "import"
+    uploads.mkdir()
+    imports.mkdir()
+    monkeypatch.setattr(upload_service, "UPLOAD_DIR", uploads)
+    monkeypatch.setattr(upload_service, "UPLOAD_IMPORT_ROOT", imports)
+    # Small chunks make every part span several reads
+    monkeypatch.setattr(upload_service, "UPLOAD_CHUNK_SIZE", 7)
+    monkeypatch.setattr(upload_service, "probe_duration", lambda path: 12.5)
+    return uploads, imports
+
+
+def _body(*parts):
+    """A multipart body from (name, filename, content) parts."""
+    body = b""
+    for name, filename, content in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n".encode()
+        if filename is not None:
+            body += b"Content-Type: application/octet-stream\r\n"
+        body += b"\r\n" + content + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def _upload(*parts):
+    return save_multipart_upload(io.BytesIO(_body(*parts)), CONTENT_TYPE)
+
+
+def _stored(uploads):
+    return sorted(p.name for p in uploads.iterdir())
+
+
+def test_streams_files_and_fields(store):
+    uploads, _ = store
+    audio = os.urandom(1000)
+
+    files, fields = _upload(
+        ("files", "talk.mp3", audio),
+        ("priority", None, b"3"),
+        ("files", "notes.wav", b"RIFF" + bytes(200)),
+    )
+
+    assert fields == {"priority": "3"}
+    assert [metadata["title"] for _, metadata in files] == ["talk", "notes"]
+    content_hash, metadata = files[0]
+    assert metadata["duration"] == 12
+    assert metadata["size"] == len(audio)
+    assert (uploads / metadata["audio_file"]).read_bytes() == audio
+    assert metadata["audio_file"] == f"{content_hash}.mp3"
+    # No temporary files are left behind
+    assert not [name for name in _stored(uploads) if name.startswith(".incoming")]
+
+
+def test_skips_empty_file_parts(store):
+    uploads, _ = store
+
+    files, fields = _upload(
+        ("files", "", b""),
+        ("quality", None, b"fast"),
+        ("files", "clip.mp3", b"audio"),
+    )
+
+    assert len(files) == 1
+    assert fields == {"quality": "fast"}
+    assert len(_stored(uploads)) == 2
+
+
+def test_deduplicates_by_content_hash(store):
+    uploads, _ = store
+
+    ((first_hash, first),) = _upload(("files", "a.mp3", b"same audio"))[0]
+    ((second_hash, second),) = _upload(("files", "b.m4a", b"same audio"))[0]
+
+    assert first_hash == second_hash
+    assert second["audio_file"] == first["audio_file"]
+    assert _stored(uploads) == sorted([first["audio_file"], f"{first_hash}.json"])
+
+
+def test_rejects_unsupported_files_and_bad_requests(store):
+    uploads, _ = store
+
+    with pytest.raises(UploadError):
+        _upload(("files", "script.sh", b"#!/bin/sh"))
+    with pytest.raises(UploadError):
+        save_multipart_upload(io.BytesIO(b"{}"), "application/json")
+    with pytest.raises(UploadError):
+        # The body stops in the middle of the file
+        save_multipart_upload(
+            io.BytesIO(_body(("files", "cut.mp3", b"x" * 100))[:-40]), CONTENT_TYPE
+        )
+
+    assert _stored(uploads) == []
+
+
+def test_size_limit_aborts_the_upload(store, monkeypatch):
+    uploads, _ = store
+    monkeypatch.setattr(upload_service, "MAX_UPLOAD_MB", 1)
+
+    with pytest.raises(RequestEntityTooLarge):
+        _upload(("files", "big.mp3", bytes(1024 * 1024 + 1)))
+
+    assert _stored(uploads) == []
+
+
+def test_upload_route_answers_413_over_the_limit(app, store, monkeypatch):
+    monkeypatch.setattr(upload_service, "MAX_UPLOAD_MB", 1)
+    monkeypatch.setattr(upload_service, "UPLOAD_CHUNK_SIZE", 64 * 1024)
+
+    response = app.test_client().post(
+        "/api/videos/upload",
+        data=_body(("files", "big.mp3", bytes(1024 * 1024 + 1))),
+        content_type=CONTENT_TYPE,
+    )
+
+    assert response.status_code == 413
+
+
+def test_imports_media_files_below_the_root(store):
+    uploads, imports = store
+    (imports / "talks" / "nested").mkdir(parents=True)
+    (imports / "talks" / "one.mp3").write_bytes(b"one")
+    (imports / "talks" / "readme.txt").write_text("not media")
+    (imports / "talks" / "nested" / "two.wav").write_bytes(b"two")
+
+    assert [m["title"] for _, m in ingest_directory("talks")] == ["one"]
+    titles = [m["title"] for _, m in ingest_directory("talks", recursive=True)]
+    assert sorted(titles) == ["one", "two"]
+    assert (imports / "talks" / "one.mp3").exists()
+
+
+@pytest.mark.parametrize("directory", ["..", "../uploads", "talks/../..", "/etc"])
+def test_import_refuses_directories_outside_the_root(store, directory):
+    _, imports = store
+    (imports / "talks").mkdir()
+
+    with pytest.raises(UploadError):
+        ingest_directory(directory)
+
+
+def test_import_refuses_symlinks_out_of_the_root(store, tmp_path):
+    _, imports = store
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "secret.mp3").write_bytes(b"secret")
+    (imports / "talks").mkdir()
+    (imports / "talks" / "ok.mp3").write_bytes(b"ok")
+    (imports / "talks" / "linked.mp3").symlink_to(outside / "secret.mp3")
+    (imports / "talks" / "linked-dir").symlink_to(outside)
+    (imports / "escape").symlink_to(outside)
+
+    with pytest.raises(UploadError):
+        ingest_directory("escape")
+    titles = [m["title"] for _, m in ingest_directory("talks", recursive=True)]
+    assert titles == ["ok"]
@@ -0,0 +1,145 @@
+import wave
+
+import numpy as np
+import pytest
+
+from backend.services import vad_service
+from backend.services.vad_service import (
+    SAMPLE_RATE,
+    TrimmedAudio,
+    _runs,
+    detect_speech,
+    trim_silence,
+)
+
+
+def _recording(seconds, speech):
+    """Faint noise with 440 Hz tones over the ``speech`` (start, end) spans."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = rng.normal(0, 0.001, len(t)).astype(np.float32)
+    for start, end in speech:
+        span = (t >= start) & (t < end)
+        audio[span] += 0.3 * np.sin(2 * np.pi * 440 * t[span])
+    return (np.clip(audio, -1, 1) * 32767).astype("<i2")
+
+
+def _trimmed(tmp_path, regions, seconds=60):
+    samples = np.arange(int(seconds * SAMPLE_RATE)).astype("<i2")
+    with open(tmp_path / "audio.pcm", "w+b") as pcm_file:
+        pcm_file.write(samples.tobytes())
+        trimmed = TrimmedAudio(pcm_file, len(samples), regions)
+    return samples, trimmed
+
+
+def test_runs_finds_true_spans():
+    starts, ends = _runs(np.array([1, 1, 0, 0, 1, 0, 1], dtype=bool))
+
+    assert list(zip(starts, ends)) == [(0, 2), (4, 5), (6, 7)]
+    assert [len(r) for r in _runs(np.zeros(4, dtype=bool))] == [0, 0]
+
+
+def test_detect_speech_finds_tones_in_noise():
+    audio = _recording(60, [(10, 20), (40, 45)]).astype(np.float32) / 32768
+
+    regions = detect_speech(audio)
+
+    assert len(regions) == 2
+    for (start, end), (expected_start, expected_end) in zip(
+        regions, [(10, 20), (40, 45)]
+    ):
+        assert start == pytest.approx(expected_start, abs=0.3)
+        assert end == pytest.approx(expected_end, abs=0.3)
+
+
+def test_detect_speech_closes_short_pauses_and_drops_blips(monkeypatch):
+    monkeypatch.setattr(vad_service, "VAD_MIN_SILENCE_MS", 1000)
+    audio = _recording(30, [(5, 8), (8.5, 12), (20, 20.1)])
+
+    regions = detect_speech(audio.astype(np.float32) / 32768)
+
+    assert len(regions) == 1
+    assert regions[0][0] == pytest.approx(5, abs=0.3)
+    assert regions[0][1] == pytest.approx(12, abs=0.3)
+
+
+def test_detect_speech_on_short_audio():
+    assert detect_speech(np.zeros(0, dtype=np.float32)) == []
+    assert detect_speech(np.zeros(100, dtype=np.float32)) == [(0.0, 100 / SAMPLE_RATE)]
+
+
+def test_original_time_maps_across_regions(tmp_path):
+    _, trimmed = _trimmed(tmp_path, [(10.0, 20.0), (30.0, 35.0)])
+    trimmed.cleanup()
+
+    assert trimmed.original_time(0) == 10.0
+    assert trimmed.original_time(4.5) == 14.5
+    assert trimmed.original_time(12.0) == 32.0
+    # Exactly on the boundary a start opens the next region and an end
+    # closes the previous one
+    assert trimmed.original_time(10.0) == 30.0
+    assert trimmed.original_time(10.0, end=True) == 20.0
+    assert trimmed.speech_seconds == 15.0
+    assert trimmed.skipped_ratio == pytest.approx(0.75)
+
+
+def test_restore_shifts_segment_times(tmp_path):
+    _, trimmed = _trimmed(tmp_path, [(10.0, 20.0), (30.0, 35.0)])
+    trimmed.cleanup()
+    result = {
+        "segments": [
+            {"start": 0.0, "end": 10.0},
+            {"start": 10.0, "end": 15.0},
+        ]
+    }
+
+    trimmed.restore(result)
+
+    assert result["segments"] == [
+        {"start": 10.0, "end": 20.0},
+        {"start": 30.0, "end": 35.0},
+    ]
+
+
+def test_trimmed_file_holds_region_samples(tmp_path):
+    regions = [(1.0, 2.5), (4.0, 4.25)]
+    samples, trimmed = _trimmed(tmp_path, regions)
+    try:
+        with wave.open(trimmed.path) as f:
+            written = np.frombuffer(f.readframes(f.getnframes()), "<i2")
+    finally:
+        trimmed.cleanup()
+
+    expected = np.concatenate(
+        [samples[int(s * SAMPLE_RATE) : int(e * SAMPLE_RATE)] for s, e in regions]
+    )
+    assert np.array_equal(written, expected)
+
+
+def test_trim_silence_streams_decoded_audio(tmp_path, monkeypatch):
+    # A small block size makes the decode span several blocks and frames
+    # straddle block boundaries
+    monkeypatch.setattr(vad_service, "DECODE_BLOCK_BYTES", 100_001)
+    audio = _recording(60, [(10, 20)])
+    raw = tmp_path / "audio.raw"
+    audio.tofile(raw)
+    # Stands in for ffmpeg: the file already holds 16 kHz mono s16le
+    monkeypatch.setattr(vad_service, "_decode_command", lambda path: ["cat", path])
+
+    trimmed = trim_silence(raw)
+    try:
+        assert trimmed.regions == detect_speech(audio.astype(np.float32) / 32768)
+        assert trimmed.audio_seconds == 60
+    finally:
+        trimmed.cleanup()
+
+
+def test_trim_silence_reports_decode_errors(monkeypatch):
+    monkeypatch.setattr(
+        vad_service,
+        "_decode_command",
+        lambda path: ["sh", "-c", "echo broken >&2; exit 1"],
+    )
+
+    with pytest.raises(Exception, match="broken"):
+        trim_silence("missing.mp3")